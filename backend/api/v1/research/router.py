@@ -1,11 +1,13 @@
 """Research API router for Ariadne backend."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any
+from auth.jwt_middleware import get_current_user
+from models.user import User
+from services import get_research_service
 from services.research_service import ResearchService
 
 router = APIRouter()
-research_service = ResearchService()
 
 
 @router.get("/")
@@ -15,17 +17,23 @@ async def get_research_status():
 
 
 @router.get("/tools")
-async def get_available_tools():
+async def get_available_tools(research_service: ResearchService = Depends(get_research_service)):
     """Get list of available research tools."""
     tools = research_service.get_available_tools()
     return {"tools": tools, "count": len(tools)}
 
 
 @router.post("/search")
-async def search_research(query: Dict[str, Any]):
+async def search_research(
+    query: Dict[str, Any],
+    current_user: User = Depends(get_current_user),
+    research_service: ResearchService = Depends(get_research_service),
+):
     """Perform research search."""
     query_text = query.get("query", "")
-    user_id = query.get("user_id")
+    # Results are cached per user, so the owner comes from the verified token
+    # rather than the request body
+    user_id = str(current_user.user_id)
     
     if not query_text:
         raise HTTPException(status_code=400, detail="Query is required")
@@ -36,7 +44,9 @@ async def search_research(query: Dict[str, Any]):
 
 
 @router.post("/analyze")
-async def analyze_content(content: Dict[str, Any]):
+async def analyze_content(
+    content: Dict[str, Any], research_service: ResearchService = Depends(get_research_service)
+):
     """Analyze research content."""
     content_text = content.get("content", "")
     user_id = content.get("user_id")
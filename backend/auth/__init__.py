@@ -0,0 +1,10 @@
+"""Authentication and request throttling for the /api/v1 mount."""
+
+# Only the /api/v1 mount is wrapped by the auth middlewares, so public routes
+# on the root app never reach them; these cover the mount's own docs
+PUBLIC_PATHS = frozenset({
+    "/api/v1/docs",
+    "/api/v1/docs/oauth2-redirect",
+    "/api/v1/redoc",
+    "/api/v1/openapi.json",
+})
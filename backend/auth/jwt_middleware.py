@@ -1,122 +1,312 @@
 """JWT middleware for FastAPI."""
 
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 import jwt
+import orjson
+from cachetools import TLRUCache
 from fastapi import Depends, HTTPException, Request, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
+from fastapi.security import HTTPBearer
 
+from auth import PUBLIC_PATHS
 from core.config import get_settings
+from core.config_fixed import SecurityConfig
 from models.user import User
 
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
 security = HTTPBearer()
 
+# Verified payloads keyed by (token type, token digest). Each entry lives for
+# min(TTL, time left until the token's own ``exp``), so an expired token is
+# never served from the cache.
+TOKEN_CACHE_MAXSIZE = 10000
+TOKEN_CACHE_TTL_SECONDS = 30
+
+
+def _token_cache_ttu(key, payload: "JWTPayload", now: float) -> float:
+    return min(now + TOKEN_CACHE_TTL_SECONDS, payload.exp)
+
+
+_token_cache: TLRUCache = TLRUCache(
+    maxsize=TOKEN_CACHE_MAXSIZE, ttu=_token_cache_ttu, timer=time.time
+)
+_token_cache_lock = threading.Lock()
+
+# Asymmetric signing can take milliseconds, so it runs off the event loop
+_jwt_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jwt-sign")
+
+# Single decoder instance shared by every verification
+_jwt_decoder = jwt.PyJWT(options={"require": ["exp", "sub", "type"]})
+
+
+def security_settings() -> SecurityConfig:
+    """Get the JWT settings; raises when ``SECURITY_SECRET_KEY`` is not configured."""
+    config = get_settings().security
+    if config is None:
+        raise RuntimeError("JWT security is not configured; set SECURITY_SECRET_KEY")
+    return config
+
+
+@lru_cache(maxsize=8)
+def _get_signing_key(secret_key: str, algorithm: str) -> Any:
+    """Parse signing key material once per secret and algorithm."""
+    return jwt.get_algorithm_by_name(algorithm).prepare_key(secret_key)
+
+
+@lru_cache(maxsize=8)
+def _get_verification_key(secret_key: str, algorithm: str) -> Any:
+    """Parse verification key material once per secret and algorithm."""
+    key = _get_signing_key(secret_key, algorithm)
+    # Asymmetric private keys verify through their public half
+    public_key = getattr(key, "public_key", None)
+    return public_key() if callable(public_key) else key
+
+
+def _current_signing_key() -> Any:
+    """Get the parsed signing key for the configured secret and algorithm."""
+    config = security_settings()
+    return _get_signing_key(config.secret_key, config.algorithm)
+
+
+def _current_verification_key() -> Any:
+    """Get the parsed verification key for the configured secret and algorithm."""
+    config = security_settings()
+    return _get_verification_key(config.secret_key, config.algorithm)
+
+
+# Additional verification keys indexed by the JWT ``kid`` header, so key
+# rotation selects one key directly instead of trying each key in turn
+_keys_by_kid: Dict[str, Any] = {}
+
+
+def register_verification_key(kid: str, secret_key: str, algorithm: Optional[str] = None) -> None:
+    """Register a verification key for tokens carrying the given ``kid``."""
+    _keys_by_kid[kid] = _get_verification_key(secret_key, algorithm or security_settings().algorithm)
+
+
+def _verification_key_for(token: str) -> Any:
+    """Select the verification key for a token from its ``kid`` header."""
+    if _keys_by_kid:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = _keys_by_kid.get(kid)
+        if key is not None:
+            return key
+    return _current_verification_key()
+
+
+# HMAC tokens are verified inline: the digest runs in C via hashlib, and
+# orjson parses the segments without PyJWT's per-call json.loads
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+_REQUIRED_CLAIMS = ("exp", "sub", "type")
+
+
+def _b64url_decode(segment: bytes) -> bytes:
+    """Decode an unpadded base64url JWT segment."""
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def _is_numeric_date(value: Any) -> bool:
+    """Check a registered time claim is a NumericDate (bools are not numbers here)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def decode_hmac_token(token: str, key: bytes, algorithm: str) -> Dict:
+    """Verify an HMAC-signed token and return its claims.
+
+    Raises the same ``jwt.PyJWTError`` subclasses as ``PyJWT.decode``.
+    """
+    if not isinstance(key, (bytes, bytearray)):
+        raise jwt.InvalidKeyError("HMAC verification key must be bytes")
+    digest = _HMAC_DIGESTS.get(algorithm)
+    if digest is None:
+        raise jwt.InvalidAlgorithmError("Algorithm not supported")
+    
+    try:
+        signing_input, _, crypto_segment = token.encode("ascii").rpartition(b".")
+        header_segment, _, payload_segment = signing_input.partition(b".")
+        if not header_segment or not payload_segment or b"." in payload_segment:
+            raise jwt.DecodeError("Wrong number of segments")
+        header = orjson.loads(_b64url_decode(header_segment))
+        signature = _b64url_decode(crypto_segment)
+    except (UnicodeEncodeError, binascii.Error, orjson.JSONDecodeError) as e:
+        raise jwt.DecodeError(f"Invalid token encoding: {e}") from e
+    
+    if not isinstance(header, dict) or header.get("alg") != algorithm:
+        raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+    
+    expected = hmac.new(key, signing_input, digest).digest()
+    if not hmac.compare_digest(expected, signature):
+        raise jwt.InvalidSignatureError("Signature verification failed")
+    
+    try:
+        claims = orjson.loads(_b64url_decode(payload_segment))
+    except (binascii.Error, orjson.JSONDecodeError) as e:
+        raise jwt.DecodeError(f"Invalid payload encoding: {e}") from e
+    if not isinstance(claims, dict):
+        raise jwt.DecodeError("Invalid payload string: must be a json object")
+    
+    for claim in _REQUIRED_CLAIMS:
+        if claim not in claims:
+            raise jwt.MissingRequiredClaimError(claim)
+    
+    now = time.time()
+    exp = claims["exp"]
+    if not _is_numeric_date(exp):
+        raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.")
+    if exp <= now:
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    nbf = claims.get("nbf")
+    if nbf is not None:
+        if not _is_numeric_date(nbf):
+            raise jwt.DecodeError("Not Before claim (nbf) must be an integer.")
+        if nbf > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (nbf)")
+    iat = claims.get("iat")
+    if iat is not None:
+        if not _is_numeric_date(iat):
+            raise jwt.InvalidIssuedAtError("Issued At claim (iat) must be an integer.")
+        if iat > now:
+            raise jwt.ImmatureSignatureError("The token is not yet valid (iat)")
+    
+    return claims
+
+
+def encode_token(claims: Dict) -> str:
+    """Sign claims with the configured key and algorithm."""
+    return jwt.encode(claims, _current_signing_key(), algorithm=security_settings().algorithm)
+
+
+def decode_token(token: str) -> Dict:
+    """Verify a token with the configured key and algorithm and return its claims.
+    
+    Raises ``jwt.PyJWTError`` for a bad token and ``RuntimeError`` when
+    signing is not configured.
+    """
+    algorithm = security_settings().algorithm
+    if algorithm in _HMAC_DIGESTS:
+        return decode_hmac_token(token, _verification_key_for(token), algorithm)
+    return _jwt_decoder.decode(token, _verification_key_for(token), algorithms=[algorithm])
+
 
 class JWTPayload:
     """JWT payload data structure."""
     
-    def __init__(self, user_id: str, email: str, subscription_tier: str, exp: datetime):
+    __slots__ = ("user_id", "email", "subscription_tier", "exp", "session_id")
+    
+    def __init__(self, user_id: str, email: str, subscription_tier: str, exp: int,
+                 session_id: Optional[str] = None):
         self.user_id = user_id
         self.email = email
-        self.subscription_tier = subscription_tier
+        # Only a handful of tiers exist; interning makes role lookups hit by identity
+        self.subscription_tier = sys.intern(subscription_tier)
         self.exp = exp
+        # Login session the token was issued for, when there is one
+        self.session_id = session_id
     
     @classmethod
-    def from_token(cls, token: str) -> 'JWTPayload':
-        """Create payload from JWT token."""
-        try:
-            payload = jwt.decode(
-                token, 
-                settings.security.secret_key, 
-                algorithms=[settings.security.algorithm]
-            )
-            return cls(
-                user_id=payload.get("sub"),
-                email=payload.get("email"),
-                subscription_tier=payload.get("subscription_tier", "explorer"),
-                exp=datetime.fromtimestamp(payload.get("exp"))
-            )
-        except JWTError as e:
-            logger.error(f"JWT decode error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+    def from_claims(cls, claims: Dict) -> 'JWTPayload':
+        """Create payload from already verified JWT claims."""
+        subscription_tier = claims.get("subscription_tier", "explorer")
+        if not isinstance(subscription_tier, str):
+            raise jwt.InvalidTokenError("subscription_tier claim must be a string")
+        return cls(
+            user_id=claims.get("sub"),
+            email=claims.get("email"),
+            subscription_tier=subscription_tier,
+            exp=int(claims["exp"]),
+            session_id=claims.get("sid")
+        )
     
     def is_expired(self) -> bool:
         """Check if token is expired."""
-        return datetime.utcnow() >= self.exp
+        return time.time() >= self.exp
 
 
 class JWTManager:
     """JWT token manager."""
     
     @staticmethod
-    def create_access_token(user: User) -> str:
-        """Create access token for user."""
-        expire = datetime.utcnow() + timedelta(minutes=settings.security.access_token_expire_minutes)
+    def create_access_token(user: User, session_id: Optional[str] = None) -> str:
+        """Create access token for user, tied to a login session when one is given."""
+        config = security_settings()
+        now = int(time.time())
+        expire = now + config.access_token_expire_minutes * 60
         
         payload = {
             "sub": str(user.user_id),
             "email": user.email,
             "subscription_tier": user.subscription_tier,
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "type": "access"
         }
+        if session_id is not None:
+            payload["sid"] = str(session_id)
         
-        return jwt.encode(
-            payload,
-            settings.security.secret_key,
-            algorithm=settings.security.algorithm
-        )
+        return encode_token(payload)
     
     @staticmethod
     def create_refresh_token(user: User) -> str:
         """Create refresh token for user."""
-        expire = datetime.utcnow() + timedelta(days=settings.security.refresh_token_expire_days)
+        config = security_settings()
+        now = int(time.time())
+        expire = now + config.refresh_token_expire_days * 86400
         
         payload = {
             "sub": str(user.user_id),
             "exp": expire,
-            "iat": datetime.utcnow(),
+            "iat": now,
             "type": "refresh"
         }
         
-        return jwt.encode(
-            payload,
-            settings.security.secret_key,
-            algorithm=settings.security.algorithm
-        )
+        return encode_token(payload)
     
     @staticmethod
     def verify_token(token: str, token_type: str = "access") -> JWTPayload:
         """Verify JWT token and return payload."""
+        cache_key = (token_type, hashlib.blake2b(token.encode(), digest_size=16).digest())
+        with _token_cache_lock:
+            cached = _token_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        payload = JWTManager._decode_and_verify(token, token_type)
+        
+        # Only successful verifications reach this point, failures are never cached
+        with _token_cache_lock:
+            _token_cache[cache_key] = payload
+        return payload
+    
+    @staticmethod
+    def _decode_and_verify(token: str, token_type: str) -> JWTPayload:
+        """Decode and verify a token without consulting the cache."""
         try:
-            payload = jwt.decode(
-                token,
-                settings.security.secret_key,
-                algorithms=[settings.security.algorithm]
-            )
+            # Unconfigured signing rejects every token rather than failing the request
+            payload = decode_token(token)
             
             # Check token type
-            if payload.get("type") != token_type:
+            if payload["type"] != token_type:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail=f"Invalid token type: expected {token_type}"
                 )
             
-            return JWTPayload.from_token(token)
+            return JWTPayload.from_claims(payload)
             
-        except JWTError as e:
-            logger.error(f"JWT verification failed: {e}")
+        except (jwt.PyJWTError, RuntimeError) as e:
+            logger.error("JWT verification failed: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
@@ -129,6 +319,16 @@ class JWTMiddleware:
     
     def __init__(self, app):
         self.app = app
+        self._public_prefixes = (
+            "/api/v1/research/anonymous",  # Allow anonymous research queries
+        )
+        # The 401 reply never varies, so it is encoded once
+        self._unauthorized_body = b'{"detail":"Not authenticated"}'
+        self._unauthorized_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self._unauthorized_body)).encode()),
+            (b"www-authenticate", b"Bearer"),
+        ]
     
     async def __call__(self, scope, receive, send):
         """Process request through middleware."""
@@ -136,65 +336,69 @@ class JWTMiddleware:
             await self.app(scope, receive, send)
             return
         
-        request = Request(scope, receive)
-        
         # Skip authentication for public endpoints
-        if self._is_public_endpoint(request.url.path):
+        if self._is_public_endpoint(scope["path"]):
             await self.app(scope, receive, send)
             return
         
-        # Get authorization header
-        try:
-            credentials: HTTPAuthorizationCredentials = await security(request)
-            token = credentials.credentials
-            
-            # Verify token and add user to request state
-            payload = JWTManager.verify_token(token)
-            request.state.user = payload
-            request.state.user_id = payload.user_id
-            
-        except HTTPException as e:
-            # For protected endpoints, return 401 if no valid token
-            if not self._is_public_endpoint(request.url.path):
-                response = JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Not authenticated"}
-                )
-                await response(scope, receive, send)
-                return
+        # Read the bearer token straight from the raw ASGI headers
+        payload = None
+        token = self._get_bearer_token(scope)
+        if token:
+            try:
+                payload = JWTManager.verify_token(token)
+            except HTTPException:
+                payload = None
+        
+        # For protected endpoints, return 401 if no valid token
+        if payload is None:
+            await send({
+                "type": "http.response.start",
+                "status": status.HTTP_401_UNAUTHORIZED,
+                "headers": self._unauthorized_headers,
+            })
+            await send({"type": "http.response.body", "body": self._unauthorized_body})
+            return
+        
+        # Starlette backs request.state with scope["state"]
+        state = scope.setdefault("state", {})
+        state["user"] = payload
+        state["user_id"] = payload.user_id
+        state["user_obj"] = User(
+            user_id=payload.user_id,
+            email=payload.email,
+            subscription_tier=payload.subscription_tier
+        )
         
         await self.app(scope, receive, send)
     
+    @staticmethod
+    def _get_bearer_token(scope) -> Optional[str]:
+        """Extract the bearer token from the Authorization header, if any."""
+        for key, value in scope["headers"]:
+            if key == b"authorization":
+                scheme, _, credentials = value.partition(b" ")
+                if scheme.lower() != b"bearer" or not credentials:
+                    return None
+                return credentials.decode("latin-1")
+        return None
+    
     def _is_public_endpoint(self, path: str) -> bool:
         """Check if endpoint is public (doesn't require authentication)."""
-        public_paths = [
-            "/",
-            "/health",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/api/v1/research/anonymous"  # Allow anonymous research queries
-        ]
-        
-        return any(path.startswith(public_path) for public_path in public_paths)
+        return path in PUBLIC_PATHS or path.startswith(self._public_prefixes)
 
 
-async def get_current_user(request: Request = None) -> User:
+async def get_current_user(request: Request) -> User:
     """Dependency to get current authenticated user."""
-    if not hasattr(request.state, 'user'):
+    # In a real implementation, fetch user from database
+    # For now, JWTMiddleware builds a minimal user object from the JWT payload
+    user = getattr(request.state, 'user_obj', None)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated"
         )
     
-    # In a real implementation, fetch user from database
-    # For now, create a minimal user object from JWT payload
-    user = User(
-        user_id=request.state.user.user_id,
-        email=request.state.user.email,
-        subscription_tier=request.state.user.subscription_tier
-    )
-    
     return user
 
 
@@ -204,8 +408,28 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
-def create_user_tokens(user: User) -> Tuple[str, str]:
+async def _run_signing(create_token, user: User) -> str:
+    """Run a token factory inline for HMAC, or in the signing pool otherwise."""
+    if security_settings().algorithm.startswith("HS"):
+        return create_token(user)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_jwt_executor, create_token, user)
+
+
+async def create_access_token_async(user: User) -> str:
+    """Create access token without blocking the event loop."""
+    return await _run_signing(JWTManager.create_access_token, user)
+
+
+async def create_refresh_token_async(user: User) -> str:
+    """Create refresh token without blocking the event loop."""
+    return await _run_signing(JWTManager.create_refresh_token, user)
+
+
+async def create_user_tokens(user: User) -> Tuple[str, str]:
     """Create access and refresh tokens for user."""
-    access_token = JWTManager.create_access_token(user)
-    refresh_token = JWTManager.create_refresh_token(user)
+    access_token, refresh_token = await asyncio.gather(
+        create_access_token_async(user),
+        create_refresh_token_async(user)
+    )
     return access_token, refresh_token
@@ -1,91 +1,176 @@
 """Rate limiting middleware for Ariadne."""
 
+import json
 import logging
+import math
+import time
+from array import array
 from typing import Optional
 
-from fastapi import Request, Response, status
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
+
+from auth import PUBLIC_PATHS
 
 logger = logging.getLogger(__name__)
 
+# Number of client buckets in the timestamp table; must be a power of two.
+# Each bucket belongs to one client at a time, so this caps how many clients
+# are tracked at once.
+RATE_LIMIT_BUCKETS = 16384
+
+# Buckets probed past a client's home bucket before an idle one is evicted
+RATE_LIMIT_MAX_PROBES = 8
+
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """Simple rate limiting middleware for FastAPI."""
     
     def __init__(self, app, calls: int = 100, period: int = 3600):
-        super().__init__(app)
+        self.app = app
         self.calls = calls
         self.period = period
-        self.requests = {}
+        # Open-addressed table: each bucket records the client that owns it
+        # and, once claimed, a ring of `calls` timestamps with the cursor
+        # pointing at the oldest slot. Rings are only allocated for buckets
+        # that are in use, and nothing is allocated per request.
+        self._owners = [None] * RATE_LIMIT_BUCKETS
+        self._rings = [None] * RATE_LIMIT_BUCKETS
+        self._cursors = array("I", bytes(4 * RATE_LIMIT_BUCKETS))
+        # The 429 body and fixed headers only depend on the configured limits
+        self._limited_body = json.dumps({
+            "error": "Rate limit exceeded",
+            "message": f"Maximum {self.calls} requests per {self.period} seconds"
+        }).encode()
+        self._limited_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self._limited_body)).encode()),
+        ]
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope, receive, send):
         """Process request through middleware."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Skip rate limiting for public endpoints
-        if self._is_public_endpoint(request.url.path):
-            return await call_next(request)
+        if self._is_public_endpoint(scope["path"]):
+            await self.app(scope, receive, send)
+            return
         
         # Get client identifier
-        client_id = self._get_client_identifier(request)
+        client_id = self._get_client_identifier(scope)
         
         # Simple rate limiting logic (in-memory for development)
-        import time
+        # The check-and-record below has no await, so it is atomic on the event loop
         current_time = time.time()
+        cutoff = current_time - self.period
+        bucket = self._find_bucket(client_id, cutoff)
+        in_window = self._record_request(bucket, cutoff, current_time)
         
-        if client_id not in self.requests:
-            self.requests[client_id] = []
+        # Check rate limit
+        if in_window is None:
+            # The client may retry once its oldest request leaves the window
+            oldest = self._rings[bucket][self._cursors[bucket]]
+            retry_after = max(1, math.ceil(oldest - cutoff))
+            await send({
+                "type": "http.response.start",
+                "status": status.HTTP_429_TOO_MANY_REQUESTS,
+                "headers": self._limited_headers + [(b"retry-after", str(retry_after).encode())],
+            })
+            await send({"type": "http.response.body", "body": self._limited_body})
+            return
         
-        # Clean old requests
-        self.requests[client_id] = [
-            req_time for req_time in self.requests[client_id]
-            if current_time - req_time < self.period
+        # Add rate limit headers to the response start message
+        rate_limit_headers = [
+            (b"x-ratelimit-limit", str(self.calls).encode()),
+            (b"x-ratelimit-remaining", str(self.calls - in_window).encode()),
+            (b"x-ratelimit-reset", str(int(current_time + self.period)).encode()),
         ]
         
-        # Check rate limit
-        if len(self.requests[client_id]) >= self.calls:
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={
-                    "error": "Rate limit exceeded",
-                    "message": f"Maximum {self.calls} requests per {self.period} seconds"
-                },
-                headers={"Retry-After": "3600"}
-            )
+        async def send_with_rate_limit_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_limit_headers
+            await send(message)
         
-        # Add current request
-        self.requests[client_id].append(current_time)
+        await self.app(scope, receive, send_with_rate_limit_headers)
+    
+    def _is_public_endpoint(self, path: str) -> bool:
+        """Check if endpoint should skip rate limiting."""
+        return path in PUBLIC_PATHS
+    
+    def _find_bucket(self, client_id: str, cutoff: float) -> int:
+        """Return the bucket owned by client_id, claiming one if it has none.
         
-        response = await call_next(request)
+        Probes linearly from the client's home bucket. A free bucket, or one
+        whose owner has no requests left in the window, is claimed; when every
+        probed bucket is busy the least recently used one is evicted.
+        """
+        owners = self._owners
+        rings = self._rings
+        cursors = self._cursors
+        calls = self.calls
+        home = hash(client_id)
         
-        # Add rate limit headers
-        remaining = self.calls - len(self.requests[client_id])
-        response.headers["X-RateLimit-Limit"] = str(self.calls)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + self.period))
+        claim = None
+        claim_newest = float("inf")
+        for probe in range(RATE_LIMIT_MAX_PROBES):
+            bucket = (home + probe) & (RATE_LIMIT_BUCKETS - 1)
+            owner = owners[bucket]
+            if owner == client_id:
+                return bucket
+            if owner is None:
+                newest = float("-inf")
+            else:
+                newest = rings[bucket][(cursors[bucket] - 1) % calls]
+            if newest < claim_newest:
+                claim, claim_newest = bucket, newest
         
-        return response
+        if claim_newest > cutoff:
+            logger.warning("Rate limit table full; evicting a client still inside its window")
+        owners[claim] = client_id
+        rings[claim] = array("d", bytes(8 * calls))
+        cursors[claim] = 0
+        return claim
     
-    def _is_public_endpoint(self, path: str) -> bool:
-        """Check if endpoint should skip rate limiting."""
-        public_paths = [
-            "/",
-            "/health",
-            "/docs",
-            "/redoc",
-            "/openapi.json",
-            "/favicon.ico",
-            "/robots.txt"
-        ]
-        return any(path.startswith(public_path) for public_path in public_paths)
+    def _record_request(self, bucket: int, cutoff: float, current_time: float) -> Optional[int]:
+        """Record a request in a bucket's ring.
+        
+        Returns the number of requests now inside the window, or None when the
+        bucket is already at its limit (nothing is recorded in that case).
+        """
+        calls = self.calls
+        timestamps = self._rings[bucket]
+        oldest = self._cursors[bucket]
+        
+        # The ring is chronological starting at the cursor, so if even the
+        # oldest entry is inside the window every slot is in use
+        if timestamps[oldest] > cutoff:
+            return None
+        
+        # Binary search for the first entry inside the window
+        lo, hi = 0, calls
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamps[(oldest + mid) % calls] > cutoff:
+                hi = mid
+            else:
+                lo = mid + 1
+        
+        # Overwrite the oldest slot with this request and advance the cursor
+        timestamps[oldest] = current_time
+        self._cursors[bucket] = (oldest + 1) % calls
+        return calls - lo + 1
     
-    def _get_client_identifier(self, request: Request) -> str:
+    def _get_client_identifier(self, scope) -> str:
         """Get unique identifier for client."""
-        # Try to get user ID if authenticated
-        if hasattr(request.state, 'user_id'):
-            return f"user:{request.state.user_id}"
+        # Try to get user ID if authenticated (set by JWTMiddleware)
+        state = scope.get("state")
+        if state and "user_id" in state:
+            return f"user:{state['user_id']}"
         
         # Use client IP address
-        client_ip = request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
         return f"ip:{client_ip}"
 
 
@@ -1,9 +1,11 @@
 """Role-Based Access Control (RBAC) system for Ariadne."""
 
+import inspect
 import logging
+import operator
 from enum import Enum
-from typing import Dict, List, Set
-from functools import wraps
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+from functools import lru_cache, reduce, wraps
 
 from fastapi import HTTPException, Request, status
 
@@ -58,72 +60,100 @@ class Permission(Enum):
     MANAGE_BILLING = "manage_billing"
 
 
-# Role-permission mapping
-ROLE_PERMISSIONS: Dict[UserRole, Set[Permission]] = {
-    UserRole.EXPLORER: {
-        # Basic research
-        Permission.RUN_RESEARCH,
-        Permission.SAVE_RESEARCH,
-        Permission.EDIT_RESEARCH,
-        
-        # Basic tapestries
-        Permission.CREATE_TAPESTRY,
-        Permission.EDIT_TAPESTRY,
-        Permission.DELETE_TAPESTRY,
-        Permission.EXPORT_TAPESTRY,
-        
-        # Basic loom
-        Permission.VIEW_LOOM,
-        Permission.CREATE_LOOM,
-        Permission.EDIT_LOOM,
-        
-        # Profile
-        Permission.VIEW_PROFILE,
-        Permission.EDIT_PROFILE,
-    },
+# Role-permission mapping, built role by role so each tier extends the one
+# below it; every entry is frozen so the table can be shared across requests
+_role_permissions: Dict[UserRole, FrozenSet[Permission]] = {}
+
+_role_permissions[UserRole.EXPLORER] = frozenset({
+    # Basic research
+    Permission.RUN_RESEARCH,
+    Permission.SAVE_RESEARCH,
+    Permission.EDIT_RESEARCH,
     
-    UserRole.RESEARCHER: {
-        # All explorer permissions
-        *ROLE_PERMISSIONS[UserRole.EXPLORER],
-        
-        # Additional research permissions
-        Permission.DELETE_RESEARCH,
-        
-        # Advanced tapestries
-        Permission.SHARE_TAPESTRY,
-        
-        # Advanced loom
-        Permission.SHARE_LOOM,
-        
-        # Analytics
-        Permission.VIEW_ANALYTICS,
-    },
+    # Basic tapestries
+    Permission.CREATE_TAPESTRY,
+    Permission.EDIT_TAPESTRY,
+    Permission.DELETE_TAPESTRY,
+    Permission.EXPORT_TAPESTRY,
     
-    UserRole.TEAM_MEMBER: {
-        # All researcher permissions
-        *ROLE_PERMISSIONS[UserRole.RESEARCHER],
-        
-        # Team permissions
-        Permission.VIEW_TEAM,
-        Permission.INVITE_TEAM,
-    },
+    # Basic loom
+    Permission.VIEW_LOOM,
+    Permission.CREATE_LOOM,
+    Permission.EDIT_LOOM,
     
-    UserRole.TEAM_ADMIN: {
-        # All team member permissions
-        *ROLE_PERMISSIONS[UserRole.TEAM_MEMBER],
-        
-        # Admin team permissions
-        Permission.MANAGE_TEAM,
-        Permission.REMOVE_TEAM,
-        
-        # Billing
-        Permission.MANAGE_BILLING,
-    },
+    # Profile
+    Permission.VIEW_PROFILE,
+    Permission.EDIT_PROFILE,
+})
+
+# All explorer permissions
+_role_permissions[UserRole.RESEARCHER] = _role_permissions[UserRole.EXPLORER] | {
+    # Additional research permissions
+    Permission.DELETE_RESEARCH,
     
-    UserRole.SUPER_ADMIN: {
-        # All permissions
-        *set(Permission),
-    }
+    # Advanced tapestries
+    Permission.SHARE_TAPESTRY,
+    
+    # Advanced loom
+    Permission.SHARE_LOOM,
+    
+    # Analytics
+    Permission.VIEW_ANALYTICS,
+}
+
+# All researcher permissions
+_role_permissions[UserRole.TEAM_MEMBER] = _role_permissions[UserRole.RESEARCHER] | {
+    # Team permissions
+    Permission.VIEW_TEAM,
+    Permission.INVITE_TEAM,
+}
+
+# All team member permissions
+_role_permissions[UserRole.TEAM_ADMIN] = _role_permissions[UserRole.TEAM_MEMBER] | {
+    # Admin team permissions
+    Permission.MANAGE_TEAM,
+    Permission.REMOVE_TEAM,
+    
+    # Billing
+    Permission.MANAGE_BILLING,
+}
+
+# All permissions
+_role_permissions[UserRole.SUPER_ADMIN] = frozenset(Permission)
+
+ROLE_PERMISSIONS: Dict[UserRole, FrozenSet[Permission]] = _role_permissions
+
+# Role hierarchy (higher roles have all permissions of lower roles)
+ROLE_HIERARCHY: List[UserRole] = [
+    UserRole.EXPLORER,
+    UserRole.RESEARCHER,
+    UserRole.TEAM_MEMBER,
+    UserRole.TEAM_ADMIN,
+    UserRole.SUPER_ADMIN
+]
+
+# O(1) lookups replacing UserRole(value) and ROLE_HIERARCHY.index(role)
+_ROLE_BY_VALUE: Dict[str, UserRole] = {role.value: role for role in UserRole}
+_ROLE_INDEX: Dict[UserRole, int] = {role: i for i, role in enumerate(ROLE_HIERARCHY)}
+
+_NO_PERMISSIONS: FrozenSet[Permission] = frozenset()
+
+# Sentinel for attribute lookups where None would be ambiguous
+_MISSING = object()
+
+# Each permission owns one bit; a role's permissions collapse into one int mask
+PERMISSION_BITS: Dict[Permission, int] = {
+    permission: 1 << i for i, permission in enumerate(Permission)
+}
+
+
+def permissions_mask(permissions: Iterable[Permission]) -> int:
+    """Combine permissions into a single bitmask."""
+    return reduce(operator.or_, (PERMISSION_BITS[p] for p in permissions), 0)
+
+
+ROLE_MASKS: Dict[UserRole, int] = {
+    role: permissions_mask(permissions) for role, permissions in ROLE_PERMISSIONS.items()
 }
 
 
@@ -137,26 +167,57 @@ class RBACError(HTTPException):
         )
 
 
+def _role_from_tier(subscription_tier: str) -> UserRole:
+    """Resolve a subscription tier string to its role."""
+    user_role = _ROLE_BY_VALUE.get(subscription_tier)
+    if user_role is None:
+        raise RBACError("Invalid user role")
+    return user_role
+
+
+def _request_locator(func: Callable) -> Callable[[tuple, Dict[str, Any]], Optional[Request]]:
+    """Resolve once, at decoration time, where ``func`` receives its request."""
+    parameters = inspect.signature(func).parameters
+    for position, (name, parameter) in enumerate(parameters.items()):
+        if parameter.annotation not in (Request, "Request") and name != "request":
+            continue
+        if parameter.kind is inspect.Parameter.KEYWORD_ONLY:
+            position = None
+        
+        # FastAPI passes endpoint arguments by keyword
+        def locate(args: tuple, kwargs: Dict[str, Any]) -> Optional[Request]:
+            if name in kwargs:
+                return kwargs[name]
+            if position is not None and position < len(args):
+                return args[position]
+            return None
+        
+        return locate
+    
+    raise TypeError(
+        f"{func.__qualname__} must accept a Request parameter to use RBAC decorators"
+    )
+
+
 def has_permission(user_role: UserRole, permission: Permission) -> bool:
     """Check if user role has specific permission."""
-    return permission in ROLE_PERMISSIONS.get(user_role, set())
+    return bool(ROLE_MASKS.get(user_role, 0) & PERMISSION_BITS[permission])
 
 
 def has_any_permission(user_role: UserRole, permissions: List[Permission]) -> bool:
     """Check if user role has any of the specified permissions."""
-    user_permissions = ROLE_PERMISSIONS.get(user_role, set())
-    return any(perm in user_permissions for perm in permissions)
+    return bool(ROLE_MASKS.get(user_role, 0) & permissions_mask(permissions))
 
 
 def has_all_permissions(user_role: UserRole, permissions: List[Permission]) -> bool:
     """Check if user role has all of the specified permissions."""
-    user_permissions = ROLE_PERMISSIONS.get(user_role, set())
-    return all(perm in user_permissions for perm in permissions)
+    required_mask = permissions_mask(permissions)
+    return (ROLE_MASKS.get(user_role, 0) & required_mask) == required_mask
 
 
 def get_user_permissions(user_role: UserRole) -> Set[Permission]:
     """Get all permissions for a user role."""
-    return ROLE_PERMISSIONS.get(user_role, set()).copy()
+    return set(ROLE_PERMISSIONS.get(user_role, _NO_PERMISSIONS))
 
 
 def get_available_roles() -> List[UserRole]:
@@ -177,21 +238,22 @@ def check_permission_or_403(user_role: UserRole, permission: Permission) -> None
 
 def require_permission(permission: Permission):
     """Decorator to require specific permission for endpoint."""
+    required_mask = PERMISSION_BITS[permission]
+    
     def decorator(func):
+        locate_request = _request_locator(func)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract user from request (first argument should be request)
-            request = None
-            for arg in args:
-                if hasattr(arg, 'state') and hasattr(arg.state, 'user'):
-                    request = arg
-                    break
+            request = locate_request(args, kwargs)
             
-            if not request or not hasattr(request.state, 'user'):
+            user = getattr(getattr(request, 'state', _MISSING), 'user', _MISSING)
+            if user is _MISSING:
                 raise RBACError("User context not found")
             
-            user_role = UserRole(request.state.user.subscription_tier)
-            check_permission_or_403(user_role, permission)
+            user_role = _role_from_tier(user.subscription_tier)
+            if not ROLE_MASKS[user_role] & required_mask:
+                raise RBACError(f"Insufficient permissions: {permission.value}")
             
             return await func(*args, **kwargs)
         return wrapper
@@ -200,22 +262,22 @@ def require_permission(permission: Permission):
 
 def require_any_permission(permissions: List[Permission]):
     """Decorator to require any of the specified permissions."""
+    required_mask = permissions_mask(permissions)
+    
     def decorator(func):
+        locate_request = _request_locator(func)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract user from request
-            request = None
-            for arg in args:
-                if hasattr(arg, 'state') and hasattr(arg.state, 'user'):
-                    request = arg
-                    break
+            request = locate_request(args, kwargs)
             
-            if not request or not hasattr(request.state, 'user'):
+            user = getattr(getattr(request, 'state', _MISSING), 'user', _MISSING)
+            if user is _MISSING:
                 raise RBACError("User context not found")
             
-            user_role = UserRole(request.state.user.subscription_tier)
+            user_role = _role_from_tier(user.subscription_tier)
             
-            if not has_any_permission(user_role, permissions):
+            if not ROLE_MASKS[user_role] & required_mask:
                 raise RBACError(
                     f"Insufficient permissions: need any of {[p.value for p in permissions]}"
                 )
@@ -227,22 +289,22 @@ def require_any_permission(permissions: List[Permission]):
 
 def require_all_permissions(permissions: List[Permission]):
     """Decorator to require all of the specified permissions."""
+    required_mask = permissions_mask(permissions)
+    
     def decorator(func):
+        locate_request = _request_locator(func)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract user from request
-            request = None
-            for arg in args:
-                if hasattr(arg, 'state') and hasattr(arg.state, 'user'):
-                    request = arg
-                    break
+            request = locate_request(args, kwargs)
             
-            if not request or not hasattr(request.state, 'user'):
+            user = getattr(getattr(request, 'state', _MISSING), 'user', _MISSING)
+            if user is _MISSING:
                 raise RBACError("User context not found")
             
-            user_role = UserRole(request.state.user.subscription_tier)
+            user_role = _role_from_tier(user.subscription_tier)
             
-            if not has_all_permissions(user_role, permissions):
+            if (ROLE_MASKS[user_role] & required_mask) != required_mask:
                 missing = [p.value for p in permissions if not has_permission(user_role, p)]
                 raise RBACError(
                     f"Insufficient permissions: missing {missing}"
@@ -255,40 +317,25 @@ def require_all_permissions(permissions: List[Permission]):
 
 def require_role_or_higher(required_role: UserRole):
     """Decorator to require user role or higher."""
+    required_role_index = _ROLE_INDEX[required_role]
+    
     def decorator(func):
+        locate_request = _request_locator(func)
+        
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Extract user from request
-            request = None
-            for arg in args:
-                if hasattr(arg, 'state') and hasattr(arg.state, 'user'):
-                    request = arg
-                    break
+            request = locate_request(args, kwargs)
             
-            if not request or not hasattr(request.state, 'user'):
+            user = getattr(getattr(request, 'state', _MISSING), 'user', _MISSING)
+            if user is _MISSING:
                 raise RBACError("User context not found")
             
-            user_role = UserRole(request.state.user.subscription_tier)
+            user_role = _role_from_tier(user.subscription_tier)
             
-            # Define role hierarchy (higher roles have all permissions of lower roles)
-            role_hierarchy = [
-                UserRole.EXPLORER,
-                UserRole.RESEARCHER,
-                UserRole.TEAM_MEMBER,
-                UserRole.TEAM_ADMIN,
-                UserRole.SUPER_ADMIN
-            ]
-            
-            try:
-                user_role_index = role_hierarchy.index(user_role)
-                required_role_index = role_hierarchy.index(required_role)
-                
-                if user_role_index < required_role_index:
-                    raise RBACError(
-                        f"Insufficient role: need {required_role.value} or higher"
-                    )
-            except ValueError:
-                raise RBACError("Invalid user role")
+            if _ROLE_INDEX[user_role] < required_role_index:
+                raise RBACError(
+                    f"Insufficient role: need {required_role.value} or higher"
+                )
             
             return await func(*args, **kwargs)
         return wrapper
@@ -300,7 +347,8 @@ class PermissionChecker:
     
     def __init__(self, user_role: UserRole):
         self.user_role = user_role
-        self.permissions = get_user_permissions(user_role)
+        # Shared immutable set, no defensive copy needed
+        self.permissions: FrozenSet[Permission] = ROLE_PERMISSIONS.get(user_role, _NO_PERMISSIONS)
     
     def can(self, permission: Permission) -> bool:
         """Check if user can perform permission."""
@@ -316,17 +364,14 @@ class PermissionChecker:
     
     def can_role_or_higher(self, required_role: UserRole) -> bool:
         """Check if user has role or higher."""
-        role_hierarchy = [
-            UserRole.EXPLORER,
-            UserRole.RESEARCHER,
-            UserRole.TEAM_MEMBER,
-            UserRole.TEAM_ADMIN,
-            UserRole.SUPER_ADMIN
-        ]
-        
-        try:
-            user_role_index = role_hierarchy.index(self.user_role)
-            required_role_index = role_hierarchy.index(required_role)
-            return user_role_index >= required_role_index
-        except ValueError:
+        user_role_index = _ROLE_INDEX.get(self.user_role)
+        required_role_index = _ROLE_INDEX.get(required_role)
+        if user_role_index is None or required_role_index is None:
             return False
+        return user_role_index >= required_role_index
+
+
+@lru_cache(maxsize=8)
+def get_permission_checker(user_role: UserRole) -> PermissionChecker:
+    """Get the shared permission checker for a role."""
+    return PermissionChecker(user_role)
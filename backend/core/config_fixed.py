@@ -1,27 +1,48 @@
 """Configuration management for the Ariadne backend."""
 
+import json
 import os
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
-from pydantic_settings import BaseSettings
+import re
+import sys
+from functools import cached_property, lru_cache
+from typing import List, Optional, Dict, Any, Type, get_args
+from pydantic import BaseModel, ConfigDict, Field, model_validator, validator
+from dotenv import load_dotenv
+
+
+# Populate os.environ from .env once; real environment variables win.
+load_dotenv(".env", override=False)
+
+_PG_URL_RE = re.compile(r"postgresql(?:\+asyncpg)?://")
+_REDIS_URL_RE = re.compile(r"rediss?://")
+
+
+def default_pool_size() -> int:
+    """Default connection pool size, scaled to the host's CPU count."""
+    return max(10, (os.cpu_count() or 4) * 2)
 
 
 class DatabaseConfig(BaseModel):
     """Database configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     url: str = Field(..., description="Database connection URL")
     echo: bool = Field(False, description="Enable SQL query logging")
-    pool_size: int = Field(10, description="Connection pool size")
+    pool_size: int = Field(default_factory=default_pool_size, description="Connection pool size")
     max_overflow: int = Field(20, description="Maximum overflow connections")
+    pool_recycle: int = Field(300, description="Recycle connections after this many seconds")
     
     @validator('url')
     def validate_url(cls, v):
-        if not v.startswith(('postgresql://', 'postgresql+asyncpg://')):
+        if not _PG_URL_RE.match(v):
             raise ValueError('Database URL must be PostgreSQL')
         return v
 
 
 class Neo4jConfig(BaseModel):
     """Neo4j configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     uri: str = Field(..., description="Neo4j connection URI")
     username: str = Field(..., description="Neo4j username")
     password: str = Field(..., description="Neo4j password")
@@ -32,25 +53,32 @@ class Neo4jConfig(BaseModel):
     @property
     def connection_string(self) -> str:
         """Get connection string for Neo4j driver."""
+        # NEO4J_URI may already be a full bolt:// or neo4j:// URI
+        if "://" in self.uri:
+            return self.uri
         return f"bolt://{self.uri}:7687"
 
 
 class RedisConfig(BaseModel):
     """Redis configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     url: str = Field(..., description="Redis connection URL")
-    max_connections: int = Field(20, description="Maximum Redis connections")
+    max_connections: int = Field(default_factory=default_pool_size, description="Maximum Redis connections")
     retry_on_timeout: bool = Field(True, description="Retry on timeout")
     socket_timeout: int = Field(5, description="Socket timeout (seconds)")
     
     @validator('url')
     def validate_url(cls, v):
-        if not v.startswith(('redis://', 'rediss://')):
+        if not _REDIS_URL_RE.match(v):
             raise ValueError('Redis URL must start with redis:// or rediss://')
         return v
 
 
 class LLMConfig(BaseModel):
     """LLM provider configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     provider: str = Field("openai", description="LLM provider (openai, anthropic)")
     model: str = Field("gpt-4o", description="Default model name")
     api_key: str = Field(..., description="API key")
@@ -75,6 +103,8 @@ class LLMConfig(BaseModel):
 
 class SecurityConfig(BaseModel):
     """Security configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     secret_key: str = Field(..., description="JWT secret key")
     algorithm: str = Field("RS256", description="JWT algorithm")
     access_token_expire_minutes: int = Field(30, description="Access token expiration (minutes)")
@@ -90,6 +120,8 @@ class SecurityConfig(BaseModel):
 
 class RateLimitConfig(BaseModel):
     """Rate limiting configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     anonymous_requests_per_hour: int = Field(10, description="Anonymous requests per hour")
     anonymous_requests_per_day: int = Field(50, description="Anonymous requests per day")
     authenticated_requests_per_hour: int = Field(100, description="Authenticated requests per hour")
@@ -99,6 +131,8 @@ class RateLimitConfig(BaseModel):
 
 class ContextConfig(BaseModel):
     """Context management configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     max_tokens_per_query: int = Field(50000, description="Maximum tokens per query context")
     diversity_weight: float = Field(0.3, description="Diversity weight in ranking")
     recency_weight: float = Field(0.2, description="Recency weight in ranking")
@@ -107,15 +141,19 @@ class ContextConfig(BaseModel):
     chunk_size: int = Field(1000, description="Text chunk size for embeddings")
     chunk_overlap: int = Field(200, description="Chunk overlap for better context")
     
-    @validator('*_weight')
-    def validate_weights(cls, v):
-        if not 0.0 <= v <= 1.0:
-            raise ValueError('Weights must be between 0.0 and 1.0')
-        return v
+    @model_validator(mode='after')
+    def validate_weights(self):
+        for weight in (self.diversity_weight, self.recency_weight,
+                       self.preference_weight, self.trust_weight):
+            if not 0.0 <= weight <= 1.0:
+                raise ValueError('Weights must be between 0.0 and 1.0')
+        return self
 
 
 class TemporalConfig(BaseModel):
     """Temporal workflow configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     address: str = Field("localhost:7233", description="Temporal server address")
     namespace: str = Field("default", description="Temporal namespace")
     task_queue: str = Field("ariadne-queries", description="Temporal task queue")
@@ -132,6 +170,8 @@ class TemporalConfig(BaseModel):
 
 class MonitoringConfig(BaseModel):
     """Monitoring and observability configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     enable_tracing: bool = Field(True, description="Enable OpenTelemetry tracing")
     enable_metrics: bool = Field(True, description="Enable metrics collection")
     enable_logging: bool = Field(True, description="Enable structured logging")
@@ -149,6 +189,8 @@ class MonitoringConfig(BaseModel):
 
 class FeaturesConfig(BaseModel):
     """Feature flags configuration."""
+    model_config = ConfigDict(defer_build=True)
+    
     enable_anonymous_queries: bool = Field(True, description="Enable anonymous queries")
     enable_muse_service: bool = Field(True, description="Enable proactive discovery service")
     enable_learning_models: bool = Field(True, description="Enable learning models")
@@ -163,8 +205,9 @@ class FeaturesConfig(BaseModel):
     enable_local_models: bool = Field(False, description="Enable local model inference")
 
 
-class AriadneSettings(BaseSettings):
+class AriadneSettings(BaseModel):
     """Main application settings."""
+    model_config = ConfigDict(frozen=True)
     
     # Application
     app_name: str = Field("Ariadne", description="Application name")
@@ -175,7 +218,7 @@ class AriadneSettings(BaseSettings):
     # Server
     host: str = Field("0.0.0.0", description="Server host")
     port: int = Field(8000, description="Server port")
-    workers: int = Field(1, description="Number of workers")
+    workers: int = Field(0, description="Number of workers (0 = one per CPU)")
     reload: bool = Field(False, description="Auto-reload on code changes")
     
     # CORS
@@ -192,37 +235,130 @@ class AriadneSettings(BaseSettings):
         description="Allowed HTTP headers"
     )
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = False
-        env_nested_delimiter = "__"
+    # Backing services, each left unset unless its variables are present,
+    # e.g. DATABASE_URL, REDIS_URL or NEO4J_URI, NEO4J_USERNAME and NEO4J_PASSWORD
+    database: Optional[DatabaseConfig] = Field(None, description="PostgreSQL connection")
+    redis: Optional[RedisConfig] = Field(None, description="Redis connection")
+    neo4j: Optional[Neo4jConfig] = Field(None, description="Neo4j connection")
+    
+    # JWT signing (SECURITY_SECRET_KEY, SECURITY_ALGORITHM, ...) and
+    # observability (MONITORING_LOG_LEVEL, ...)
+    security: Optional[SecurityConfig] = Field(None, description="JWT signing and verification")
+    monitoring: Optional[MonitoringConfig] = Field(None, description="Monitoring and logging")
+    
+    @classmethod
+    def _from_env(cls, prefix: str = "", coerce: bool = False) -> Dict[str, Any]:
+        """Collect this model's fields from os.environ.
         
-    @property
+        Variables are matched case-insensitively as ``PREFIX`` + field name;
+        nested config fields read ``FIELD_`` + their own field names. List and
+        dict fields are decoded from JSON. With ``coerce`` the scalar fields
+        are converted too, for use with ``model_construct``; otherwise they
+        are left as strings for validation to convert.
+        """
+        environ = {k.upper(): v for k, v in os.environ.items()}
+        return _read_env(cls, environ, prefix.upper(), coerce)
+    
+    @cached_property
     def is_development(self) -> bool:
         """Check if running in development mode."""
         return self.environment.lower() == "development"
     
-    @property
+    @cached_property
     def is_production(self) -> bool:
         """Check if running in production mode."""
         return self.environment.lower() == "production"
 
 
-# Global settings instance
-_settings = None
+def _nested_config(annotation: Any) -> Optional[Type[BaseModel]]:
+    """Get the config model inside an ``Optional[...Config]`` field, if any."""
+    for arg in get_args(annotation) or (annotation,):
+        if isinstance(arg, type) and issubclass(arg, BaseModel):
+            return arg
+    return None
+
+
+def _read_env(model: Type[BaseModel], environ: Dict[str, str], prefix: str, coerce: bool) -> Dict[str, Any]:
+    """Collect a model's fields from an upper-cased environment mapping."""
+    env: Dict[str, Any] = {}
+    for name, field in model.model_fields.items():
+        key = f"{prefix}{name}".upper()
+        nested = _nested_config(field.annotation)
+        if nested is not None:
+            values = _read_env(nested, environ, key + "_", coerce)
+            if values:
+                env[name] = nested.model_construct(**values) if coerce else values
+            continue
+        value = environ.get(key)
+        if value is None:
+            continue
+        if coerce:
+            env[name] = _coerce_env_value(field.annotation, value)
+        elif getattr(field.annotation, "__origin__", None) in (list, dict):
+            env[name] = json.loads(value)
+        else:
+            env[name] = value
+    return env
+
+
+def _coerce_env_value(annotation: Any, value: str) -> Any:
+    """Cheap string-to-type conversion for trusted environment values."""
+    if annotation is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if annotation is int:
+        return int(value)
+    if annotation is float:
+        return float(value)
+    if getattr(annotation, "__origin__", None) in (list, dict):
+        return json.loads(value)
+    return value
+
 
+def load_env_dict(coerce: bool = True) -> Dict[str, Any]:
+    """Read the settings fields from the environment into a dict."""
+    return AriadneSettings._from_env(coerce=coerce)
 
-def get_settings() -> AriadneSettings:
-    """Get the global settings instance."""
-    global _settings
-    if _settings is None:
-        _settings = AriadneSettings()
-    return _settings
+
+@lru_cache(maxsize=2)
+def _load_settings(validate: bool) -> AriadneSettings:
+    if validate:
+        return AriadneSettings.model_validate(load_env_dict(coerce=False))
+    # The environment was checked at deploy time (``validate-config``), so
+    # skip the validating constructor and hydrate the fields directly.
+    return AriadneSettings.model_construct(**load_env_dict())
+
+
+def get_settings(validate: Optional[bool] = None) -> AriadneSettings:
+    """Get the global settings instance.
+
+    Validation is skipped when ``ARIADNE_SKIP_VALIDATION=1`` is set, unless
+    ``validate`` is passed explicitly.
+    """
+    if validate is None:
+        validate = os.environ.get("ARIADNE_SKIP_VALIDATION") != "1"
+    return _load_settings(validate)
 
 
 def reload_settings() -> AriadneSettings:
     """Reload settings from environment (useful for testing)."""
-    global _settings
-    _settings = None
+    load_dotenv(".env", override=False)
+    _load_settings.cache_clear()
     return get_settings()
+
+
+def validate_config() -> int:
+    """Run full validation of the environment; used at deploy time."""
+    try:
+        AriadneSettings.model_validate(load_env_dict(coerce=False))
+    except ValueError as e:
+        print(f"Invalid configuration:\n{e}", file=sys.stderr)
+        return 1
+    print("Configuration OK")
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["validate-config"]:
+        sys.exit(validate_config())
+    print(f"usage: python -m {__spec__.name} validate-config", file=sys.stderr)
+    sys.exit(2)
@@ -1,16 +1,22 @@
 """Database connection and configuration for Ariadne backend."""
 
 import logging
-from typing import Optional, AsyncGenerator
-from sqlalchemy import create_engine, MetaData
+from functools import lru_cache
+from typing import Any, Optional, AsyncGenerator
+
+import orjson
+from sqlalchemy import create_engine, MetaData, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from core.config import get_settings
+from core.config_fixed import DatabaseConfig
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Compiled once; the health probe runs on every liveness check
+_HEALTH_STMT = text("SELECT 1")
 
 # Base for SQLAlchemy models
 Base = declarative_base()
@@ -22,22 +28,32 @@ SessionLocal = None
 AsyncSessionLocal = None
 
 
+def _pool_options(database: DatabaseConfig) -> dict:
+    """Pool sizing for the async engine, from the ``DATABASE_*`` settings."""
+    return {
+        "pool_size": database.pool_size,
+        "max_overflow": database.max_overflow,
+        "pool_recycle": database.pool_recycle,
+    }
+
+
 def initialize_database():
     """Initialize database connection and session makers."""
     global engine, async_engine, SessionLocal, AsyncSessionLocal
+    settings = get_settings()
     
     try:
-        # For now, use SQLite in development mode
-        # In production, this will be PostgreSQL with async support
-        database_url = settings.database_url_async if hasattr(settings, 'database_url_async') else "sqlite:///./ariadne.db"
+        # PostgreSQL with async support when DATABASE_URL is set,
+        # otherwise SQLite for development
+        database = settings.database
         
-        if database_url.startswith("postgresql"):
+        if database is not None:
             # PostgreSQL with async support
             async_engine = create_async_engine(
-                database_url,
-                echo=settings.debug,
+                database.url,
+                echo=settings.debug or database.echo,
                 pool_pre_ping=True,
-                pool_recycle=300,
+                **_pool_options(database),
             )
             
             AsyncSessionLocal = async_sessionmaker(
@@ -64,7 +80,7 @@ def initialize_database():
             logger.info("Initialized SQLite database connection")
             
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error("Failed to initialize database: %s", e)
         raise
 
 
@@ -108,17 +124,91 @@ def create_tables():
             
         logger.info("Database tables created successfully")
     except Exception as e:
-        logger.error(f"Failed to create database tables: {e}")
+        logger.error("Failed to create database tables: %s", e)
         raise
 
 
+@lru_cache(maxsize=1)
+def get_redis_pool():
+    """Get the process-wide Redis connection pool, configured from ``REDIS_URL``.
+
+    Callers should go through ``get_redis_client`` or the ``cache_*_json``
+    helpers rather than opening their own connections.
+    """
+    config = get_settings().redis
+    if config is None:
+        raise RuntimeError("Redis is not configured; set REDIS_URL")
+    
+    import redis.asyncio as redis
+    
+    return redis.ConnectionPool.from_url(
+        config.url,
+        max_connections=config.max_connections,
+        socket_timeout=config.socket_timeout,
+        retry_on_timeout=config.retry_on_timeout,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_redis_client():
+    """Get the process-wide Redis client on the shared pool, or None when Redis is not configured."""
+    if get_settings().redis is None:
+        return None
+    
+    import redis.asyncio as redis
+    
+    return redis.Redis(connection_pool=get_redis_pool())
+
+
+async def cache_get_json(key: str) -> Optional[Any]:
+    """Read a JSON value cached in Redis; an unconfigured or failing Redis is a miss."""
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        cached = await client.get(key)
+    except Exception as e:
+        logger.warning("Redis cache read failed for %s: %s", key, e)
+        return None
+    return orjson.loads(cached) if cached is not None else None
+
+
+async def cache_set_json(key: str, value: Any, ttl: int):
+    """Cache a JSON value in Redis for ttl seconds; failures are only logged."""
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.set(key, orjson.dumps(value), ex=ttl)
+    except Exception as e:
+        logger.warning("Redis cache write failed for %s: %s", key, e)
+
+
+@lru_cache(maxsize=1)
+def get_neo4j_driver():
+    """Get the process-wide async Neo4j driver, or None when Neo4j is not configured."""
+    config = get_settings().neo4j
+    if config is None:
+        return None
+    
+    from neo4j import AsyncGraphDatabase
+    
+    return AsyncGraphDatabase.driver(
+        config.connection_string,
+        auth=(config.username, config.password),
+        max_connection_lifetime=config.max_connection_lifetime,
+        max_connection_pool_size=config.max_connection_pool_size,
+    )
+
+
 def get_database_info() -> dict:
     """Get database connection information."""
+    settings = get_settings()
     return {
         "database_type": "PostgreSQL" if async_engine else "SQLite",
         "connection_status": "connected" if (engine or async_engine) else "disconnected",
         "debug_mode": settings.debug,
-        "database_url_configured": bool(getattr(settings, 'database_url_async', None))
+        "database_url_configured": settings.database is not None
     }
 
 
@@ -127,20 +217,16 @@ async def check_database_health() -> dict:
     """Check database connection health."""
     try:
         if async_engine:
-            async with async_engine.begin() as conn:
-                result = await conn.execute("SELECT 1")
+            async with async_engine.connect() as conn:
+                result = await conn.execute(_HEALTH_STMT)
                 result.fetchone()
         elif engine:
             with engine.connect() as conn:
-                conn.execute("SELECT 1")
+                conn.execute(_HEALTH_STMT)
         else:
             return {"status": "error", "message": "Database not initialized"}
         
         return {"status": "healthy", "message": "Database connection OK"}
     except Exception as e:
-        logger.error(f"Database health check failed: {e}")
+        logger.error("Database health check failed: %s", e)
         return {"status": "unhealthy", "message": str(e)}
-
-
-# Initialize database on module import
-initialize_database()
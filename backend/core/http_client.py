@@ -0,0 +1,43 @@
+"""Shared outbound HTTP client for Ariadne backend."""
+
+import logging
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per process, so repeat requests to a host reuse
+# keep-alive connections instead of paying for TCP and TLS handshakes
+HTTP_TIMEOUT_SECONDS = 30
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client, creating it on first use."""
+    global _client
+    
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            http2=True,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            follow_redirects=True,
+        )
+        logger.info("Shared HTTP client created")
+    return _client
+
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections."""
+    global _client
+    
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,40 +1,78 @@
 """Core interfaces for the Ariadne plugin system."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation
+
+
+# Free-form payload dicts are opaque to the plugin system, so pydantic is told
+# not to walk their keys and values on every construction.
+OpaqueDict = Annotated[Dict[str, Any], SkipValidation]
 
 
 class ToolInput(BaseModel):
     """Input data for tool execution."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    
     query: str
-    context: Dict[str, Any] = Field(default_factory=dict)
+    context: OpaqueDict = Field(default_factory=dict)
     user_id: Optional[str] = None
     session_id: Optional[str] = None
 
 
 class ToolOutput(BaseModel):
     """Output data from tool execution."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    
     success: bool
     data: Any
     error_message: Optional[str] = None
     execution_time_ms: Optional[float] = None
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    metadata: OpaqueDict = Field(default_factory=dict)
+    
+    @classmethod
+    def ok(cls, data: Any, execution_time_ms: Optional[float] = None, **metadata: Any) -> "ToolOutput":
+        """Build a successful result without re-validating tool-produced data.
+        
+        Use the regular constructor for outputs parsed from untrusted input.
+        """
+        return cls.model_construct(
+            success=True,
+            data=data,
+            error_message=None,
+            execution_time_ms=execution_time_ms,
+            metadata=metadata,
+        )
+    
+    @classmethod
+    def err(cls, error_message: str, execution_time_ms: Optional[float] = None, **metadata: Any) -> "ToolOutput":
+        """Build a failed result without re-validating tool-produced data."""
+        return cls.model_construct(
+            success=False,
+            data=None,
+            error_message=error_message,
+            execution_time_ms=execution_time_ms,
+            metadata=metadata,
+        )
 
 
 class LearningInput(BaseModel):
     """Input data for learning models."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    
     user_id: str
-    feedback_data: Dict[str, Any]
-    context: Dict[str, Any] = Field(default_factory=dict)
+    feedback_data: OpaqueDict
+    context: OpaqueDict = Field(default_factory=dict)
 
 
 class LearningOutput(BaseModel):
     """Output data from learning models."""
+    model_config = ConfigDict(extra='forbid', frozen=True)
+    
     predictions: Any
     confidence_score: Optional[float] = None
     model_version: Optional[str] = None
-    metadata: Dict[str, Any] = Field(default_factory=dict)
+    metadata: OpaqueDict = Field(default_factory=dict)
 
 
 class ToolInterface(ABC):
@@ -1,13 +1,30 @@
 """Plugin registry system for dynamic tool and model discovery."""
 
 import importlib
+import importlib.metadata
 import pkgutil
 import logging
-from typing import Dict, Type, Any, List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Callable, Dict, Type, Any, Iterable, List, Mapping, Optional, Tuple
 from .interfaces import ToolInterface, LearningModelInterface
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# Most plugin modules imported at once during discovery
+DISCOVERY_MAX_WORKERS = 8
+
+
+def _import_module(module_name: str) -> Any:
+    """Import a module, returning the exception instead of raising it."""
+    try:
+        return importlib.import_module(module_name)
+    except Exception as e:
+        return e
+
 
 class PluginRegistry:
     """Central registry for all plugins (tools and models)."""
@@ -17,6 +34,28 @@ class PluginRegistry:
         self._learning_models: Dict[str, LearningModelInterface] = {}
         self._tool_metadata: Dict[str, Dict[str, Any]] = {}
         self._model_metadata: Dict[str, Dict[str, Any]] = {}
+        
+        # Number of entries with non-empty metadata, kept current on
+        # register/unregister so get_registry_stats doesn't rescan
+        self._tools_with_metadata = 0
+        self._models_with_metadata = 0
+        
+        # (name, description, version, timeout_seconds)
+        # per loaded tool, read once at registration so listings never touch
+        # the tool objects
+        self._tool_summaries: Dict[str, Tuple[str, str, str, int]] = {}
+        
+        # Installed-but-not-yet-loaded tools, keyed by entry point name
+        self._lazy_tools: Dict[str, importlib.metadata.EntryPoint] = {}
+        
+        # Called with a user_id whenever tools ingest documents for that user;
+        # services register here so tools never have to reach up into them
+        self._ingestion_listeners: List[Callable[[str], None]] = []
+        
+        # Read-only live views handed out by get_all_*; callers that need a
+        # snapshot they can mutate should copy with dict().
+        self._tools_view = MappingProxyType(self._tools)
+        self._learning_models_view = MappingProxyType(self._learning_models)
     
     def register_tool(self, tool: ToolInterface, metadata: Optional[Dict[str, Any]] = None):
         """Register a tool plugin."""
@@ -24,11 +63,17 @@ class PluginRegistry:
             raise TypeError(f"Expected ToolInterface, got {type(tool)}")
         
         if tool.name in self._tools:
-            logger.warning(f"Tool '{tool.name}' is already registered. Overwriting.")
+            logger.warning("Tool '%s' is already registered. Overwriting.", tool.name)
+        
+        if self._tool_metadata.get(tool.name):
+            self._tools_with_metadata -= 1
+        if metadata:
+            self._tools_with_metadata += 1
         
         self._tools[tool.name] = tool
         self._tool_metadata[tool.name] = metadata or {}
-        logger.info(f"Registered tool: {tool.name} (version: {tool.version})")
+        self._tool_summaries[tool.name] = (tool.name, tool.description, tool.version, tool.timeout_seconds)
+        logger.info("Registered tool: %s (version: %s)", tool.name, tool.version)
     
     def register_learning_model(self, model: LearningModelInterface, metadata: Optional[Dict[str, Any]] = None):
         """Register a learning model plugin."""
@@ -36,23 +81,41 @@ class PluginRegistry:
             raise TypeError(f"Expected LearningModelInterface, got {type(model)}")
         
         if model.name in self._learning_models:
-            logger.warning(f"Model '{model.name}' is already registered. Overwriting.")
+            logger.warning("Model '%s' is already registered. Overwriting.", model.name)
+        
+        if self._model_metadata.get(model.name):
+            self._models_with_metadata -= 1
+        if metadata:
+            self._models_with_metadata += 1
         
         self._learning_models[model.name] = model
         self._model_metadata[model.name] = metadata or {}
-        logger.info(f"Registered learning model: {model.name} (version: {model.version})")
+        logger.info("Registered learning model: %s (version: %s)", model.name, model.version)
     
     def get_tool(self, name: str) -> Optional[ToolInterface]:
-        """Get a registered tool by name."""
-        return self._tools.get(name)
+        """Get a registered tool by name, loading it from its entry point if needed."""
+        tool = self._tools.get(name)
+        if tool is None and name in self._lazy_tools:
+            entry_point = self._lazy_tools.pop(name)
+            try:
+                self.register_tool(entry_point.load()())
+            except Exception as e:
+                logger.error("Failed to load tool %s from %s: %s", name, entry_point.value, e)
+                return None
+            tool = self._tools.get(name)
+        return tool
     
     def get_learning_model(self, name: str) -> Optional[LearningModelInterface]:
         """Get a registered learning model by name."""
         return self._learning_models.get(name)
     
     def list_tools(self) -> List[str]:
-        """List all registered tool names."""
-        return list(self._tools.keys())
+        """List all registered tool names, including not-yet-loaded entry points."""
+        return list(self._tools.keys()) + list(self._lazy_tools.keys())
+    
+    def list_tool_summaries(self) -> List[Tuple[str, str, str, int]]:
+        """List (name, description, version, timeout_seconds) for every loaded tool."""
+        return list(self._tool_summaries.values())
     
     def list_learning_models(self) -> List[str]:
         """List all registered learning model names."""
@@ -66,92 +129,168 @@ class PluginRegistry:
         """Get metadata for a model."""
         return self._model_metadata.get(name)
     
-    def get_all_tools(self) -> Dict[str, ToolInterface]:
-        """Get all registered tools."""
-        return self._tools.copy()
+    def get_all_tools(self) -> Mapping[str, ToolInterface]:
+        """Get a read-only view of all registered tools."""
+        return self._tools_view
     
-    def get_all_models(self) -> Dict[str, LearningModelInterface]:
-        """Get all registered learning models."""
-        return self._learning_models.copy()
+    def get_all_models(self) -> Mapping[str, LearningModelInterface]:
+        """Get a read-only view of all registered learning models."""
+        return self._learning_models_view
     
-    def discover_plugins(self, package_name: str, exclude_patterns: Optional[List[str]] = None):
+    def discover_plugins(
+        self, package_name: str, exclude_patterns: Optional[List[str]] = None
+    ) -> List[Tuple[str, str]]:
         """Auto-discover plugins in a package and its sub-packages.
         
         Args:
             package_name: Python package name to search (e.g., 'plugins.tools')
             exclude_patterns: List of patterns to exclude from discovery
+        
+        Returns:
+            A manifest of ``(module_name, class_name)`` pairs for every plugin
+            registered, which ``load_manifest`` can replay without rescanning
         """
+        manifest: List[Tuple[str, str]] = []
         exclude_patterns = exclude_patterns or ['test', 'tests', '__pycache__']
+        exclude_re = re.compile(
+            '|'.join(re.escape(pattern) for pattern in exclude_patterns), re.IGNORECASE
+        )
         
         try:
             package = importlib.import_module(package_name)
             package_path = package.__path__
         except ImportError as e:
-            logger.warning(f"Could not import package {package_name}: {e}")
-            return
+            logger.warning("Could not import package %s: %s", package_name, e)
+            return manifest
         
-        for finder, name, is_package in pkgutil.iter_modules(package_path):
-            # Skip excluded patterns
-            if any(pattern in name.lower() for pattern in exclude_patterns):
-                continue
-            
+        # Skip excluded patterns
+        module_names = [
+            f'{package_name}.{name}'
+            for finder, name, is_package in pkgutil.iter_modules(package_path)
+            if not exclude_re.search(name)
+        ]
+        
+        # Plugin modules may do slow I/O at import time, so they are imported
+        # concurrently; registration below stays serial and in discovery order
+        if len(module_names) > 1:
+            with ThreadPoolExecutor(max_workers=min(DISCOVERY_MAX_WORKERS, len(module_names))) as pool:
+                imported = list(pool.map(_import_module, module_names))
+        else:
+            imported = [_import_module(module_name) for module_name in module_names]
+        
+        for module_name, module in zip(module_names, imported):
             try:
-                module_name = f'{package_name}.{name}'
-                module = importlib.import_module(module_name)
+                if isinstance(module, Exception):
+                    raise module
                 
-                # Look for ToolInterface implementations
-                for attr_name in dir(module):
-                    attr = getattr(module, attr_name)
-                    if (isinstance(attr, type) and 
-                        issubclass(attr, ToolInterface) and 
-                        attr is not ToolInterface):
+                # Look for ToolInterface and LearningModelInterface
+                # implementations in a single pass over the module namespace
+                for attr_name, attr in list(vars(module).items()):
+                    if not isinstance(attr, type):
+                        continue
+                    if issubclass(attr, ToolInterface) and attr is not ToolInterface:
                         try:
                             # Instantiate the tool
                             tool_instance = attr()
                             self.register_tool(tool_instance)
+                            manifest.append((module_name, attr_name))
                         except Exception as e:
-                            logger.error(f"Failed to instantiate tool {attr_name}: {e}")
-                
-                # Look for LearningModelInterface implementations
-                for attr_name in dir(module):
-                    attr = getattr(module, attr_name)
-                    if (isinstance(attr, type) and 
-                        issubclass(attr, LearningModelInterface) and 
-                        attr is not LearningModelInterface):
+                            logger.error("Failed to instantiate tool %s: %s", attr_name, e)
+                    elif (issubclass(attr, LearningModelInterface) and
+                          attr is not LearningModelInterface):
                         try:
                             # Instantiate the model
                             model_instance = attr()
                             self.register_learning_model(model_instance)
+                            manifest.append((module_name, attr_name))
                         except Exception as e:
-                            logger.error(f"Failed to instantiate model {attr_name}: {e}")
+                            logger.error("Failed to instantiate model %s: %s", attr_name, e)
                             
             except Exception as e:
-                logger.warning(f"Could not import module {module_name}: {e}")
+                logger.warning("Could not import module %s: %s", module_name, e)
+        
+        return manifest
+    
+    def load_manifest(self, manifest: List[Tuple[str, str]]):
+        """Register the plugins named in a manifest from ``discover_plugins``.
+        
+        Only the listed modules are imported; the package is not rescanned.
+        """
+        for module_name, class_name in manifest:
+            try:
+                plugin = getattr(importlib.import_module(module_name), class_name)()
+            except Exception as e:
+                logger.error("Failed to load plugin %s.%s: %s", module_name, class_name, e)
+                continue
+            if isinstance(plugin, ToolInterface):
+                self.register_tool(plugin)
+            elif isinstance(plugin, LearningModelInterface):
+                self.register_learning_model(plugin)
+            else:
+                logger.error("%s.%s is not a tool or learning model", module_name, class_name)
+    
+    def discover_plugins_entrypoints(self, group: str = 'ariadne.tools'):
+        """Record tools advertised through installed package entry points.
+        
+        Nothing is imported here; each tool's module is loaded the first time
+        it is requested through ``get_tool``. Plugins declare themselves in
+        their pyproject.toml::
+        
+            [project.entry-points."ariadne.tools"]
+            my_tool = "my_package.tools:MyTool"
+        
+        The entry point name must match the tool's ``name``. Returns the
+        number of entry points found in the group.
+        """
+        entry_points = importlib.metadata.entry_points(group=group)
+        for entry_point in entry_points:
+            if entry_point.name not in self._tools:
+                self._lazy_tools[entry_point.name] = entry_point
+        return len(entry_points)
+    
+    def add_ingestion_listener(self, listener: Callable[[str], None]):
+        """Register a callback run with each user_id that has new documents."""
+        self._ingestion_listeners.append(listener)
+    
+    def notify_documents_ingested(self, user_ids: Iterable[Optional[str]]):
+        """Tell listeners which users' documents a tool just ingested.
+        
+        Documents without an owner are not in any user's context, so they
+        notify nobody.
+        """
+        for user_id in set(user_ids) - {None}:
+            for listener in self._ingestion_listeners:
+                listener(user_id)
     
     def unregister_tool(self, name: str) -> bool:
         """Unregister a tool by name."""
-        if name in self._tools:
-            del self._tools[name]
-            del self._tool_metadata[name]
-            logger.info(f"Unregistered tool: {name}")
-            return True
-        return False
+        if self._tools.pop(name, _MISSING) is _MISSING:
+            return False
+        self._tool_summaries.pop(name, None)
+        if self._tool_metadata.pop(name, None):
+            self._tools_with_metadata -= 1
+        logger.info("Unregistered tool: %s", name)
+        return True
     
     def unregister_model(self, name: str) -> bool:
         """Unregister a learning model by name."""
-        if name in self._learning_models:
-            del self._learning_models[name]
-            del self._model_metadata[name]
-            logger.info(f"Unregistered learning model: {name}")
-            return True
-        return False
+        if self._learning_models.pop(name, _MISSING) is _MISSING:
+            return False
+        if self._model_metadata.pop(name, None):
+            self._models_with_metadata -= 1
+        logger.info("Unregistered learning model: %s", name)
+        return True
     
     def clear_all(self):
         """Clear all registered plugins."""
         self._tools.clear()
+        self._tool_summaries.clear()
+        self._lazy_tools.clear()
         self._learning_models.clear()
         self._tool_metadata.clear()
         self._model_metadata.clear()
+        self._tools_with_metadata = 0
+        self._models_with_metadata = 0
         logger.info("Cleared all registered plugins")
     
     def get_registry_stats(self) -> Dict[str, Any]:
@@ -159,10 +298,10 @@ class PluginRegistry:
         return {
             "total_tools": len(self._tools),
             "total_models": len(self._learning_models),
-            "tool_names": list(self._tools.keys()),
-            "model_names": list(self._learning_models.keys()),
-            "tools_with_metadata": len([k for k in self._tool_metadata.keys() if self._tool_metadata[k]]),
-            "models_with_metadata": len([k for k in self._model_metadata.keys() if self._model_metadata[k]])
+            "tool_names": list(self._tools),
+            "model_names": list(self._learning_models),
+            "tools_with_metadata": self._tools_with_metadata,
+            "models_with_metadata": self._models_with_metadata
         }
 
 
@@ -1,25 +1,36 @@
 """Main application entry point for the Ariadne backend."""
 
+import asyncio
 import logging
+import os
 import signal
 import sys
+import time
+import uuid
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Dict, List
 
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import insert
 
 from core.config import get_settings
+from core import database
+from core.database import initialize_database
+from core.http_client import close_http_client
 from core.registry import registry
 from api.v1.research.router import router as research_router
 from api.v1.users.router import router as users_router
 from api.v1.tapestries.router import router as tapestries_router
 from auth.jwt_middleware import JWTMiddleware
 from auth.rate_limiter import RateLimitMiddleware
-from services.user_service import UserService
+from models import plan_cache
+from models.session import SessionActivity, UserSession
+from services import get_memory_service, get_user_service
 from services.muse_service import MuseService
 from services.tapestry_service import TapestryService
 
@@ -32,82 +43,317 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
+_IS_PROD = settings.is_production
+_IS_DEV = settings.is_development
+_APP_NAME = settings.app_name
+_APP_VERSION = settings.app_version
+
+# Session activity rows are queued by ActivityMiddleware and written in batches
+ACTIVITY_QUEUE_MAXSIZE = 10000
+ACTIVITY_BATCH_SIZE = 500
+ACTIVITY_FLUSH_INTERVAL_SECONDS = 0.1
+
+
+async def _write_activities(batch: List[Dict[str, Any]]) -> None:
+    """Insert a batch of session activity rows and touch their sessions, one statement each."""
+    session_ids = {row["session_id"] for row in batch}
+    
+    def touch_sessions(session):
+        UserSession.bulk_touch(session, session_ids)
+    
+    try:
+        if database.AsyncSessionLocal is not None:
+            async with database.AsyncSessionLocal() as session:
+                await session.execute(insert(SessionActivity), batch)
+                await session.run_sync(touch_sessions)
+                await session.commit()
+        elif database.SessionLocal is not None:
+            def write_sync():
+                with database.SessionLocal() as session:
+                    session.execute(insert(SessionActivity), batch)
+                    touch_sessions(session)
+                    session.commit()
+            await asyncio.to_thread(write_sync)
+    except Exception:
+        logger.exception("Failed to write %d session activities", len(batch))
+
+
+async def _flush_activities(queue: asyncio.Queue) -> None:
+    """Drain the activity queue every 100 ms or 500 rows, whichever comes first."""
+    loop = asyncio.get_running_loop()
+    batch: List[Dict[str, Any]] = []
+    try:
+        while True:
+            batch.append(await queue.get())
+            deadline = loop.time() + ACTIVITY_FLUSH_INTERVAL_SECONDS
+            while len(batch) < ACTIVITY_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await _write_activities(batch)
+            batch = []
+    except asyncio.CancelledError:
+        # Flush whatever is still queued on shutdown
+        while not queue.empty():
+            batch.append(queue.get_nowait())
+        if batch:
+            await _write_activities(batch)
+        raise
+
+
+async def _load_plan_cache() -> None:
+    """Load the subscription plan catalogue into the in-process cache."""
+    try:
+        if database.AsyncSessionLocal is not None:
+            async with database.AsyncSessionLocal() as session:
+                await plan_cache.load_plans_async(session)
+        elif database.SessionLocal is not None:
+            def load_sync():
+                with database.SessionLocal() as session:
+                    plan_cache.load_plans(session)
+            await asyncio.to_thread(load_sync)
+    except Exception as e:
+        logger.warning("Failed to load subscription plans: %s", e)
+
+
+async def _refresh_plan_cache() -> None:
+    """Reload the plan catalogue so edits made by other workers are picked up."""
+    while True:
+        await _load_plan_cache()
+        await asyncio.sleep(plan_cache.PLAN_CACHE_REFRESH_SECONDS)
 
 
 @asynccontextmanager
-async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+async def lifespan(app: FastAPI) -> AsyncGenerator[Dict[str, Any], None]:
     """Application lifespan manager."""
     # Startup
     logger.info("Starting Ariadne backend...")
     
+    # Set up database engines
+    initialize_database()
+    
     # Discover and register all plugins
     logger.info("Discovering plugins...")
-    registry.discover_plugins('plugins.tools')
+    # Installed tools are loaded lazily through their entry points; the
+    # in-tree package is only imported when none are installed
+    if not registry.discover_plugins_entrypoints():
+        registry.discover_plugins('plugins.tools')
     registry.discover_plugins('plugins.learning_models')
     
     # Initialize services
     logger.info("Initializing services...")
-    user_service = UserService()
+    user_service = get_user_service()
     muse_service = MuseService()
     tapestry_service = TapestryService()
     
-    # Store services in app state for dependency injection
-    app.state.user_service = user_service
-    app.state.muse_service = muse_service
-    app.state.tapestry_service = tapestry_service
+    # ActivityMiddleware queues one row per authenticated request
+    activity_queue = asyncio.Queue(maxsize=ACTIVITY_QUEUE_MAXSIZE)
+    activity_task = asyncio.create_task(_flush_activities(activity_queue))
+    plan_cache_task = asyncio.create_task(_refresh_plan_cache())
     
     logger.info("Ariadne backend started successfully")
     
-    yield
+    # The yielded mapping is copied into every request's scope["state"], so
+    # handlers read request.state.user_service etc. with a single dict lookup
+    yield {
+        "user_service": user_service,
+        "muse_service": muse_service,
+        "tapestry_service": tapestry_service,
+        "activity_queue": activity_queue,
+    }
     
     # Shutdown
     logger.info("Shutting down Ariadne backend...")
-    # Cleanup resources here if needed
+    plan_cache_task.cancel()
+    activity_task.cancel()
+    for task in (plan_cache_task, activity_task):
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await get_memory_service().flush()
+    await close_http_client()
 
 
 # Create FastAPI application
 app = FastAPI(
-    title=settings.app_name,
-    version=settings.app_version,
+    title=_APP_NAME,
+    version=_APP_VERSION,
     description="Ariadne - Your AI Research Partner",
-    docs_url="/docs" if settings.is_development else None,
-    redoc_url="/redoc" if settings.is_development else None,
+    docs_url="/docs" if _IS_DEV else None,
+    redoc_url="/redoc" if _IS_DEV else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# Add middleware
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.allowed_origins,
-    allow_credentials=True,
-    allow_methods=settings.allowed_methods,
-    allow_headers=settings.allowed_headers,
-)
+# Probe endpoints only ever return these settings-derived payloads
+_HEALTH_PAYLOAD = {
+    "status": "healthy",
+    "service": _APP_NAME,
+    "version": _APP_VERSION,
+    "environment": settings.environment
+}
+_ROOT_PAYLOAD = {
+    "message": f"Welcome to {_APP_NAME}",
+    "version": _APP_VERSION,
+    "docs": "/docs" if _IS_DEV else None,
+    "api_docs": "/api/v1/docs" if _IS_DEV else None
+}
+_HEALTH_BYTES = orjson.dumps(_HEALTH_PAYLOAD)
+_ROOT_BYTES = orjson.dumps(_ROOT_PAYLOAD)
+_UNAUTH_PATHS = frozenset({"/health", "/"})
+# Probe answers must never be served from an intermediary cache
+_NO_STORE = {"cache-control": "no-store"}
+
+
+class PathFastPathMiddleware:
+    """Answer load balancer and uptime probes before the rest of the middleware stack."""
+    
+    def __init__(self, app):
+        self.app = app
+        self._responses = {}
+        for path, body in (("/health", _HEALTH_BYTES), ("/", _ROOT_BYTES)):
+            headers = [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"cache-control", b"no-store"),
+            ]
+            self._responses[path] = (headers, body)
+    
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["path"] not in _UNAUTH_PATHS
+                or scope["method"] not in ("GET", "HEAD")):
+            await self.app(scope, receive, send)
+            return
+        
+        headers, body = self._responses[scope["path"]]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body if scope["method"] == "GET" else b""})
+
+
+class TrustedHostMiddleware:
+    """Reject requests whose Host header isn't one of ours.
+    
+    Exact hosts are a set lookup and subdomains a single suffix check, instead
+    of Starlette's per-pattern loop. Requests without a client address (Unix
+    socket probes) are let through.
+    """
+    
+    def __init__(self, app, exact_hosts, suffixes=()):
+        self.app = app
+        self.exact_hosts = frozenset(exact_hosts)
+        self.suffixes = tuple(suffixes)
+        self._invalid_body = b"Invalid host header"
+        self._invalid_headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(self._invalid_body)).encode()),
+        ]
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("client") is None:
+            await self.app(scope, receive, send)
+            return
+        
+        host = ""
+        for key, value in scope["headers"]:
+            if key == b"host":
+                host = value.decode("latin-1").split(":", 1)[0]
+                break
+        
+        if host in self.exact_hosts or (self.suffixes and host.endswith(self.suffixes)):
+            await self.app(scope, receive, send)
+            return
+        
+        await send({"type": "http.response.start", "status": 400, "headers": self._invalid_headers})
+        await send({"type": "http.response.body", "body": self._invalid_body})
+
+
+class ClockMiddleware:
+    """Stamp each request with one clock reading for handlers and models to share."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            state = scope.setdefault("state", {})
+            state["now_ts"] = now_ts = time.time()
+            state["now"] = datetime.fromtimestamp(now_ts, timezone.utc).replace(tzinfo=None)
+        await self.app(scope, receive, send)
 
-# Trusted host middleware (security)
-if not settings.is_development:
-    app.add_middleware(
-        TrustedHostMiddleware,
-        allowed_hosts=["ariadne.ai", "*.ariadne.ai", "localhost"]
-    )
 
-# Rate limiting middleware
-app.add_middleware(RateLimitMiddleware)
+class ActivityMiddleware:
+    """Queue a session activity row for each authenticated request.
+    
+    Runs inside JWTMiddleware, so the token's claims are on the request state.
+    Requests whose token isn't tied to a login session are not recorded, and
+    rows are dropped rather than waited on when the queue is full.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        state = scope.get("state")
+        payload = state.get("user") if state else None
+        queue = state.get("activity_queue") if state else None
+        if scope["type"] != "http" or payload is None or payload.session_id is None or queue is None:
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            try:
+                queue.put_nowait({
+                    "session_id": uuid.UUID(payload.session_id),
+                    "user_id": uuid.UUID(payload.user_id),
+                    "activity_type": "api_request",
+                    "endpoint": scope["path"][:255],
+                    "method": scope["method"],
+                    "status_code": status_code,
+                    "response_time_ms": int((time.perf_counter() - started) * 1000),
+                })
+            except (ValueError, TypeError, AttributeError):
+                logger.debug("Not recording activity for malformed session claims")
+            except asyncio.QueueFull:
+                logger.warning("Session activity queue full; dropping a row")
 
-# JWT authentication middleware
-app.add_middleware(JWTMiddleware)
+
+# Versioned API application. Authentication and rate limiting wrap only this
+# mount, so public routes such as /health never enter those middlewares.
+api_v1 = FastAPI(
+    title=f"{_APP_NAME} API",
+    version=_APP_VERSION,
+    docs_url="/docs" if _IS_DEV else None,
+    redoc_url="/redoc" if _IS_DEV else None,
+    default_response_class=ORJSONResponse,
+)
 
 # Global exception handler
 @app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+@api_v1.exception_handler(Exception)
+async def global_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     """Global exception handler."""
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
-            "message": "An unexpected error occurred" if settings.is_production else str(exc)
+            "message": "An unexpected error occurred" if _IS_PROD else str(exc)
         }
     )
 
@@ -116,34 +362,56 @@ async def global_exception_handler(request: Request, exc: Exception) -> JSONResp
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "service": settings.app_name,
-        "version": settings.app_version,
-        "environment": settings.environment
-    }
+    return Response(content=_HEALTH_BYTES, media_type="application/json", headers=_NO_STORE)
 
 
 # Root endpoint
 @app.get("/")
 async def root():
     """Root endpoint."""
-    return {
-        "message": f"Welcome to {settings.app_name}",
-        "version": settings.app_version,
-        "docs": "/docs" if settings.is_development else None
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json", headers=_NO_STORE)
 
 
 # API v1 routers
-app.include_router(research_router, prefix="/api/v1/research", tags=["research"])
-app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
-app.include_router(tapestries_router, prefix="/api/v1/tapestries", tags=["tapestries"])
+api_v1.include_router(research_router, prefix="/research", tags=["research"])
+api_v1.include_router(users_router, prefix="/users", tags=["users"])
+api_v1.include_router(tapestries_router, prefix="/tapestries", tags=["tapestries"])
+
+# Middleware is composed once here rather than through add_middleware, so each
+# request walks a fixed chain of pre-bound ASGI callables (outermost last).
+# Rate limiting sits inside JWT so authenticated clients are keyed by user.
+api_v1_asgi = RateLimitMiddleware(api_v1)
+# Session activity is recorded for authenticated requests, including 429s
+api_v1_asgi = ActivityMiddleware(api_v1_asgi)
+api_v1_asgi = JWTMiddleware(api_v1_asgi)
+# Per-request clock shared through request.state.now / request.state.now_ts
+api_v1_asgi = ClockMiddleware(api_v1_asgi)
+app.mount("/api/v1", api_v1_asgi)
+
+# CORS middleware
+application = CORSMiddleware(
+    app,
+    allow_origins=settings.allowed_origins,
+    allow_credentials=True,
+    allow_methods=settings.allowed_methods,
+    allow_headers=settings.allowed_headers,
+)
+
+# Trusted host middleware (security)
+if not _IS_DEV:
+    application = TrustedHostMiddleware(
+        application,
+        exact_hosts={"ariadne.ai", "localhost"},
+        suffixes=(".ariadne.ai",)
+    )
+
+# Outermost, so probes are answered before CORS and TrustedHost
+application = PathFastPathMiddleware(application)
 
 
 def signal_handler(signum, frame):
     """Signal handler for graceful shutdown."""
-    logger.info(f"Received signal {signum}. Shutting down gracefully...")
+    logger.info("Received signal %s. Shutting down gracefully...", signum)
     sys.exit(0)
 
 
@@ -152,13 +420,27 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # Default to one worker per CPU; more than 2n+1 only costs memory
+    cpu_count = os.cpu_count() or 1
+    workers = 1 if settings.reload else (settings.workers or cpu_count)
+    if workers > 2 * cpu_count + 1:
+        logger.warning(
+            "workers=%d exceeds 2*cpu+1=%d; likely to hurt throughput",
+            workers, 2 * cpu_count + 1
+        )
+    
     # Run the application
     uvicorn.run(
-        "main:app",
+        "main:application",
         host=settings.host,
         port=settings.port,
-        reload=settings.reload and settings.is_development,
-        workers=settings.workers if not settings.reload else 1,
-        log_level=settings.monitoring.log_level.lower(),
-        access_log=True
+        reload=settings.reload and _IS_DEV,
+        workers=workers,
+        log_level=settings.monitoring.log_level.lower() if settings.monitoring else "info",
+        access_log=not _IS_PROD,
+        # Pin the C implementations rather than letting "auto" probe for them
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        ws="websockets",
+        interface="asgi3"
     )
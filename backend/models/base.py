@@ -0,0 +1,16 @@
+"""Column defaults and constants shared by the SQLAlchemy models."""
+
+from types import MappingProxyType
+
+from sqlalchemy import func
+
+# Timestamps are stored as naive UTC, matching datetime.utcnow() in the model
+# methods, and assigned by the database on insert and, through the UPDATE's
+# SET clause, on every update
+utc_now = func.timezone("utc", func.now())
+
+# Mapper arguments that load server-generated columns (keys, timestamps) back
+# via RETURNING on insert
+EAGER_DEFAULTS_MAPPER_ARGS = MappingProxyType({"eager_defaults": True})
+
+SECONDS_PER_DAY = 86400
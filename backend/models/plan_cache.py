@@ -0,0 +1,69 @@
+"""In-process cache of the subscription plan catalogue."""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import event, select
+
+from models.subscription import SubscriptionPlan
+
+# There are only a handful of plans, so the whole table is cached. Entries
+# older than the TTL are ignored, so a missed refresh falls back to the database
+PLAN_CACHE_TTL_SECONDS = 300
+PLAN_CACHE_REFRESH_SECONDS = 60
+
+_plans: Dict[UUID, SubscriptionPlan] = {}
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _store(session, plans: Iterable[SubscriptionPlan]) -> int:
+    """Detach loaded plans from their session and swap them into the cache."""
+    global _plans, _loaded_at
+    
+    fresh = {}
+    for plan in plans:
+        session.expunge(plan)
+        fresh[plan.plan_id] = plan
+    with _lock:
+        _plans = fresh
+        _loaded_at = time.monotonic()
+    return len(fresh)
+
+
+def load_plans(session) -> int:
+    """Load every plan with a synchronous session; returns the number cached."""
+    plans = session.execute(select(SubscriptionPlan)).scalars().all()
+    return _store(session, plans)
+
+
+async def load_plans_async(session) -> int:
+    """Load every plan with an async session; returns the number cached."""
+    result = await session.execute(select(SubscriptionPlan))
+    return _store(session, result.scalars().all())
+
+
+def get_plan(plan_id: UUID) -> Optional[SubscriptionPlan]:
+    """Get a cached plan, or None when it is unknown or the cache is stale."""
+    if time.monotonic() - _loaded_at > PLAN_CACHE_TTL_SECONDS:
+        return None
+    return _plans.get(plan_id)
+
+
+def invalidate_plan(plan_id: Optional[UUID] = None) -> None:
+    """Drop one plan from the cache, or every plan when no ID is given."""
+    with _lock:
+        if plan_id is None:
+            _plans.clear()
+        else:
+            _plans.pop(plan_id, None)
+
+
+@event.listens_for(SubscriptionPlan, "after_insert")
+@event.listens_for(SubscriptionPlan, "after_update")
+@event.listens_for(SubscriptionPlan, "after_delete")
+def _on_plan_change(mapper, connection, target: SubscriptionPlan) -> None:
+    """Forget a plan written by this process until the next refresh."""
+    invalidate_plan(target.plan_id)
@@ -1,73 +1,82 @@
 """Session model for managing user authentication sessions."""
 
 from datetime import datetime
-from typing import Optional, Dict, Any
-from uuid import UUID, uuid4
+from typing import Optional, Dict, Any, Iterable, Tuple
+from uuid import UUID
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, Index, JSON
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
-from sqlalchemy.orm import declarative_base
+import orjson
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, Index, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PostgresUUID
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-Base = declarative_base()
+from models.base import EAGER_DEFAULTS_MAPPER_ARGS, utc_now
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+# Primary keys are generated by Postgres (built in since 13, pgcrypto before)
+_gen_uuid = text("gen_random_uuid()")
 
 
 class UserSession(Base):
     """Session model for tracking user authentication sessions."""
     
     __tablename__ = "user_sessions"
+    __mapper_args__ = EAGER_DEFAULTS_MAPPER_ARGS
     
     # Primary identity
-    session_id = Column(
+    session_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
-        default=uuid4,
+        server_default=_gen_uuid,
         unique=True,
         nullable=False,
         comment="Unique session identifier"
     )
     
     # User relationship
-    user_id = Column(
+    user_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         nullable=False,
-        index=True,
         comment="User this session belongs to"
     )
     
     # Session data
-    jwt_token_hash = Column(
+    jwt_token_hash: Mapped[str] = mapped_column(
         String(255),
         nullable=False,
         comment="Hash of the JWT token for security"
     )
     
-    device_info = Column(
-        JSON,
+    device_info: Mapped[Optional[Dict[str, Any]]] = mapped_column(
+        JSONB,
         nullable=True,
         comment="Device information (browser, OS, etc.)"
     )
     
-    ip_address = Column(
+    ip_address: Mapped[Optional[str]] = mapped_column(
         String(45),  # IPv6 compatible
         nullable=True,
         comment="User's IP address when session was created"
     )
     
-    user_agent = Column(
+    user_agent: Mapped[Optional[str]] = mapped_column(
         Text,
         nullable=True,
         comment="User agent string from the client"
     )
     
     # Session state
-    is_active = Column(
+    is_active: Mapped[bool] = mapped_column(
         Boolean,
         default=True,
         nullable=False,
         comment="Whether session is currently active"
     )
     
-    is_anonymous = Column(
+    is_anonymous: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
@@ -75,27 +84,27 @@ class UserSession(Base):
     )
     
     # Token refresh tracking
-    refresh_token_hash = Column(
+    refresh_token_hash: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="Hash of the refresh token"
     )
     
-    last_refresh_at = Column(
+    last_refresh_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When session was last refreshed"
     )
     
     # Activity tracking
-    last_activity_at = Column(
+    last_activity_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When session was last active"
     )
     
-    activity_count = Column(
+    activity_count: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
@@ -103,13 +112,13 @@ class UserSession(Base):
     )
     
     # Session metadata
-    location = Column(
+    location: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="User's location (country/region)"
     )
     
-    mfa_verified = Column(
+    mfa_verified: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
@@ -117,32 +126,32 @@ class UserSession(Base):
     )
     
     # Time tracking
-    created_at = Column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When session was created"
     )
     
-    expires_at = Column(
+    expires_at: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="When session expires"
     )
     
-    last_seen_at = Column(
+    last_seen_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When user was last seen"
     )
     
-    terminated_at = Column(
+    terminated_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When session was terminated"
     )
     
-    termination_reason = Column(
+    termination_reason: Mapped[Optional[str]] = mapped_column(
         String(100),
         nullable=True,
         comment="Reason for session termination (logout, timeout, etc.)"
@@ -155,7 +164,11 @@ class UserSession(Base):
     @property
     def is_expired(self) -> bool:
         """Check if session has expired."""
-        return datetime.utcnow() > self.expires_at
+        return self.is_expired_at(datetime.utcnow())
+    
+    def is_expired_at(self, now: datetime) -> bool:
+        """Check if session has expired as of ``now``."""
+        return now > self.expires_at
     
     @property
     def is_valid(self) -> bool:
@@ -172,17 +185,25 @@ class UserSession(Base):
     @property
     def time_until_expiry_hours(self) -> float:
         """Get time until expiry in hours."""
-        if self.is_expired:
-            return 0
-        return (self.expires_at - datetime.utcnow()).total_seconds() / 3600
+        return self._snapshot(datetime.utcnow())[3]
+    
+    def _snapshot(self, now: datetime) -> Tuple[bool, bool, float, float]:
+        """Get (is_expired, is_valid, age_hours, time_until_expiry_hours) as of ``now``."""
+        expires_at = self.expires_at
+        expired = self.is_expired_at(now)
+        valid = self.is_active and not expired and self.terminated_at is None
+        age_hours = (now - self.created_at).total_seconds() / 3600
+        remaining_hours = 0 if expired else (expires_at - now).total_seconds() / 3600
+        return expired, valid, age_hours, remaining_hours
     
     def update_activity(self, increment_count: bool = True):
         """Update session activity tracking."""
-        self.last_activity_at = datetime.utcnow()
-        self.last_seen_at = datetime.utcnow()
-        
-        if increment_count:
-            self.activity_count += 1
+        now = datetime.utcnow()
+        self.apply_ops(
+            last_activity_at=now,
+            last_seen_at=now,
+            activity_count=self.activity_count + 1 if increment_count else self.activity_count,
+        )
     
     def extend_session(self, additional_hours: int = 24):
         """Extend session expiry."""
@@ -201,31 +222,87 @@ class UserSession(Base):
         # Session would be extended here based on refresh token logic
         self.extend_session()
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert session to dictionary."""
+    def apply_ops(self, **changes: Any):
+        """Set several columns at once so they go out in one UPDATE on flush."""
+        for name, value in changes.items():
+            setattr(self, name, value)
+    
+    @classmethod
+    def bulk_touch(cls, session, session_ids: Iterable[UUID]):
+        """Record activity for many sessions with a single UPDATE statement."""
+        session.execute(
+            update(cls)
+            .where(cls.session_id.in_(list(session_ids)))
+            .values(
+                last_activity_at=utc_now,
+                last_seen_at=utc_now,
+                activity_count=cls.activity_count + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    
+    def to_dict(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Convert session to dictionary.
+        
+        Pass the request's ``now`` (``request.state.now``) when serializing
+        many sessions so the clock is read once per request, not per row.
+        UUIDs and datetimes are returned as-is for ORJSONResponse to encode.
+        """
+        _, is_valid, age_hours, remaining_hours = self._snapshot(now or datetime.utcnow())
         return {
-            "session_id": str(self.session_id),
-            "user_id": str(self.user_id),
+            "session_id": self.session_id,
+            "user_id": self.user_id,
             "device_info": self.device_info,
             "ip_address": self.ip_address,
             "is_active": self.is_active,
             "is_anonymous": self.is_anonymous,
             "mfa_verified": self.mfa_verified,
-            "created_at": self.created_at.isoformat(),
-            "expires_at": self.expires_at.isoformat(),
-            "last_activity_at": self.last_activity_at.isoformat(),
-            "age_hours": round(self.age_hours, 2),
-            "time_until_expiry_hours": round(self.time_until_expiry_hours, 2),
-            "is_valid": self.is_valid,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at,
+            "last_activity_at": self.last_activity_at,
+            "age_hours": round(age_hours, 2),
+            "time_until_expiry_hours": round(remaining_hours, 2),
+            "is_valid": is_valid,
             "activity_count": self.activity_count,
         }
+    
+    @classmethod
+    def bulk_to_json(cls, session, user_id: UUID) -> bytes:
+        """Serialize all of a user's sessions to JSON for list endpoints.
+        
+        Reads plain column tuples instead of materializing ORM objects, and
+        lets orjson encode the UUIDs and datetimes directly.
+        """
+        rows = session.execute(
+            select(
+                cls.session_id,
+                cls.user_id,
+                cls.ip_address,
+                cls.is_active,
+                cls.created_at,
+                cls.expires_at,
+                cls.last_activity_at,
+                cls.activity_count,
+            ).where(cls.user_id == user_id)
+        ).all()
+        return orjson.dumps([row._asdict() for row in rows])
 
 
 # Database indexes for performance
-Index("idx_sessions_user_id", UserSession.user_id)
-Index("idx_sessions_jwt_hash", UserSession.jwt_token_hash)
+Index(
+    "idx_sessions_user_active_expires",
+    UserSession.user_id,
+    UserSession.is_active,
+    UserSession.expires_at,
+    postgresql_include=["session_id", "last_activity_at"],
+)
+Index(
+    "idx_sessions_jwt_active",
+    UserSession.jwt_token_hash,
+    UserSession.is_active,
+    postgresql_where=UserSession.is_active.is_(True),
+)
 Index("idx_sessions_refresh_hash", UserSession.refresh_token_hash)
-Index("idx_sessions_active", UserSession.is_active)
 Index("idx_sessions_expires_at", UserSession.expires_at)
 Index("idx_sessions_created_at", UserSession.created_at)
 
@@ -234,100 +311,99 @@ class SessionActivity(Base):
     """Session activity log for tracking user actions."""
     
     __tablename__ = "session_activities"
+    __mapper_args__ = EAGER_DEFAULTS_MAPPER_ARGS
     
     # Primary identity
-    activity_id = Column(
+    activity_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
-        default=uuid4,
+        server_default=_gen_uuid,
         unique=True,
         nullable=False,
         comment="Unique activity identifier"
     )
     
     # Relationships
-    session_id = Column(
+    session_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         nullable=False,
-        index=True,
         comment="Session this activity belongs to"
     )
     
-    user_id = Column(
+    user_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         nullable=False,
-        index=True,
         comment="User who performed the activity"
     )
     
     # Activity details
-    activity_type = Column(
+    activity_type: Mapped[str] = mapped_column(
         String(100),
         nullable=False,
         comment="Type of activity (query, export, etc.)"
     )
     
-    activity_description = Column(
+    activity_description: Mapped[Optional[str]] = mapped_column(
         Text,
         nullable=True,
         comment="Description of the activity"
     )
     
-    endpoint = Column(
+    endpoint: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="API endpoint accessed"
     )
     
-    method = Column(
+    method: Mapped[Optional[str]] = mapped_column(
         String(10),
         nullable=True,
         comment="HTTP method used"
     )
     
     # Response data
-    status_code = Column(
+    status_code: Mapped[Optional[int]] = mapped_column(
         Integer,
         nullable=True,
         comment="HTTP status code of the response"
     )
     
-    response_time_ms = Column(
+    response_time_ms: Mapped[Optional[int]] = mapped_column(
         Integer,
         nullable=True,
         comment="Response time in milliseconds"
     )
     
     # Context data
-    request_data = Column(
-        JSON,
+    request_data: Mapped[Optional[Dict[str, Any]]] = mapped_column(
+        JSONB,
         nullable=True,
         comment="Request data (sanitized)"
     )
     
-    response_data = Column(
-        JSON,
+    response_data: Mapped[Optional[Dict[str, Any]]] = mapped_column(
+        JSONB,
         nullable=True,
         comment="Response data (sanitized)"
     )
     
     # Location data
-    ip_address = Column(
+    ip_address: Mapped[Optional[str]] = mapped_column(
         String(45),
         nullable=True,
         comment="IP address when activity occurred"
     )
     
-    user_agent = Column(
+    user_agent: Mapped[Optional[str]] = mapped_column(
         Text,
         nullable=True,
         comment="User agent when activity occurred"
     )
     
     # Time tracking
-    created_at = Column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When activity occurred"
     )
@@ -342,11 +418,11 @@ class SessionActivity(Base):
         return self.status_code and 200 <= self.status_code < 300
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert activity to dictionary."""
+        """Convert activity to dictionary (UUIDs and datetimes left for orjson)."""
         return {
-            "activity_id": str(self.activity_id),
-            "session_id": str(self.session_id),
-            "user_id": str(self.user_id),
+            "activity_id": self.activity_id,
+            "session_id": self.session_id,
+            "user_id": self.user_id,
             "activity_type": self.activity_type,
             "activity_description": self.activity_description,
             "endpoint": self.endpoint,
@@ -354,13 +430,31 @@ class SessionActivity(Base):
             "status_code": self.status_code,
             "response_time_ms": self.response_time_ms,
             "ip_address": self.ip_address,
-            "created_at": self.created_at.isoformat(),
+            "created_at": self.created_at,
             "is_successful": self.is_successful,
         }
+    
+    @classmethod
+    def bulk_to_json(cls, session, session_id: UUID) -> bytes:
+        """Serialize a session's activity log to JSON for list endpoints."""
+        rows = session.execute(
+            select(
+                cls.activity_id,
+                cls.session_id,
+                cls.user_id,
+                cls.activity_type,
+                cls.endpoint,
+                cls.method,
+                cls.status_code,
+                cls.response_time_ms,
+                cls.created_at,
+            ).where(cls.session_id == session_id).order_by(cls.created_at.desc())
+        ).all()
+        return orjson.dumps([row._asdict() for row in rows])
 
 
 # Database indexes for session activities
-Index("idx_activities_session_id", SessionActivity.session_id)
+Index("idx_activities_session_created", SessionActivity.session_id, SessionActivity.created_at.desc())
 Index("idx_activities_user_id", SessionActivity.user_id)
 Index("idx_activities_type", SessionActivity.activity_type)
 Index("idx_activities_created_at", SessionActivity.created_at)
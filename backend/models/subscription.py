@@ -1,23 +1,123 @@
 """Subscription model for managing user subscriptions and billing."""
 
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+import time
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Iterable, List, Mapping, Tuple
 from uuid import UUID, uuid4
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, Index, ForeignKey, DECIMAL
-from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
-from sqlalchemy.orm import declarative_base, relationship
+import orjson
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, SmallInteger, String, Text, Index, ForeignKey, case, inspect, select, update
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, UUID as PostgresUUID
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, selectinload
 
-Base = declarative_base()
+from models.base import EAGER_DEFAULTS_MAPPER_ARGS, SECONDS_PER_DAY, utc_now
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+# Money is stored as integer minor units and only converted at the API
+# boundary. Plan prices are in the default currency, USD, so in cents
+CENTS_PER_UNIT = 100
+
+# Small closed vocabularies are Postgres enums: 4 bytes per row and checked
+# by the database
+SUBSCRIPTION_STATUS = ENUM(
+    "active", "cancelled", "expired", "suspended", name="subscription_status_enum"
+)
+BILLING_CYCLE = ENUM("monthly", "yearly", name="billing_cycle_enum")
+
+# Currencies are stored as their ISO 4217 numeric code and exposed as the
+# alphabetic code at the API boundary
+CURRENCY_NUMERIC_CODES: Mapping[str, int] = MappingProxyType({
+    "USD": 840,
+    "EUR": 978,
+    "GBP": 826,
+    "JPY": 392,
+    "CAD": 124,
+    "AUD": 36,
+    "CHF": 756,
+})
+CURRENCY_ALPHA_CODES: Mapping[int, str] = MappingProxyType(
+    {number: code for code, number in CURRENCY_NUMERIC_CODES.items()}
+)
+DEFAULT_CURRENCY = CURRENCY_NUMERIC_CODES["USD"]
+
+# Minor units per major unit, from each currency's ISO 4217 exponent; the yen
+# has no minor unit
+CURRENCY_MINOR_UNITS: Mapping[int, int] = MappingProxyType({
+    CURRENCY_NUMERIC_CODES[code]: 10 ** exponent
+    for code, exponent in (
+        ("USD", 2), ("EUR", 2), ("GBP", 2), ("JPY", 0), ("CAD", 2), ("AUD", 2), ("CHF", 2),
+    )
+})
+
+
+class CurrencyMixin:
+    """Currency helpers for models with an ISO 4217 numeric ``currency`` column."""
+    
+    @hybrid_property
+    def currency_code(self) -> Optional[str]:
+        """Alphabetic ISO 4217 currency code."""
+        return CURRENCY_ALPHA_CODES.get(self.currency)
+    
+    @currency_code.expression
+    def currency_code(cls):
+        """SQL form of the alphabetic currency code."""
+        return case(dict(CURRENCY_ALPHA_CODES), value=cls.currency)
+    
+    def to_major_units(self, amount: int) -> float:
+        """Convert an amount in this row's minor unit to major units."""
+        return amount / CURRENCY_MINOR_UNITS.get(self.currency, CENTS_PER_UNIT)
+
+
+def _utc_ts(value: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime as stored in these tables."""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+# Serialized plans by plan_id, with the updated_at revision they were built
+# from. Plans are a small catalogue, so only the latest revision is kept.
+_plan_dicts: Dict[UUID, Tuple[datetime, Dict[str, Any]]] = {}
+
+
+def _plan_dict(plan: "SubscriptionPlan") -> Dict[str, Any]:
+    """Build the serialized form of a plan."""
+    monthly_total = plan.price_monthly * 12
+    savings_cents = monthly_total - plan.price_yearly
+    return {
+        "plan_id": plan.plan_id,
+        "plan_name": plan.plan_name,
+        "display_name": plan.display_name,
+        "description": plan.description,
+        "price_monthly": plan.price_monthly / CENTS_PER_UNIT,
+        "price_yearly": plan.price_yearly / CENTS_PER_UNIT,
+        "queries_per_month": plan.queries_per_month,
+        "queries_per_day": plan.queries_per_day,
+        "storage_gb": plan.storage_gb,
+        "team_members_limit": plan.team_members_limit,
+        "api_access": plan.api_access,
+        "priority_support": plan.priority_support,
+        "advanced_features": plan.advanced_features,
+        "is_free": plan.price_monthly == 0,
+        "annual_savings": savings_cents / CENTS_PER_UNIT,
+        "annual_discount_percentage": (
+            round(savings_cents / monthly_total * 100, 1) if monthly_total else 0
+        ),
+    }
 
 
 class SubscriptionPlan(Base):
     """Subscription plan configuration."""
     
     __tablename__ = "subscription_plans"
+    __mapper_args__ = EAGER_DEFAULTS_MAPPER_ARGS
     
     # Primary identity
-    plan_id = Column(
+    plan_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
@@ -27,78 +127,78 @@ class SubscriptionPlan(Base):
     )
     
     # Plan details
-    plan_name = Column(
+    plan_name: Mapped[str] = mapped_column(
         String(100),
         unique=True,
         nullable=False,
         comment="Plan name (explorer, researcher, team)"
     )
     
-    display_name = Column(
+    display_name: Mapped[str] = mapped_column(
         String(100),
         nullable=False,
         comment="Human-readable plan name"
     )
     
-    description = Column(
+    description: Mapped[Optional[str]] = mapped_column(
         Text,
         nullable=True,
         comment="Plan description"
     )
     
     # Pricing
-    price_monthly = Column(
-        DECIMAL(10, 2),
+    price_monthly: Mapped[int] = mapped_column(
+        BigInteger,
         nullable=False,
-        comment="Monthly price in USD"
+        comment="Monthly price in USD cents"
     )
     
-    price_yearly = Column(
-        DECIMAL(10, 2),
+    price_yearly: Mapped[int] = mapped_column(
+        BigInteger,
         nullable=False,
-        comment="Yearly price in USD"
+        comment="Yearly price in USD cents"
     )
     
     # Features and limits
-    queries_per_month = Column(
+    queries_per_month: Mapped[int] = mapped_column(
         Integer,
         nullable=False,
         comment="Monthly query limit"
     )
     
-    queries_per_day = Column(
+    queries_per_day: Mapped[int] = mapped_column(
         Integer,
         nullable=False,
         comment="Daily query limit"
     )
     
-    storage_gb = Column(
+    storage_gb: Mapped[int] = mapped_column(
         Integer,
         nullable=False,
         comment="Storage limit in GB"
     )
     
-    team_members_limit = Column(
+    team_members_limit: Mapped[Optional[int]] = mapped_column(
         Integer,
         nullable=True,
         comment="Team member limit (None for unlimited)"
     )
     
-    api_access = Column(
+    api_access: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
         comment="Whether plan includes API access"
     )
     
-    priority_support = Column(
+    priority_support: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
         comment="Whether plan includes priority support"
     )
     
-    advanced_features = Column(
+    advanced_features: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
@@ -106,14 +206,14 @@ class SubscriptionPlan(Base):
     )
     
     # Plan status
-    is_active = Column(
+    is_active: Mapped[bool] = mapped_column(
         Boolean,
         default=True,
         nullable=False,
         comment="Whether plan is currently available"
     )
     
-    is_public = Column(
+    is_public: Mapped[bool] = mapped_column(
         Boolean,
         default=True,
         nullable=False,
@@ -121,78 +221,86 @@ class SubscriptionPlan(Base):
     )
     
     # Time tracking
-    created_at = Column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When plan was created"
     )
     
-    updated_at = Column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        server_default=utc_now,
+        onupdate=utc_now,
         nullable=False,
         comment="When plan was last updated"
     )
     
     # Relationships
-    subscriptions = relationship("UserSubscription", back_populates="plan")
+    subscriptions: Mapped[List["UserSubscription"]] = relationship("UserSubscription", back_populates="plan")
     
     def __repr__(self) -> str:
         """String representation of the subscription plan."""
-        return f"<SubscriptionPlan(name='{self.plan_name}', price=${self.price_monthly}/month)>"
+        return f"<SubscriptionPlan(name='{self.plan_name}', price=${self.price_monthly_usd}/month)>"
+    
+    @hybrid_property
+    def price_monthly_usd(self) -> float:
+        """Monthly price in USD."""
+        return self.price_monthly / CENTS_PER_UNIT
+    
+    @hybrid_property
+    def price_yearly_usd(self) -> float:
+        """Yearly price in USD."""
+        return self.price_yearly / CENTS_PER_UNIT
     
     @property
     def is_free(self) -> bool:
         """Check if this is a free plan."""
         return self.price_monthly == 0
     
-    @property
+    @hybrid_property
     def annual_savings(self) -> float:
         """Calculate savings for annual vs monthly billing."""
-        monthly_total = self.price_monthly * 12
-        savings = monthly_total - self.price_yearly
-        return float(savings)
+        savings_cents = self.price_monthly * 12 - self.price_yearly
+        return savings_cents / CENTS_PER_UNIT
     
-    @property
+    @hybrid_property
     def annual_discount_percentage(self) -> float:
         """Calculate percentage discount for annual billing."""
         if self.price_monthly == 0:
             return 0
         monthly_total = self.price_monthly * 12
-        savings = self.annual_savings
-        return (savings / monthly_total) * 100
+        savings_cents = monthly_total - self.price_yearly
+        return (savings_cents / monthly_total) * 100
+    
+    @annual_discount_percentage.expression
+    def annual_discount_percentage(cls):
+        """SQL form of the annual discount, usable in filters and ordering."""
+        monthly_total = cls.price_monthly * 12
+        return case(
+            (cls.price_monthly == 0, 0),
+            else_=(monthly_total - cls.price_yearly) * 100.0 / monthly_total,
+        )
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert plan to dictionary."""
-        return {
-            "plan_id": str(self.plan_id),
-            "plan_name": self.plan_name,
-            "display_name": self.display_name,
-            "description": self.description,
-            "price_monthly": float(self.price_monthly),
-            "price_yearly": float(self.price_yearly),
-            "queries_per_month": self.queries_per_month,
-            "queries_per_day": self.queries_per_day,
-            "storage_gb": self.storage_gb,
-            "team_members_limit": self.team_members_limit,
-            "api_access": self.api_access,
-            "priority_support": self.priority_support,
-            "advanced_features": self.advanced_features,
-            "is_free": self.is_free,
-            "annual_savings": self.annual_savings,
-            "annual_discount_percentage": round(self.annual_discount_percentage, 1),
-        }
+        """Convert plan to dictionary, memoized per (plan_id, updated_at) revision."""
+        # Unsaved plans and ones with unflushed edits have no revision to key on
+        if self.updated_at is None or inspect(self).modified:
+            return _plan_dict(self)
+        cached = _plan_dicts.get(self.plan_id)
+        if cached is None or cached[0] != self.updated_at:
+            cached = _plan_dicts[self.plan_id] = (self.updated_at, _plan_dict(self))
+        return dict(cached[1])
 
 
-class UserSubscription(Base):
+class UserSubscription(CurrencyMixin, Base):
     """User subscription tracking."""
     
     __tablename__ = "user_subscriptions"
+    __mapper_args__ = EAGER_DEFAULTS_MAPPER_ARGS
     
     # Primary identity
-    subscription_id = Column(
+    subscription_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
@@ -202,14 +310,13 @@ class UserSubscription(Base):
     )
     
     # Relationships
-    user_id = Column(
+    user_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         nullable=False,
-        index=True,
         comment="User this subscription belongs to"
     )
     
-    plan_id = Column(
+    plan_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         ForeignKey("subscription_plans.plan_id"),
         nullable=False,
@@ -218,50 +325,50 @@ class UserSubscription(Base):
     )
     
     # Subscription details
-    status = Column(
-        String(20),
+    status: Mapped[str] = mapped_column(
+        SUBSCRIPTION_STATUS,
         default="active",
         nullable=False,
         comment="Subscription status (active, cancelled, expired, suspended)"
     )
     
-    billing_cycle = Column(
-        String(10),
+    billing_cycle: Mapped[str] = mapped_column(
+        BILLING_CYCLE,
         default="monthly",
         nullable=False,
         comment="Billing cycle (monthly, yearly)"
     )
     
     # Pricing
-    amount = Column(
-        DECIMAL(10, 2),
+    amount: Mapped[int] = mapped_column(
+        BigInteger,
         nullable=False,
-        comment="Subscription amount"
+        comment="Subscription amount in the currency's minor unit"
     )
     
-    currency = Column(
-        String(3),
-        default="USD",
+    currency: Mapped[int] = mapped_column(
+        SmallInteger,
+        default=DEFAULT_CURRENCY,
         nullable=False,
-        comment="Currency code (USD, EUR, etc.)"
+        comment="ISO 4217 numeric currency code (840 = USD, 978 = EUR, etc.)"
     )
     
     # Usage tracking
-    queries_used_current_period = Column(
+    queries_used_current_period: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="Queries used in current billing period"
     )
     
-    storage_used_mb = Column(
+    storage_used_mb: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="Storage used in MB"
     )
     
-    team_members_count = Column(
+    team_members_count: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
@@ -269,45 +376,45 @@ class UserSubscription(Base):
     )
     
     # Period tracking
-    current_period_start = Column(
+    current_period_start: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="Start of current billing period"
     )
     
-    current_period_end = Column(
+    current_period_end: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="End of current billing period"
     )
     
     # Billing dates
-    next_billing_date = Column(
+    next_billing_date: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="Next billing date"
     )
     
-    trial_end = Column(
+    trial_end: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="Trial period end date"
     )
     
     # Cancellation tracking
-    cancelled_at = Column(
+    cancelled_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When subscription was cancelled"
     )
     
-    cancellation_reason = Column(
+    cancellation_reason: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="Reason for cancellation"
     )
     
-    cancel_at_period_end = Column(
+    cancel_at_period_end: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
@@ -315,38 +422,42 @@ class UserSubscription(Base):
     )
     
     # External billing
-    external_subscription_id = Column(
-        String(255),
+    external_subscription_id: Mapped[Optional[str]] = mapped_column(
+        String(64),
         nullable=True,
         comment="External billing system subscription ID"
     )
     
-    external_customer_id = Column(
-        String(255),
+    external_customer_id: Mapped[Optional[str]] = mapped_column(
+        String(64),
         nullable=True,
         comment="External billing system customer ID"
     )
     
     # Time tracking
-    created_at = Column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When subscription was created"
     )
     
-    updated_at = Column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        server_default=utc_now,
+        onupdate=utc_now,
         nullable=False,
         comment="When subscription was last updated"
     )
     
     # Relationships
-    plan = relationship("SubscriptionPlan", back_populates="subscriptions")
-    usage_logs = relationship("SubscriptionUsageLog", back_populates="subscription")
-    invoices = relationship("SubscriptionInvoice", back_populates="subscription")
+    # plan_id is NOT NULL, so the plan is joined inline on every load; to_dict,
+    # can_perform_query and the usage properties all read it
+    plan: Mapped["SubscriptionPlan"] = relationship(
+        "SubscriptionPlan", back_populates="subscriptions", lazy="joined", innerjoin=True
+    )
+    usage_logs: Mapped[List["SubscriptionUsageLog"]] = relationship("SubscriptionUsageLog", back_populates="subscription")
+    invoices: Mapped[List["SubscriptionInvoice"]] = relationship("SubscriptionInvoice", back_populates="subscription")
     
     def __repr__(self) -> str:
         """String representation of the subscription."""
@@ -360,56 +471,77 @@ class UserSubscription(Base):
     @property
     def is_trial(self) -> bool:
         """Check if subscription is in trial period."""
-        return (self.trial_end and 
-                datetime.utcnow() < self.trial_end and 
-                not self.cancelled_at)
+        trial_end = self.trial_end
+        if not trial_end or self.cancelled_at:
+            return False
+        return time.time() < _utc_ts(trial_end)
     
     @property
     def is_expired(self) -> bool:
         """Check if subscription has expired."""
-        return datetime.utcnow() > self.current_period_end
+        return self._snapshot(time.time())[1]
     
     @property
     def days_until_expiry(self) -> int:
         """Get days until subscription expires."""
-        if self.is_expired:
-            return 0
-        return (self.current_period_end - datetime.utcnow()).days
+        return self._snapshot(time.time())[2]
     
     @property
     def days_until_billing(self) -> int:
         """Get days until next billing."""
-        if not self.next_billing_date:
-            return 0
-        return (self.next_billing_date - datetime.utcnow()).days
+        return self._snapshot(time.time())[3]
+    
+    def _snapshot(self, now_ts: float) -> Tuple[bool, bool, int, int]:
+        """Get (is_trial, is_expired, days_until_expiry, days_until_billing) as of ``now_ts``."""
+        trial_end = self.trial_end
+        next_billing = self.next_billing_date
+        expiry_seconds = _utc_ts(self.current_period_end) - now_ts
+        # Cheap null checks first; the timestamp conversion only runs for live trials
+        is_trial = bool(trial_end) and not self.cancelled_at and now_ts < _utc_ts(trial_end)
+        expired = expiry_seconds < 0
+        days_until_expiry = 0 if expired else int(expiry_seconds // SECONDS_PER_DAY)
+        days_until_billing = (
+            int((_utc_ts(next_billing) - now_ts) // SECONDS_PER_DAY) if next_billing else 0
+        )
+        return is_trial, expired, days_until_expiry, days_until_billing
+    
+    @property
+    def _limits_plan(self) -> SubscriptionPlan:
+        """Get the plan for limit checks without lazy-loading it when cached."""
+        plan = self.__dict__.get("plan")
+        if plan is None:
+            from models.plan_cache import get_plan
+            plan = get_plan(self.plan_id) or self.plan
+        return plan
     
     @property
     def usage_percentage(self) -> float:
         """Get percentage of monthly usage used."""
-        if self.plan.queries_per_month == 0:
+        queries_per_month = self._limits_plan.queries_per_month
+        if queries_per_month == 0:
             return 0
-        return (self.queries_used_current_period / self.plan.queries_per_month) * 100
+        return (self.queries_used_current_period / queries_per_month) * 100
     
     @property
     def storage_percentage(self) -> float:
         """Get percentage of storage used."""
-        storage_gb_mb = self.plan.storage_gb * 1024  # Convert GB to MB
+        storage_gb_mb = self._limits_plan.storage_gb * 1024  # Convert GB to MB
         if storage_gb_mb == 0:
             return 0
         return (self.storage_used_mb / storage_gb_mb) * 100
     
-    def can_perform_query(self) -> bool:
+    def can_perform_query(self, now: Optional[datetime] = None) -> bool:
         """Check if user can perform another query."""
         # Check if subscription is active
         if not self.is_active:
             return False
         
         # Check if in trial
-        if self.is_trial:
+        if self._snapshot(_utc_ts(now) if now else time.time())[0]:
             return True
         
         # Check query limits
-        if self.queries_used_current_period >= self.plan.queries_per_month:
+        if self.queries_used_current_period >= self._limits_plan.queries_per_month:
             return False
         
         return True
@@ -433,6 +565,32 @@ class UserSubscription(Base):
         # Update next billing date
         self.next_billing_date = self.current_period_end
     
+    @classmethod
+    def bulk_reset_expired(cls, session, now: Optional[datetime] = None) -> int:
+        """Roll every lapsed active subscription into a new period with one UPDATE.
+        
+        Same effect as ``reset_usage_counters`` on each row, computed in SQL.
+        Returns the number of subscriptions reset.
+        """
+        now = now or datetime.utcnow()
+        period_end = case(
+            (cls.billing_cycle == "monthly", now + timedelta(days=30)),
+            else_=now + timedelta(days=365),
+        )
+        result = session.execute(
+            update(cls)
+            .where(cls.status == "active", cls.current_period_end < now)
+            .values(
+                queries_used_current_period=0,
+                storage_used_mb=0,
+                current_period_start=now,
+                current_period_end=period_end,
+                next_billing_date=period_end,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
     def cancel(self, reason: str = "", at_period_end: bool = True):
         """Cancel the subscription."""
         self.cancelled_at = datetime.utcnow()
@@ -451,46 +609,121 @@ class UserSubscription(Base):
         self.cancellation_reason = None
         self.cancel_at_period_end = False
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert subscription to dictionary."""
+    @classmethod
+    def list_for_user(cls, session, user_id: UUID) -> List["UserSubscription"]:
+        """Load a user's subscriptions with their plans in one extra query."""
+        return session.execute(
+            select(cls)
+            .where(cls.user_id == user_id)
+            .options(selectinload(cls.plan))
+            .order_by(cls.created_at.desc())
+        ).scalars().all()
+    
+    @classmethod
+    def serialize_many(
+        cls,
+        session,
+        subscriptions: Iterable["UserSubscription"],
+        now: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Convert many subscriptions to dictionaries in one pass.
+        
+        Plans already loaded or in the plan cache are reused; the rest are
+        fetched with a single query, and each plan is serialized once.
+        """
+        from models.plan_cache import get_plan
+        
+        subscriptions = list(subscriptions)
+        now_ts = _utc_ts(now) if now else time.time()
+        plans: Dict[UUID, SubscriptionPlan] = {}
+        for subscription in subscriptions:
+            plan_id = subscription.plan_id
+            if plan_id not in plans:
+                plan = subscription.__dict__.get("plan") or get_plan(plan_id)
+                if plan is not None:
+                    plans[plan_id] = plan
+        
+        missing = {subscription.plan_id for subscription in subscriptions} - plans.keys()
+        if missing:
+            plans.update(
+                (plan.plan_id, plan)
+                for plan in session.execute(
+                    select(SubscriptionPlan).where(SubscriptionPlan.plan_id.in_(missing))
+                ).scalars()
+            )
+        
+        plan_dicts = {plan_id: plan.to_dict() for plan_id, plan in plans.items()}
+        return [
+            subscription._to_dict_fast(
+                now_ts, plans.get(subscription.plan_id), plan_dicts.get(subscription.plan_id)
+            )
+            for subscription in subscriptions
+        ]
+    
+    def to_dict(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Convert subscription to dictionary.
+        
+        Pass one ``now`` when serializing many subscriptions so the clock is
+        read once for the whole batch rather than per property per row.
+        UUIDs and datetimes are returned as-is for orjson to encode.
+        """
+        plan = self.plan
+        return self._to_dict_fast(
+            _utc_ts(now) if now else time.time(), plan, plan.to_dict() if plan else None
+        )
+    
+    def _to_dict_fast(
+        self,
+        now_ts: float,
+        plan: Optional[SubscriptionPlan],
+        plan_dict: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Build the dictionary from a known clock reading and serialized plan."""
+        is_trial, is_expired, days_until_expiry, days_until_billing = self._snapshot(now_ts)
+        queries_per_month = plan.queries_per_month if plan else 0
+        storage_mb = plan.storage_gb * 1024 if plan else 0
         return {
-            "subscription_id": str(self.subscription_id),
-            "user_id": str(self.user_id),
-            "plan": self.plan.to_dict() if self.plan else None,
+            "subscription_id": self.subscription_id,
+            "user_id": self.user_id,
+            "plan": plan_dict,
             "status": self.status,
             "billing_cycle": self.billing_cycle,
-            "amount": float(self.amount),
-            "currency": self.currency,
+            "amount": self.to_major_units(self.amount),
+            "currency": self.currency_code,
             "queries_used_current_period": self.queries_used_current_period,
             "storage_used_mb": self.storage_used_mb,
             "team_members_count": self.team_members_count,
-            "current_period_start": self.current_period_start.isoformat(),
-            "current_period_end": self.current_period_end.isoformat(),
-            "next_billing_date": (
-                self.next_billing_date.isoformat() 
-                if self.next_billing_date else None
+            "current_period_start": self.current_period_start,
+            "current_period_end": self.current_period_end,
+            "next_billing_date": self.next_billing_date,
+            "trial_end": self.trial_end,
+            "is_active": self.is_active,
+            "is_trial": is_trial,
+            "is_expired": is_expired,
+            "days_until_expiry": days_until_expiry,
+            "days_until_billing": days_until_billing,
+            "usage_percentage": (
+                round(self.queries_used_current_period / queries_per_month * 100, 1)
+                if queries_per_month else 0
             ),
-            "trial_end": (
-                self.trial_end.isoformat() 
-                if self.trial_end else None
+            "storage_percentage": (
+                round(self.storage_used_mb / storage_mb * 100, 1) if storage_mb else 0
             ),
-            "is_active": self.is_active,
-            "is_trial": self.is_trial,
-            "is_expired": self.is_expired,
-            "days_until_expiry": self.days_until_expiry,
-            "days_until_billing": self.days_until_billing,
-            "usage_percentage": round(self.usage_percentage, 1),
-            "storage_percentage": round(self.storage_percentage, 1),
         }
+    
+    def to_json_bytes(self, now: Optional[datetime] = None) -> bytes:
+        """Serialize the subscription straight to JSON."""
+        return orjson.dumps(self.to_dict(now))
 
 
 class SubscriptionUsageLog(Base):
     """Daily usage tracking for subscriptions."""
     
     __tablename__ = "subscription_usage_logs"
+    __mapper_args__ = EAGER_DEFAULTS_MAPPER_ARGS
     
     # Primary identity
-    log_id = Column(
+    log_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
@@ -500,44 +733,43 @@ class SubscriptionUsageLog(Base):
     )
     
     # Relationships
-    subscription_id = Column(
+    subscription_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         ForeignKey("user_subscriptions.subscription_id"),
         nullable=False,
-        index=True,
         comment="Subscription this log belongs to"
     )
     
     # Date tracking
-    log_date = Column(
+    log_date: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="Date for this usage log"
     )
     
     # Usage data
-    queries_used = Column(
+    queries_used: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="Queries used on this date"
     )
     
-    storage_used_mb = Column(
+    storage_used_mb: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="Storage used on this date (MB)"
     )
     
-    api_calls = Column(
+    api_calls: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="API calls made on this date"
     )
     
-    exports_count = Column(
+    exports_count: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
@@ -545,23 +777,23 @@ class SubscriptionUsageLog(Base):
     )
     
     # Time tracking
-    created_at = Column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When log was created"
     )
     
-    updated_at = Column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        server_default=utc_now,
+        onupdate=utc_now,
         nullable=False,
         comment="When log was last updated"
     )
     
     # Relationships
-    subscription = relationship("UserSubscription", back_populates="usage_logs")
+    subscription: Mapped["UserSubscription"] = relationship("UserSubscription", back_populates="usage_logs")
     
     def __repr__(self) -> str:
         """String representation of the usage log."""
@@ -582,13 +814,13 @@ class SubscriptionUsageLog(Base):
         }
 
 
-class SubscriptionInvoice(Base):
+class SubscriptionInvoice(CurrencyMixin, Base):
     """Invoice tracking for subscriptions."""
     
     __tablename__ = "subscription_invoices"
     
     # Primary identity
-    invoice_id = Column(
+    invoice_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
@@ -598,7 +830,7 @@ class SubscriptionInvoice(Base):
     )
     
     # Relationships
-    subscription_id = Column(
+    subscription_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         ForeignKey("user_subscriptions.subscription_id"),
         nullable=False,
@@ -607,84 +839,98 @@ class SubscriptionInvoice(Base):
     )
     
     # Invoice details
-    invoice_number = Column(
+    invoice_number: Mapped[str] = mapped_column(
         String(50),
         unique=True,
         nullable=False,
         comment="Human-readable invoice number"
     )
     
-    status = Column(
+    status: Mapped[str] = mapped_column(
         String(20),
         default="draft",
         nullable=False,
         comment="Invoice status (draft, sent, paid, failed, refunded)"
     )
     
-    amount_due = Column(
-        DECIMAL(10, 2),
+    amount_due: Mapped[int] = mapped_column(
+        BigInteger,
         nullable=False,
-        comment="Amount due"
+        comment="Amount due in the currency's minor unit"
     )
     
-    amount_paid = Column(
-        DECIMAL(10, 2),
+    amount_paid: Mapped[int] = mapped_column(
+        BigInteger,
         default=0,
         nullable=False,
-        comment="Amount paid"
+        comment="Amount paid in the currency's minor unit"
     )
     
-    currency = Column(
-        String(3),
-        default="USD",
+    currency: Mapped[int] = mapped_column(
+        SmallInteger,
+        default=DEFAULT_CURRENCY,
         nullable=False,
-        comment="Currency code"
+        comment="ISO 4217 numeric currency code"
     )
     
     # Billing period
-    period_start = Column(
+    period_start: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="Start of billing period"
     )
     
-    period_end = Column(
+    period_end: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="End of billing period"
     )
     
     # Due dates
-    due_date = Column(
+    due_date: Mapped[datetime] = mapped_column(
         DateTime,
         nullable=False,
         comment="Payment due date"
     )
     
-    paid_at = Column(
+    paid_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When invoice was paid"
     )
     
     # External references
-    external_invoice_id = Column(
-        String(255),
+    external_invoice_id: Mapped[Optional[str]] = mapped_column(
+        String(64),
         nullable=True,
         comment="External billing system invoice ID"
     )
     
-    external_payment_intent_id = Column(
-        String(255),
+    external_payment_intent_id: Mapped[Optional[str]] = mapped_column(
+        String(64),
         nullable=True,
         comment="External payment intent ID"
     )
     
     # Line items
-    line_items = Column(
-        Text,
+    line_items: Mapped[Optional[Any]] = mapped_column(
+        JSONB,
         nullable=True,
-        comment="JSON string of line items"
+        comment="Invoice line items"
     )
     
     # Time
+
+
+# Database indexes for billing lookups; the leading columns of the composite
+# indexes also serve plain user_id and subscription_id lookups
+Index("idx_user_subs_user_status", UserSubscription.user_id, UserSubscription.status)
+Index("idx_user_subs_status_period_end", UserSubscription.status, UserSubscription.current_period_end)
+Index(
+    "idx_user_subs_next_billing",
+    UserSubscription.next_billing_date,
+    UserSubscription.status,
+    postgresql_where=UserSubscription.next_billing_date.isnot(None),
+)
+Index("idx_usage_log_sub_date", SubscriptionUsageLog.subscription_id, SubscriptionUsageLog.log_date)
+Index("idx_invoice_line_items_gin", SubscriptionInvoice.line_items, postgresql_using="gin")
@@ -1,23 +1,49 @@
 """User model for Ariadne authentication and profile management."""
 
-from datetime import datetime
-from typing import Optional
+import time
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Mapping, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, Text, Index
+import orjson
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, Index, case, func, or_, select, update
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
-Base = declarative_base()
+from models.base import EAGER_DEFAULTS_MAPPER_ARGS, SECONDS_PER_DAY, utc_now
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+def _days_since(value: datetime, now_ts: Optional[float] = None) -> int:
+    """Whole days elapsed since a naive UTC datetime, like ``timedelta.days``."""
+    elapsed = (now_ts or time.time()) - value.replace(tzinfo=timezone.utc).timestamp()
+    return int(elapsed // SECONDS_PER_DAY)
+
+
+# Daily query allowance per subscription tier; unknown tiers get the
+# anonymous allowance
+_ANONYMOUS_DAILY_LIMIT = 3
+_DAILY_LIMITS: Mapping[str, int] = MappingProxyType({
+    "anonymous": _ANONYMOUS_DAILY_LIMIT,
+    "explorer": 10,
+    "researcher": 100,
+    "team_member": 200,
+    "team_admin": 200,
+})
 
 
 class User(Base):
     """User model for authentication and profile data."""
     
     __tablename__ = "users"
+    __mapper_args__ = EAGER_DEFAULTS_MAPPER_ARGS
     
     # Primary identity
-    user_id = Column(
+    user_id: Mapped[UUID] = mapped_column(
         PostgresUUID(as_uuid=True),
         primary_key=True,
         default=uuid4,
@@ -27,7 +53,7 @@ class User(Base):
     )
     
     # Authentication data
-    email = Column(
+    email: Mapped[str] = mapped_column(
         String(255),
         unique=True,
         nullable=False,
@@ -35,7 +61,7 @@ class User(Base):
         comment="User email address (used for login)"
     )
     
-    email_verified = Column(
+    email_verified: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
@@ -43,20 +69,20 @@ class User(Base):
     )
     
     # Profile data
-    full_name = Column(
+    full_name: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="User's full name"
     )
     
-    profile_picture_url = Column(
+    profile_picture_url: Mapped[Optional[str]] = mapped_column(
         Text,
         nullable=True,
         comment="URL to user's profile picture"
     )
     
     # Research preferences
-    persona = Column(
+    persona: Mapped[str] = mapped_column(
         String(50),
         default="academic",
         nullable=False,
@@ -64,41 +90,41 @@ class User(Base):
     )
     
     # Subscription and access control
-    subscription_tier = Column(
+    subscription_tier: Mapped[str] = mapped_column(
         String(50),
         default="explorer",
         nullable=False,
         comment="User's subscription tier (anonymous, explorer, researcher, team)"
     )
     
-    subscription_status = Column(
+    subscription_status: Mapped[str] = mapped_column(
         String(20),
         default="active",
         nullable=False,
         comment="Subscription status (active, inactive, cancelled, suspended)"
     )
     
-    subscription_expires_at = Column(
+    subscription_expires_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When subscription expires (for time-limited plans)"
     )
     
     # Usage tracking
-    queries_used_today = Column(
+    queries_used_today: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="Number of queries used today"
     )
     
-    last_query_at = Column(
+    last_query_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When user last performed a query"
     )
     
-    total_queries = Column(
+    total_queries: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
@@ -106,69 +132,69 @@ class User(Base):
     )
     
     # Knowledge graph tracking
-    tapestries_created = Column(
+    tapestries_created: Mapped[int] = mapped_column(
         Integer,
         default=0,
         nullable=False,
         comment="Number of Tapestries created"
     )
     
-    last_activity_at = Column(
+    last_activity_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="Last user activity timestamp"
     )
     
     # Time tracking
-    created_at = Column(
+    created_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
+        server_default=utc_now,
         nullable=False,
         comment="When user account was created"
     )
     
-    updated_at = Column(
+    updated_at: Mapped[datetime] = mapped_column(
         DateTime,
-        default=datetime.utcnow,
-        onupdate=datetime.utcnow,
+        server_default=utc_now,
+        onupdate=utc_now,
         nullable=False,
         comment="When user profile was last updated"
     )
     
-    last_login_at = Column(
+    last_login_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When user last logged in"
     )
     
     # Data export and deletion
-    data_export_requested_at = Column(
+    data_export_requested_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When user requested data export"
     )
     
-    deletion_requested_at = Column(
+    deletion_requested_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When user requested account deletion"
     )
     
-    deletion_scheduled_for = Column(
+    deletion_scheduled_for: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When account deletion is scheduled (GDPR compliance)"
     )
     
     # Privacy and preferences
-    analytics_consent = Column(
+    analytics_consent: Mapped[bool] = mapped_column(
         Boolean,
         default=True,
         nullable=False,
         comment="User consent for analytics tracking"
     )
     
-    marketing_consent = Column(
+    marketing_consent: Mapped[bool] = mapped_column(
         Boolean,
         default=False,
         nullable=False,
@@ -176,51 +202,51 @@ class User(Base):
     )
     
     # Additional profile fields
-    bio = Column(
+    bio: Mapped[Optional[str]] = mapped_column(
         Text,
         nullable=True,
         comment="User's bio or description"
     )
     
-    organization = Column(
+    organization: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="User's organization or institution"
     )
     
-    location = Column(
+    location: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="User's location"
     )
     
-    website = Column(
+    website: Mapped[Optional[str]] = mapped_column(
         String(255),
         nullable=True,
         comment="User's personal or professional website"
     )
     
     # API access for team users
-    api_key_hash = Column(
-        String(255),
+    api_key_hash: Mapped[Optional[str]] = mapped_column(
+        String(64),
         nullable=True,
-        comment="Hashed API key for programmatic access"
+        comment="Hex SHA-256 of the API key for programmatic access"
     )
     
-    api_key_created_at = Column(
+    api_key_created_at: Mapped[Optional[datetime]] = mapped_column(
         DateTime,
         nullable=True,
         comment="When API key was created"
     )
     
     # Team management
-    team_id = Column(
+    team_id: Mapped[Optional[UUID]] = mapped_column(
         PostgresUUID(as_uuid=True),
         nullable=True,
         comment="ID of team user belongs to"
     )
     
-    team_role = Column(
+    team_role: Mapped[Optional[str]] = mapped_column(
         String(50),
         nullable=True,
         comment="User's role within their team (member, admin, owner)"
@@ -255,34 +281,25 @@ class User(Base):
         """Check if user has API access."""
         return bool(self.api_key_hash)
     
-    def can_perform_query(self) -> bool:
+    def can_perform_query(self, now: Optional[datetime] = None) -> bool:
         """Check if user can perform another query."""
         # Check subscription status
         if not self.is_active:
             return False
         
         # Check if subscription expired
-        if (self.subscription_expires_at and 
-            self.subscription_expires_at < datetime.utcnow()):
+        expires_at = self.subscription_expires_at
+        if expires_at and expires_at < (now or datetime.utcnow()):
             return False
         
         # Check daily query limits
-        if self.subscription_tier == "anonymous":
-            # Anonymous users have very limited queries
-            return self.queries_used_today < 3
-        elif self.subscription_tier == "explorer":
-            return self.queries_used_today < 10
-        elif self.subscription_tier == "researcher":
-            return self.queries_used_today < 100
-        elif self.subscription_tier in ["team_member", "team_admin"]:
-            return self.queries_used_today < 200
-        
-        # Default to anonymous limits
-        return self.queries_used_today < 3
+        return self.queries_used_today < _DAILY_LIMITS.get(
+            self.subscription_tier, _ANONYMOUS_DAILY_LIMIT
+        )
     
-    def increment_query_count(self):
+    def increment_query_count(self, now: Optional[datetime] = None):
         """Increment query usage count."""
-        now = datetime.utcnow()
+        now = now or datetime.utcnow()
         
         # Reset daily count if it's a new day
         if (not self.last_query_at or 
@@ -295,42 +312,87 @@ class User(Base):
         self.total_queries += 1
         self.last_activity_at = now
     
-    def can_export_data(self) -> bool:
+    @classmethod
+    def check_query_allowed(cls, session, user_id: UUID) -> bool:
+        """Check ``can_perform_query`` for a stored user in a single SQL lookup.
+        
+        The daily limit comes from the subscription plan named after the
+        user's tier, so limits can change without a deploy; tiers without a
+        plan row fall back to the built-in table.
+        """
+        from models.subscription import SubscriptionPlan
+        
+        daily_limit = func.coalesce(
+            SubscriptionPlan.queries_per_day,
+            case(dict(_DAILY_LIMITS), value=cls.subscription_tier, else_=_ANONYMOUS_DAILY_LIMIT),
+        )
+        allowed = session.execute(
+            select(cls.queries_used_today < daily_limit)
+            .select_from(cls)
+            .outerjoin(SubscriptionPlan, SubscriptionPlan.plan_name == cls.subscription_tier)
+            .where(
+                cls.user_id == user_id,
+                cls.subscription_status == "active",
+                or_(
+                    cls.subscription_expires_at.is_(None),
+                    cls.subscription_expires_at > utc_now,
+                ),
+            )
+        ).scalar_one_or_none()
+        return bool(allowed)
+    
+    @classmethod
+    def record_query(cls, session, user_id: UUID) -> Optional[int]:
+        """Count a query atomically in one UPDATE, rolling the daily count over in SQL.
+        
+        Returns the user's new daily count, or None if the user does not exist.
+        """
+        return session.execute(
+            update(cls)
+            .where(cls.user_id == user_id)
+            .values(
+                queries_used_today=case(
+                    (func.date(cls.last_query_at) == func.date(utc_now), cls.queries_used_today + 1),
+                    else_=1,
+                ),
+                total_queries=cls.total_queries + 1,
+                last_query_at=utc_now,
+                last_activity_at=utc_now,
+            )
+            .returning(cls.queries_used_today)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+    
+    def can_export_data(self, now_ts: Optional[float] = None) -> bool:
         """Check if user can request data export."""
         # Can export if no export is currently pending
         # Export requests are valid for 30 days
         if self.data_export_requested_at:
-            days_since_request = (
-                datetime.utcnow() - self.data_export_requested_at
-            ).days
-            return days_since_request > 30
+            return _days_since(self.data_export_requested_at, now_ts) > 30
         return True
     
-    def can_delete_account(self) -> bool:
+    def can_delete_account(self, now_ts: Optional[float] = None) -> bool:
         """Check if user can request account deletion."""
         # Can delete if no deletion is currently pending
         # Deletion is scheduled after 30-day grace period
         if self.deletion_requested_at:
-            days_since_request = (
-                datetime.utcnow() - self.deletion_requested_at
-            ).days
-            return days_since_request > 30
+            return _days_since(self.deletion_requested_at, now_ts) > 30
         return True
     
     def to_dict(self) -> dict:
-        """Convert user to dictionary (excluding sensitive data)."""
+        """Convert user to dictionary (excluding sensitive data).
+        
+        UUIDs and datetimes are returned as-is for orjson to encode.
+        """
         return {
-            "user_id": str(self.user_id),
+            "user_id": self.user_id,
             "email": self.email,
             "email_verified": self.email_verified,
             "full_name": self.full_name,
             "persona": self.persona,
             "subscription_tier": self.subscription_tier,
             "subscription_status": self.subscription_status,
-            "subscription_expires_at": (
-                self.subscription_expires_at.isoformat() 
-                if self.subscription_expires_at else None
-            ),
+            "subscription_expires_at": self.subscription_expires_at,
             "tapestries_created": self.tapestries_created,
             "total_queries": self.total_queries,
             "has_api_access": self.has_api_access,
@@ -340,13 +402,14 @@ class User(Base):
             "organization": self.organization,
             "location": self.location,
             "website": self.website,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-            "last_login_at": (
-                self.last_login_at.isoformat() 
-                if self.last_login_at else None
-            ),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "last_login_at": self.last_login_at,
         }
+    
+    def to_json_bytes(self) -> bytes:
+        """Serialize the user straight to JSON."""
+        return orjson.dumps(self.to_dict())
 
 
 # Database indexes for performance
@@ -356,3 +419,14 @@ Index("idx_users_created_at", User.created_at)
 Index("idx_users_last_activity", User.last_activity_at)
 Index("idx_users_team_id", User.team_id)
 Index("idx_users_api_key", User.api_key_hash)
+Index(
+    "idx_users_active_expiry",
+    User.subscription_expires_at,
+    postgresql_where=(User.subscription_status == "active")
+    & User.subscription_expires_at.isnot(None),
+)
+Index(
+    "idx_users_deletion_scheduled",
+    User.deletion_scheduled_for,
+    postgresql_where=User.deletion_scheduled_for.isnot(None),
+)
@@ -1,12 +1,48 @@
 """Document ingestion tool plugin."""
 
 import logging
-from typing import List, Dict, Any, Optional
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 
 from core.interfaces import ToolInterface, ToolInput, ToolOutput
+from core.registry import get_registry
 
 logger = logging.getLogger(__name__)
 
+# Default flush thresholds for buffered ingestion
+INGEST_BUFFER_MAX_BYTES = 1 << 20
+INGEST_BUFFER_MAX_ITEMS = 256
+
+
+class _IngestionBuffer:
+    """Accumulates documents and hands them to the tool in batches."""
+    
+    def __init__(self, tool: "DocumentIngestionTool", max_bytes: int, max_items: int):
+        self._tool = tool
+        self._max_bytes = max_bytes
+        self._max_items = max_items
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._pending_bytes = 0
+        self.results: List[Dict[str, Any]] = []
+    
+    async def try_ingest(self, file_path: str, metadata: Dict[str, Any]):
+        """Queue a document, flushing once either threshold is reached."""
+        self._pending.append((file_path, metadata))
+        try:
+            self._pending_bytes += os.path.getsize(file_path)
+        except OSError:
+            pass
+        if len(self._pending) >= self._max_items or self._pending_bytes >= self._max_bytes:
+            await self.flush()
+    
+    async def flush(self):
+        """Ingest everything queued so far in one batch."""
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        self.results.extend(await self._tool._flush(batch))
+
 
 class DocumentIngestionTool(ToolInterface):
     """Document ingestion tool plugin."""
@@ -34,12 +70,12 @@ class DocumentIngestionTool(ToolInterface):
     async def execute(self, tool_input: ToolInput) -> ToolOutput:
         """Ingest a document."""
         # TODO: Implement document processing
-        logger.info(f"Ingesting document: {tool_input.query}")
+        logger.info("Ingesting document: %s", tool_input.query)
         
-        return ToolOutput(
-            success=True,
-            data={"document_id": "doc_123", "status": "ingested"},
-            metadata={"tool": "document_ingestion", "status": "not_implemented"}
+        return ToolOutput.ok(
+            {"document_id": "doc_123", "status": "ingested"},
+            tool="document_ingestion",
+            status="not_implemented"
         )
     
     async def validate_input(self, tool_input: ToolInput) -> bool:
@@ -48,18 +84,40 @@ class DocumentIngestionTool(ToolInterface):
     
     async def ingest_document(self, file_path: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Ingest a document (legacy method)."""
-        # TODO: Implement document processing
-        logger.info(f"Ingesting document: {file_path}")
-        return {
-            "document_id": "doc_123",
-            "status": "ingested",
-            "metadata": metadata
-        }
+        return (await self._flush([(file_path, metadata)]))[0]
+    
+    @asynccontextmanager
+    async def buffered_ingestion(
+        self,
+        max_bytes: int = INGEST_BUFFER_MAX_BYTES,
+        max_items: int = INGEST_BUFFER_MAX_ITEMS,
+    ) -> AsyncIterator[_IngestionBuffer]:
+        """Ingest many documents in batches; anything still queued is flushed on exit.
+        
+        Per-document results accumulate on the yielded buffer's ``results``.
+        """
+        buffer = _IngestionBuffer(self, max_bytes, max_items)
+        yield buffer
+        await buffer.flush()
+    
+    async def _flush(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Ingest a batch of documents with one write to storage."""
+        # TODO: Implement document processing as one batched upsert
+        logger.info("Ingesting %d documents", len(batch))
+        get_registry().notify_documents_ingested(metadata.get("user_id") for _, metadata in batch)
+        return [
+            {
+                "document_id": "doc_123",
+                "status": "ingested",
+                "metadata": metadata
+            }
+            for _, metadata in batch
+        ]
     
     async def extract_text(self, file_path: str) -> str:
         """Extract text from a document."""
         # TODO: Implement text extraction for various formats
-        logger.info(f"Extracting text from: {file_path}")
+        logger.info("Extracting text from: %s", file_path)
         return "Extracted text content"
     
     async def summarize_document(self, content: str, max_length: int = 200) -> str:
@@ -3,6 +3,7 @@
 import logging
 from typing import List, Dict, Any
 
+from core.http_client import get_http_client
 from core.interfaces import ToolInterface, ToolInput, ToolOutput
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,11 @@ class WebSearchTool(ToolInterface):
         """Initialize web search tool."""
         logger.info("WebSearchTool initialized")
     
+    @property
+    def client(self):
+        """Shared pooled HTTP client; use it for every outbound request."""
+        return get_http_client()
+    
     @property
     def name(self) -> str:
         return "web_search"
@@ -34,13 +40,13 @@ class WebSearchTool(ToolInterface):
     async def execute(self, tool_input: ToolInput) -> ToolOutput:
         """Perform web search."""
         # TODO: Implement actual web search (e.g., Google, Bing API)
-        logger.info(f"Searching web for: {tool_input.query}")
+        logger.info("Searching web for: %s", tool_input.query)
         
         # Mock response for now
-        return ToolOutput(
-            success=True,
-            data={"results": [], "query": tool_input.query},
-            metadata={"tool": "web_search", "status": "not_implemented"}
+        return ToolOutput.ok(
+            {"results": [], "query": tool_input.query},
+            tool="web_search",
+            status="not_implemented"
         )
     
     async def validate_input(self, tool_input: ToolInput) -> bool:
@@ -50,13 +56,14 @@ class WebSearchTool(ToolInterface):
     async def search(self, query: str, num_results: int = 10) -> List[Dict[str, Any]]:
         """Perform web search (legacy method)."""
         # TODO: Implement actual web search (e.g., Google, Bing API)
-        logger.info(f"Searching web for: {query}")
+        # with ``await self.client.get(...)``
+        logger.info("Searching web for: %s", query)
         return []
     
     async def get_page_content(self, url: str) -> Dict[str, Any]:
         """Get content from a webpage."""
-        # TODO: Implement web scraping
-        logger.info(f"Getting content from: {url}")
+        # TODO: Implement web scraping with ``await self.client.get(url)``
+        logger.info("Getting content from: %s", url)
         return {"url": url, "content": "", "status": "not_implemented"}
     
     async def extract_keywords(self, text: str) -> List[str]:
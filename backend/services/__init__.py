@@ -1 +1,43 @@
-# Services package
+"""Process-wide service instances.
+
+Each factory builds its service once, so Redis clients, HTTP pools and
+in-memory state are shared by every caller. Imports are deferred to keep
+service modules free to import these factories.
+"""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def get_user_service():
+    """Get the shared UserService."""
+    from services.user_service import UserService
+    return UserService()
+
+
+@lru_cache(maxsize=1)
+def get_auth_service():
+    """Get the shared AuthService."""
+    from services.auth_service import AuthService
+    return AuthService()
+
+
+@lru_cache(maxsize=1)
+def get_memory_service():
+    """Get the shared MemoryService."""
+    from services.memory_service import MemoryService
+    return MemoryService()
+
+
+@lru_cache(maxsize=1)
+def get_research_service():
+    """Get the shared ResearchService."""
+    from services.research_service import ResearchService
+    return ResearchService()
+
+
+@lru_cache(maxsize=1)
+def get_workflow_service():
+    """Get the shared WorkflowService."""
+    from services.workflow_service import WorkflowService
+    return WorkflowService()
@@ -1,14 +1,33 @@
 """Authentication service for user management."""
 
+import hashlib
+import hmac
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from typing import Optional, Dict, Any
 import uuid
 
+import jwt
+import orjson
+
+from auth.jwt_middleware import decode_token, encode_token, security_settings
+from core.database import cache_get_json, get_redis_client
 from models.user import User
 
 logger = logging.getLogger(__name__)
 
+# Verified tokens and authenticated users are cached in Redis. Token entries
+# never outlive the token itself; every key a user owns is tracked in a set so
+# invalidate_user can drop them together
+AUTH_USER_CACHE_TTL_SECONDS = 300
+_TOKEN_KEY_PREFIX = "authtok:"
+_USER_KEY_PREFIX = "authuser:"
+_USER_INDEX_PREFIX = "user_tokens:"
+
+# Tokens are signed with the SECURITY_* key and algorithm that JWTMiddleware verifies with
+ACCESS_TOKEN_TTL_SECONDS = 24 * 3600
+
 
 class AuthService:
     """Service for authentication and authorization."""
@@ -17,8 +36,48 @@ class AuthService:
         """Initialize authentication service."""
         logger.info("AuthService initialized")
     
+    async def _cache_set(self, key: str, value: Dict[str, Any], ttl: int, user_id: Optional[str]):
+        """Write a cached entry and index it under its user."""
+        redis = get_redis_client()
+        if redis is None:
+            return
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.setex(key, ttl, orjson.dumps(value))
+                if user_id:
+                    index_key = _USER_INDEX_PREFIX + user_id
+                    pipe.sadd(index_key, key)
+                    pipe.expire(index_key, max(ttl, AUTH_USER_CACHE_TTL_SECONDS))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Auth cache write failed: %s", e)
+    
+    async def invalidate_user(self, user_id: str):
+        """Drop every cached token and authentication result for a user."""
+        redis = get_redis_client()
+        if redis is None:
+            return
+        index_key = _USER_INDEX_PREFIX + user_id
+        try:
+            keys = await redis.smembers(index_key)
+            await redis.delete(index_key, *keys)
+        except Exception as e:
+            logger.warning("Auth cache invalidation failed for %s: %s", user_id, e)
+    
     async def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user with email and password."""
+        # Keyed on the email alone; the entry carries a server-keyed HMAC of the
+        # password, so a hit still has to present the same password
+        cache_key = verifier = None
+        if get_redis_client() is not None:
+            cache_key = _USER_KEY_PREFIX + hashlib.sha256(email.encode()).hexdigest()
+            verifier = hmac.new(
+                security_settings().secret_key.encode(), password.encode(), hashlib.sha256
+            ).hexdigest()
+            cached = await cache_get_json(cache_key)
+            if cached is not None and hmac.compare_digest(cached.get("verifier", ""), verifier):
+                return cached["user"]
+        
         # For development, return a mock user
         # In production, this would verify against database
         
@@ -34,10 +93,17 @@ class AuthService:
                 "created_at": datetime.utcnow().isoformat()
             }
             
-            logger.info(f"User authenticated: {email}")
+            logger.info("User authenticated: %s", email)
+            if cache_key is not None:
+                await self._cache_set(
+                    cache_key,
+                    {"user": user_data, "verifier": verifier},
+                    AUTH_USER_CACHE_TTL_SECONDS,
+                    user_data["user_id"],
+                )
             return user_data
         
-        logger.warning(f"Authentication failed for: {email}")
+        logger.warning("Authentication failed for: %s", email)
         return None
     
     async def create_user(self, email: str, password: str, full_name: str = None) -> Optional[Dict[str, Any]]:
@@ -56,7 +122,7 @@ class AuthService:
             "created_at": datetime.utcnow().isoformat()
         }
         
-        logger.info(f"User created: {email}")
+        logger.info("User created: %s", email)
         return user_data
     
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
@@ -80,7 +146,8 @@ class AuthService:
         # For development, return success
         # In production, this would update database
         
-        logger.info(f"User updated: {user_id}")
+        logger.info("User updated: %s", user_id)
+        await self.invalidate_user(user_id)
         return {
             "user_id": user_id,
             "updated": True,
@@ -89,42 +156,37 @@ class AuthService:
         }
     
     def generate_access_token(self, user_id: str) -> str:
-        """Generate access token for user."""
-        # For development, return mock token
-        # In production, this would create JWT token
-        
-        import base64
-        import json
-        
+        """Generate an access token for user, signed like JWTManager's tokens."""
+        now = int(time.time())
         token_data = {
-            "user_id": user_id,
-            "exp": datetime.utcnow() + timedelta(hours=24),
-            "iat": datetime.utcnow()
+            "sub": user_id,
+            "exp": now + ACCESS_TOKEN_TTL_SECONDS,
+            "iat": now,
+            "type": "access"
         }
-        
-        token_bytes = base64.b64encode(json.dumps(token_data).encode())
-        return f"mock_token_{token_bytes.decode()}"
+        return encode_token(token_data)
     
-    def verify_access_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify access token."""
-        # For development, parse mock token
-        # In production, this would verify JWT token
+    async def verify_access_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verify access token, consulting the Redis cache first."""
+        cache_key = _TOKEN_KEY_PREFIX + hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+        cached = await cache_get_json(cache_key)
+        if cached is not None:
+            return cached
         
+        token_data = self._decode_access_token(token)
+        if token_data is not None:
+            # Never keep a token cached past its own expiry
+            ttl = max(1, int(token_data["exp"] - time.time()))
+            await self._cache_set(cache_key, token_data, ttl, token_data.get("user_id"))
+        return token_data
+    
+    def _decode_access_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Decode and check an access token without consulting the cache."""
         try:
-            if token.startswith("mock_token_"):
-                token_data_b64 = token.replace("mock_token_", "")
-                token_bytes = base64.b64decode(token_data_b64.encode())
-                token_data = json.loads(token_bytes.decode())
-                
-                # Check expiration
-                exp = datetime.fromisoformat(token_data["exp"])
-                if datetime.utcnow() > exp:
-                    return None
-                
-                return token_data
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Token verification failed: {e}")
+            token_data = decode_token(token)
+        except (jwt.PyJWTError, RuntimeError) as e:
+            logger.error("Token verification failed: %s", e)
             return None
+        
+        token_data["user_id"] = token_data["sub"]
+        return token_data
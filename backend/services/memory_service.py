@@ -1,31 +1,129 @@
 """GraphRAG Memory service for intelligent context management."""
 
+import asyncio
+import heapq
 import logging
-from typing import Dict, Any, List, Optional
+import math
+import re
+import time
+from array import array
+from collections import Counter, defaultdict
+from itertools import count
+from operator import itemgetter, mul
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
-import json
+
+import orjson
+from cachetools import LRUCache, TTLCache
+
+from core.config import get_settings
+from core.database import cache_get_json, cache_set_json, get_neo4j_driver
 
 logger = logging.getLogger(__name__)
 
+# Common words left out of the term index and concept extraction
+_STOP_WORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by",
+    "is", "are", "was", "were", "be", "been", "have", "has", "had", "do", "does", "did",
+    "will", "would", "could", "should",
+})
+
+# Concept candidates are whitespace-separated words longer than three characters
+_CONCEPT_TOKEN_RE = re.compile(r"\S{4,}")
+MAX_CONCEPTS_PER_CONTEXT = 10
+
+# Term weights when scoring stored contexts against a query
+CONTENT_TERM_WEIGHT = 1
+QUERY_TERM_WEIGHT = 2
+
+# In-process memory is bounded. The least recently used contexts are dropped
+# from the graph and indexes past MEMORY_MAX_CONTEXTS and parked in Redis,
+# where get_context can still find them until the TTL runs out. Concepts no
+# remaining context mentions are dropped with them
+MEMORY_MAX_CONTEXTS = 100_000
+MEMORY_CONTEXT_TTL_SECONDS = 86400
+MEMORY_STATS_TTL_SECONDS = 5
+_CONTEXT_KEY_PREFIX = "context:"
+
+# Stored contexts are written to Neo4j in batches: a flush runs once the buffer
+# holds GRAPH_WRITE_BATCH_SIZE contexts or GRAPH_WRITE_DELAY_SECONDS after the
+# first buffered write, whichever comes first
+GRAPH_WRITE_BATCH_SIZE = 128
+GRAPH_WRITE_DELAY_SECONDS = 0.1
+_GRAPH_WRITE_QUERY = """
+UNWIND $ctxs AS c
+MERGE (r:Context {id: c.id})
+SET r += c.props
+WITH r, c
+UNWIND c.concepts AS name
+MERGE (k:Concept {name: name})
+MERGE (r)-[:MENTIONS {w: 1.0}]->(k)
+"""
+
+
+async def _write_contexts(tx, rows: List[Dict[str, Any]]):
+    """Write a batch of contexts and their concept edges in one query."""
+    await tx.run(_GRAPH_WRITE_QUERY, ctxs=rows)
+
+
+class _ContextLRU(LRUCache):
+    """LRU of context IDs that reports each eviction to a callback."""
+    
+    def __init__(self, maxsize: int, on_evict):
+        super().__init__(maxsize=maxsize)
+        self._on_evict = on_evict
+    
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(key)
+        return key, value
+
 
 class MemoryService:
     """Service for GraphRAG-based memory management."""
     
-    def __init__(self):
+    def __init__(self, max_contexts: int = MEMORY_MAX_CONTEXTS):
         """Initialize memory service."""
         # In production, this would connect to Neo4j
         # For now, we'll use in-memory storage
         self.memory_graph = {
             "nodes": {},  # node_id -> {type, properties, created_at}
             "edges": {},  # edge_id -> {source, target, type, weight, created_at}
-            "embeddings": {}  # node_id -> vector_embedding
         }
-        self.query_cache = {}  # query_hash -> relevant_nodes
+        # Embeddings live in one packed float32 buffer, a row per node, normalised
+        # on write so cosine similarity is a plain dot product
+        self._emb = array("f")
+        self._emb_dim: Optional[int] = None
+        self._emb_index: Dict[str, int] = {}  # node_id -> row
+        self._emb_nodes: List[str] = []  # row -> node_id
+        self._stats_cache = TTLCache(maxsize=1, ttl=MEMORY_STATS_TTL_SECONDS)
+        self._context_lru = _ContextLRU(max_contexts, self._evict_context)  # context_id -> user_id
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._write_buffer: List[Dict[str, Any]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._id_counter = count()
+        # Per-user inverted index over stored contexts, maintained by store_context;
+        # scoping postings by owner keeps access checks out of the scoring loop
+        self.term_index: Dict[str, Dict[str, List[Tuple[str, int]]]] = defaultdict(
+            lambda: defaultdict(list)
+        )  # user_id -> term -> [(context_id, weight)]
+        self.user_contexts: Dict[str, List[str]] = defaultdict(list)  # user_id -> context_ids, oldest first
+        # Outgoing edges per node, so graph walks never scan the whole edge table
+        self._out_edges: Dict[str, List[str]] = defaultdict(list)  # node_id -> edge_ids
+        # Lowercased query and content per stored context, kept beside the graph
+        # so indexing and eviction never re-lowercase and the nodes stay clean
+        self._lowered_text: Dict[str, Tuple[str, str]] = {}  # context_id -> (query, content)
         logger.info("MemoryService initialized")
     
     async def store_context(self, query: str, context_data: Dict[str, Any], user_id: str) -> str:
         """Store research context in the memory graph."""
-        context_id = f"context_{datetime.utcnow().timestamp()}"
+        # Read the clock once; every node and edge written for this context
+        # shares the same timestamp string
+        now = datetime.utcnow()
+        now_iso = now.isoformat()
+        # The counter keeps IDs unique when two contexts land on the same clock tick
+        context_id = f"context_{time.time_ns()}_{next(self._id_counter)}"
+        content = context_data.get("content", "")
         
         # Create context node
         context_node = {
@@ -33,63 +131,245 @@ class MemoryService:
             "type": "research_context",
             "properties": {
                 "query": query,
-                "content": context_data.get("content", ""),
+                "content": content,
                 "sources": context_data.get("sources", []),
                 "user_id": user_id,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": now_iso,
                 "relevance_score": context_data.get("relevance_score", 0.5)
             },
-            "created_at": datetime.utcnow().isoformat()
+            "created_at": now_iso
         }
         
         # Store node
         self.memory_graph["nodes"][context_id] = context_node
+        self._lowered_text[context_id] = (query.lower(), content.lower())
+        self._index_context(context_id, user_id)
         
         # Connect to related concepts
-        await self._create_concept_connections(context_id, query, context_data)
+        concepts = await self._create_concept_connections(context_id, query, context_data, now_iso)
+        self._buffer_graph_write(context_id, context_node["properties"], concepts)
         
-        logger.info(f"Stored context: {context_id} for query: {query[:50]}...")
+        logger.info("Stored context: %s for query: %.50s...", context_id, query)
         return context_id
     
+    def _buffer_graph_write(self, context_id: str, properties: Dict[str, Any], concepts: List[str]):
+        """Queue a stored context for the next batched Neo4j write."""
+        if get_neo4j_driver() is None:
+            return
+        
+        self._write_buffer.append({
+            "id": context_id,
+            "props": {
+                "query": properties["query"],
+                "content": properties["content"],
+                "sources": orjson.dumps(properties["sources"]).decode(),
+                "user_id": properties["user_id"],
+                "timestamp": properties["timestamp"],
+                "relevance_score": properties["relevance_score"],
+            },
+            "concepts": concepts,
+        })
+        if len(self._write_buffer) >= GRAPH_WRITE_BATCH_SIZE:
+            self._start_graph_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                GRAPH_WRITE_DELAY_SECONDS, self._start_graph_flush
+            )
+    
+    def _start_graph_flush(self):
+        """Hand the buffered writes to a background flush."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._write_buffer:
+            return
+        rows, self._write_buffer = self._write_buffer, []
+        task = asyncio.get_running_loop().create_task(self._flush_graph_writes(rows))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _flush_graph_writes(self, rows: List[Dict[str, Any]]):
+        """Write one batch of contexts to Neo4j; failures are logged and dropped."""
+        try:
+            database = get_settings().neo4j.database
+            async with get_neo4j_driver().session(database=database) as session:
+                await session.execute_write(_write_contexts, rows)
+        except Exception as e:
+            logger.warning("Graph write of %d contexts failed: %s", len(rows), e)
+    
+    async def flush(self):
+        """Write any buffered contexts and wait for in-flight background writes."""
+        self._start_graph_flush()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+    
+    def _index_context(self, context_id: str, user_id: str):
+        """Add a context's query and content terms to the inverted index."""
+        query_lc, content_lc = self._lowered_text[context_id]
+        content_terms = {term for term in content_lc.split() if term not in _STOP_WORDS}
+        query_terms = {term for term in query_lc.split() if term not in _STOP_WORDS}
+        
+        user_index = self.term_index[user_id]
+        for term in content_terms | query_terms:
+            weight = 0
+            if term in content_terms:
+                weight += CONTENT_TERM_WEIGHT
+            if term in query_terms:
+                weight += QUERY_TERM_WEIGHT
+            user_index[term].append((context_id, weight))
+        
+        self.user_contexts[user_id].append(context_id)
+        self._context_lru[context_id] = user_id
+    
+    def _evict_context(self, context_id: str):
+        """Drop a cold context from the graph and indexes and park it in Redis."""
+        node = self.memory_graph["nodes"].pop(context_id, None)
+        if node is None:
+            return
+        user_id = node["properties"]["user_id"]
+        query_lc, content_lc = self._lowered_text.pop(context_id)
+        
+        user_index = self.term_index.get(user_id, {})
+        terms = set(content_lc.split()) | set(query_lc.split())
+        for term in terms:
+            postings = user_index.get(term)
+            if postings is None:
+                continue
+            postings[:] = [posting for posting in postings if posting[0] != context_id]
+            if not postings:
+                del user_index[term]
+        if not user_index:
+            self.term_index.pop(user_id, None)
+        
+        owned = self.user_contexts.get(user_id)
+        if owned is not None:
+            owned.remove(context_id)
+            if not owned:
+                del self.user_contexts[user_id]
+        
+        # A concept's frequency counts the contexts mentioning it, so one that
+        # drops to zero has no edges left and goes too
+        nodes = self.memory_graph["nodes"]
+        edges = self.memory_graph["edges"]
+        for edge_id in self._out_edges.pop(context_id, ()):
+            edge = edges.pop(edge_id, None)
+            if edge is None:
+                continue
+            concept_id = edge["target"]
+            concept = nodes.get(concept_id)
+            if concept is None:
+                continue
+            concept["properties"]["frequency"] -= 1
+            if concept["properties"]["frequency"] <= 0:
+                del nodes[concept_id]
+                self._drop_embedding(concept_id)
+        self._drop_embedding(context_id)
+        
+        task = asyncio.get_running_loop().create_task(self._offload_context(context_id, node))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def store_embedding(self, node_id: str, vector: List[float]):
+        """Store or replace a node's embedding."""
+        if self._emb_dim is None:
+            self._emb_dim = len(vector)
+        elif len(vector) != self._emb_dim:
+            raise ValueError(f"Embedding has {len(vector)} dimensions, expected {self._emb_dim}")
+        
+        norm = math.sqrt(sum(map(mul, vector, vector))) or 1.0
+        row = array("f", [value / norm for value in vector])
+        
+        index = self._emb_index.get(node_id)
+        if index is None:
+            self._emb_index[node_id] = len(self._emb_nodes)
+            self._emb_nodes.append(node_id)
+            self._emb.extend(row)
+        else:
+            start = index * self._emb_dim
+            self._emb[start:start + self._emb_dim] = row
+    
+    def _drop_embedding(self, node_id: str):
+        """Remove a node's embedding, moving the last row into its slot."""
+        index = self._emb_index.pop(node_id, None)
+        if index is None:
+            return
+        dim = self._emb_dim
+        last_node = self._emb_nodes.pop()
+        if last_node != node_id:
+            self._emb[index * dim:(index + 1) * dim] = self._emb[-dim:]
+            self._emb_nodes[index] = last_node
+            self._emb_index[last_node] = index
+        del self._emb[-dim:]
+    
+    def similar_nodes(self, vector: List[float], k: int = 5) -> List[Tuple[str, float]]:
+        """Find the k nodes whose embeddings are most cosine-similar to a vector."""
+        dim = self._emb_dim
+        if dim is None or not self._emb_nodes:
+            return []
+        if len(vector) != dim:
+            raise ValueError(f"Embedding has {len(vector)} dimensions, expected {dim}")
+        
+        norm = math.sqrt(sum(map(mul, vector, vector))) or 1.0
+        query = [value / norm for value in vector]
+        emb = self._emb
+        scores = (
+            (node_id, sum(map(mul, emb[row * dim:(row + 1) * dim], query)))
+            for row, node_id in enumerate(self._emb_nodes)
+        )
+        return heapq.nlargest(k, scores, key=itemgetter(1))
+    
+    async def _offload_context(self, context_id: str, node: Dict[str, Any]):
+        """Write an evicted context to Redis; failures only cost the cold copy."""
+        await cache_set_json(_CONTEXT_KEY_PREFIX + context_id, node, MEMORY_CONTEXT_TTL_SECONDS)
+    
+    async def get_context(self, context_id: str) -> Optional[Dict[str, Any]]:
+        """Get a context node from memory, falling back to its offloaded copy in Redis."""
+        node = self.memory_graph["nodes"].get(context_id)
+        if node is not None:
+            if context_id in self._context_lru:
+                self._context_lru[context_id]  # mark as recently used
+            return node
+        return await cache_get_json(_CONTEXT_KEY_PREFIX + context_id)
+    
     async def retrieve_context(self, query: str, user_id: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """Retrieve relevant context for a query."""
-        # Simple semantic search (in production, use embeddings + vector search)
-        query_terms = query.lower().split()
-        relevant_contexts = []
+        # Simple term-overlap search over the inverted index
+        # (in production, use embeddings + vector search)
+        # Only contexts owned by this user are indexed under them
+        user_index = self.term_index.get(user_id)
+        if not user_index:
+            return []
         
-        for node_id, node in self.memory_graph["nodes"].items():
-            if node["type"] == "research_context":
-                # Check if user has access to this context
-                if node["properties"]["user_id"] != user_id:
-                    continue
-                
-                # Calculate relevance score based on term overlap
-                content = node["properties"]["content"].lower()
-                node_query = node["properties"]["query"].lower()
-                
-                relevance_score = 0
-                for term in query_terms:
-                    if term in content:
-                        relevance_score += 1
-                    if term in node_query:
-                        relevance_score += 2
-                
-                if relevance_score > 0:
-                    relevant_contexts.append({
-                        "context_id": node_id,
-                        "query": node["properties"]["query"],
-                        "content": node["properties"]["content"],
-                        "sources": node["properties"]["sources"],
-                        "relevance_score": relevance_score,
-                        "timestamp": node["properties"]["timestamp"]
-                    })
+        # Repeated query terms walk their postings once, scaled by the repeat count
+        scores: Dict[str, int] = {}
+        scores_get = scores.get
+        for term, repeats in Counter(query.lower().split()).items():
+            postings = user_index.get(term)
+            if not postings:
+                continue
+            for context_id, weight in postings:
+                scores[context_id] = scores_get(context_id, 0) + weight * repeats
         
-        # Sort by relevance and return top results
-        relevant_contexts.sort(key=lambda x: x["relevance_score"], reverse=True)
-        return relevant_contexts[:max_results]
+        nodes = self.memory_graph["nodes"]
+        context_lru = self._context_lru
+        relevant_contexts = []
+        for context_id, relevance_score in heapq.nlargest(max_results, scores.items(), key=itemgetter(1)):
+            context_lru[context_id]  # retrieved contexts stay warm
+            properties = nodes[context_id]["properties"]
+            relevant_contexts.append({
+                "context_id": context_id,
+                "query": properties["query"],
+                "content": properties["content"],
+                "sources": properties["sources"],
+                "relevance_score": relevance_score,
+                "timestamp": properties["timestamp"]
+            })
+        return relevant_contexts
     
-    async def _create_concept_connections(self, context_id: str, query: str, context_data: Dict[str, Any]):
-        """Create concept connections for the context."""
+    async def _create_concept_connections(
+        self, context_id: str, query: str, context_data: Dict[str, Any], now_iso: str
+    ) -> List[str]:
+        """Create concept connections for the context; returns the concepts linked."""
         # Extract concepts from query and content
         concepts = await self._extract_concepts(query, context_data.get("content", ""))
         
@@ -106,7 +386,7 @@ class MemoryService:
                         "category": "extracted",
                         "frequency": 1
                     },
-                    "created_at": datetime.utcnow().isoformat()
+                    "created_at": now_iso
                 }
                 self.memory_graph["nodes"][concept_id] = concept_node
             else:
@@ -121,9 +401,12 @@ class MemoryService:
                 "target": concept_id,
                 "type": "mentions",
                 "weight": 1.0,
-                "created_at": datetime.utcnow().isoformat()
+                "created_at": now_iso
             }
             self.memory_graph["edges"][edge_id] = edge
+            self._out_edges[context_id].append(edge_id)
+        
+        return concepts
     
     async def _extract_concepts(self, query: str, content: str) -> List[str]:
         """Extract concepts from text (simplified)."""
@@ -131,66 +414,74 @@ class MemoryService:
         # For now, simple keyword extraction
         text = f"{query} {content}".lower()
         
-        # Remove common words
-        stop_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "by", "is", "are", "was", "were", "be", "been", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should"}
-        
-        words = [word for word in text.split() if len(word) > 3 and word not in stop_words]
+        # Stream words longer than three characters, skipping common words and
+        # duplicates, and stop as soon as enough concepts are found
+        concepts = {}
+        for match in _CONCEPT_TOKEN_RE.finditer(text):
+            word = match.group()
+            if word not in _STOP_WORDS and word not in concepts:
+                concepts[word] = None
+                if len(concepts) == MAX_CONCEPTS_PER_CONTEXT:
+                    break
         
         # Return unique concepts (simplified)
-        return list(set(words))[:10]  # Limit to 10 concepts
+        return list(concepts)
     
     async def get_memory_stats(self) -> Dict[str, Any]:
         """Get memory system statistics."""
+        # Stats are polled by dashboards, so a result is reused for a few seconds
+        cached = self._stats_cache.get("stats")
+        if cached is not None:
+            return cached
+        
         context_nodes = [n for n in self.memory_graph["nodes"].values() if n["type"] == "research_context"]
         concept_nodes = [n for n in self.memory_graph["nodes"].values() if n["type"] == "concept"]
         
-        return {
+        stats = {
             "total_contexts": len(context_nodes),
             "total_concepts": len(concept_nodes),
             "total_edges": len(self.memory_graph["edges"]),
-            "most_common_concepts": sorted(
-                [(n["properties"]["name"], n["properties"]["frequency"]) for n in concept_nodes],
-                key=lambda x: x[1],
-                reverse=True
-            )[:5],
-            "recent_contexts": sorted(
+            "most_common_concepts": heapq.nlargest(
+                5,
+                ((n["properties"]["name"], n["properties"]["frequency"]) for n in concept_nodes),
+                key=itemgetter(1)
+            ),
+            "recent_contexts": heapq.nlargest(
+                5,
                 context_nodes,
-                key=lambda x: x["properties"]["timestamp"],
-                reverse=True
-            )[:5]
+                key=lambda x: x["properties"]["timestamp"]
+            )
         }
+        self._stats_cache["stats"] = stats
+        return stats
     
     async def build_knowledge_graph(self, user_id: str) -> Dict[str, Any]:
         """Build knowledge graph for visualization."""
-        user_contexts = [
-            node for node in self.memory_graph["nodes"].values()
-            if node["type"] == "research_context" and node["properties"]["user_id"] == user_id
-        ]
-        
+        nodes = self.memory_graph["nodes"]
+        edges = self.memory_graph["edges"]
         concepts = {}
         connections = []
         
         # Collect all concepts for this user
-        for context in user_contexts:
-            context_id = context["id"]
+        for context_id in self.user_contexts.get(user_id, ()):
+            context = nodes[context_id]
             
             # Find concept connections
-            for edge_id, edge in self.memory_graph["edges"].items():
-                if edge["source"] == context_id:
-                    target_node = self.memory_graph["nodes"].get(edge["target"])
-                    if target_node and target_node["type"] == "concept":
-                        concept_name = target_node["properties"]["name"]
-                        if concept_name not in concepts:
-                            concepts[concept_name] = {
-                                "id": target_node["id"],
-                                "name": concept_name,
-                                "frequency": target_node["properties"]["frequency"],
-                                "contexts": []
-                            }
-                        concepts[concept_name]["contexts"].append({
-                            "query": context["properties"]["query"],
-                            "timestamp": context["properties"]["timestamp"]
-                        })
+            for edge_id in self._out_edges.get(context_id, ()):
+                target_node = nodes.get(edges[edge_id]["target"])
+                if target_node and target_node["type"] == "concept":
+                    concept_name = target_node["properties"]["name"]
+                    if concept_name not in concepts:
+                        concepts[concept_name] = {
+                            "id": target_node["id"],
+                            "name": concept_name,
+                            "frequency": target_node["properties"]["frequency"],
+                            "contexts": []
+                        }
+                    concepts[concept_name]["contexts"].append({
+                        "query": context["properties"]["query"],
+                        "timestamp": context["properties"]["timestamp"]
+                    })
         
         return {
             "concepts": list(concepts.values()),
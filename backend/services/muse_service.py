@@ -16,13 +16,13 @@ class MuseService:
     async def discover_new_content(self, user_id: str, interests: List[str]) -> List[Dict[str, Any]]:
         """Discover new content based on user interests."""
         # TODO: Implement AI-powered discovery
-        logger.info(f"Discovering content for user {user_id} with interests: {interests}")
+        logger.info("Discovering content for user %s with interests: %s", user_id, interests)
         return []
     
     async def get_recommendations(self, user_id: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Get personalized recommendations."""
         # TODO: Implement recommendation engine
-        logger.info(f"Getting recommendations for user {user_id}")
+        logger.info("Getting recommendations for user %s", user_id)
         return []
     
     async def analyze_research_patterns(self, user_id: str) -> Dict[str, Any]:
@@ -1,15 +1,27 @@
 """Research service for orchestrating research workflows."""
 
+import asyncio
+import copy
 import logging
+from hashlib import blake2b
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from cachetools import TTLCache
+
 from core.interfaces import ToolInterface, ToolInput
 from core.registry import get_registry
-from services.user_service import UserService
+from services import get_user_service
 
 logger = logging.getLogger(__name__)
 
+# Identical queries from the same user share one run while it is in flight,
+# and a result without errors is reused for a short while afterwards. Callers
+# must pass a verified user_id, since it is what keeps users' results apart;
+# each caller gets its own copy of the shared result
+QUERY_RESULT_CACHE_SIZE = 1024
+QUERY_RESULT_CACHE_TTL_SECONDS = 30
+
 
 class ResearchService:
     """Service for orchestrating research workflows."""
@@ -17,14 +29,42 @@ class ResearchService:
     def __init__(self):
         """Initialize research service."""
         self.registry = get_registry()
-        self.user_service = UserService()
+        self.user_service = get_user_service()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._results = TTLCache(maxsize=QUERY_RESULT_CACHE_SIZE, ttl=QUERY_RESULT_CACHE_TTL_SECONDS)
         logger.info("ResearchService initialized")
     
     async def process_query(self, query: str, user_id: Optional[str] = None) -> Dict[str, Any]:
-        """Process a research query end-to-end."""
+        """Process a research query end-to-end.
+        
+        ``user_id`` must come from the authenticated request, not the request body.
+        """
+        key = blake2b(f"{user_id}|{query}".encode(), digest_size=16).hexdigest()
+        cached = self._results.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_query(query, user_id))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._query_done(key, done))
+        # Shielded so one caller going away does not cancel the run for the others
+        return copy.deepcopy(await asyncio.shield(task))
+    
+    def _query_done(self, key: str, task: asyncio.Task):
+        """Retire a finished run and keep its result if it completed cleanly."""
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            results = task.result()
+            if not results["errors"]:
+                self._results[key] = results
+    
+    async def _run_query(self, query: str, user_id: Optional[str]) -> Dict[str, Any]:
+        """Run the research tools for a query and collect their results."""
         start_time = datetime.utcnow()
         
-        logger.info(f"Processing research query: {query}")
+        logger.info("Processing research query: %s", query)
         
         # Create tool input
         tool_input = ToolInput(
@@ -44,47 +84,42 @@ class ResearchService:
         
         # Use available tools for research
         available_tools = self.registry.list_tools()
-        logger.info(f"Available tools: {available_tools}")
+        logger.info("Available tools: %s", available_tools)
         
-        # Execute web search if available
+        # Tools to run, each with its own input; ToolInput is frozen, so the
+        # shared input is safe to hand to one tool as-is
+        planned = []
         if "web_search" in available_tools:
-            web_search_tool = self.registry.get_tool("web_search")
-            if web_search_tool:
-                try:
-                    logger.info("Executing web search...")
-                    search_result = await web_search_tool.execute(tool_input)
-                    results["results"].append({
-                        "tool": "web_search",
-                        "data": search_result.data,
-                        "success": search_result.success,
-                        "metadata": search_result.metadata
-                    })
-                    results["tools_used"].append("web_search")
-                except Exception as e:
-                    error_msg = f"Web search failed: {str(e)}"
-                    logger.error(error_msg)
-                    results["errors"].append(error_msg)
-        
-        # Execute document ingestion if available
+            planned.append(("web_search", "Web search", tool_input))
         if "document_ingestion" in available_tools:
-            doc_tool = self.registry.get_tool("document_ingestion")
-            if doc_tool:
-                try:
-                    logger.info("Executing document ingestion...")
-                    # For now, use the query as document path for testing
-                    tool_input.query = f"document_{query[:20]}"
-                    doc_result = await doc_tool.execute(tool_input)
-                    results["results"].append({
-                        "tool": "document_ingestion", 
-                        "data": doc_result.data,
-                        "success": doc_result.success,
-                        "metadata": doc_result.metadata
-                    })
-                    results["tools_used"].append("document_ingestion")
-                except Exception as e:
-                    error_msg = f"Document ingestion failed: {str(e)}"
-                    logger.error(error_msg)
-                    results["errors"].append(error_msg)
+            # For now, use the query as document path for testing
+            doc_input = tool_input.model_copy(update={"query": f"document_{query[:20]}"})
+            planned.append(("document_ingestion", "Document ingestion", doc_input))
+        
+        # The tools are independent, so they run concurrently
+        runs = []
+        for tool_name, label, run_input in planned:
+            tool = self.registry.get_tool(tool_name)
+            if tool:
+                logger.info("Executing %s...", tool_name)
+                runs.append((tool_name, label, asyncio.create_task(tool.execute(run_input))))
+        
+        outcomes = await asyncio.gather(*(task for _, _, task in runs), return_exceptions=True)
+        for (tool_name, label, _), outcome in zip(runs, outcomes):
+            if isinstance(outcome, Exception):
+                error_msg = f"{label} failed: {str(outcome)}"
+                logger.error(error_msg)
+                results["errors"].append(error_msg)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results["results"].append({
+                    "tool": tool_name,
+                    "data": outcome.data,
+                    "success": outcome.success,
+                    "metadata": outcome.metadata
+                })
+                results["tools_used"].append(tool_name)
         
         # Calculate execution time
         end_time = datetime.utcnow()
@@ -92,12 +127,12 @@ class ResearchService:
         results["end_time"] = end_time.isoformat()
         results["execution_time_seconds"] = execution_time
         
-        logger.info(f"Research query completed in {execution_time:.2f}s")
+        logger.info("Research query completed in %.2fs", execution_time)
         return results
     
     async def analyze_content(self, content: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """Analyze research content."""
-        logger.info(f"Analyzing content: {content[:100]}...")
+        logger.info("Analyzing content: %.100s...", content)
         
         # For now, return mock analysis
         return {
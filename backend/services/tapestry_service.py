@@ -16,7 +16,7 @@ class TapestryService:
     async def create_tapestry(self, user_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new tapestry."""
         # TODO: Implement database creation
-        logger.info(f"Creating tapestry for user {user_id}")
+        logger.info("Creating tapestry for user %s", user_id)
         return {
             "id": "new_tapestry_id",
             "title": data.get("title", "Untitled"),
@@ -41,13 +41,13 @@ class TapestryService:
     async def update_tapestry(self, tapestry_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Update a tapestry."""
         # TODO: Implement database update
-        logger.info(f"Updating tapestry {tapestry_id}")
+        logger.info("Updating tapestry %s", tapestry_id)
         return {"id": tapestry_id, "updated": True}
     
     async def delete_tapestry(self, tapestry_id: str) -> Dict[str, Any]:
         """Delete a tapestry."""
         # TODO: Implement database deletion
-        logger.info(f"Deleting tapestry {tapestry_id}")
+        logger.info("Deleting tapestry %s", tapestry_id)
         return {"id": tapestry_id, "deleted": True}
     
     async def export_tapestry(self, tapestry_id: str, format: str) -> Dict[str, Any]:
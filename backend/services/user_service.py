@@ -3,8 +3,15 @@
 import logging
 from typing import Optional, Dict, Any
 
+from core.database import cache_get_json, cache_set_json, get_redis_client
+
 logger = logging.getLogger(__name__)
 
+# User and profile lookups are cached in Redis; update_user drops both entries
+USER_CACHE_TTL_SECONDS = 900
+_USER_KEY_PREFIX = "user:"
+_PROFILE_KEY_PREFIX = "profile:"
+
 
 class UserService:
     """Service for user-related operations."""
@@ -15,30 +22,48 @@ class UserService:
     
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user by ID."""
+        cache_key = _USER_KEY_PREFIX + user_id
+        cached = await cache_get_json(cache_key)
+        if cached is not None:
+            return cached
+        
         # TODO: Implement database lookup
-        return {
+        user = {
             "id": user_id,
             "name": "Demo User",
             "email": "demo@example.com",
             "role": "user"
         }
+        await cache_set_json(cache_key, user, USER_CACHE_TTL_SECONDS)
+        return user
     
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user."""
         # TODO: Implement database creation
-        logger.info(f"Creating user: {user_data}")
+        logger.info("Creating user: %s", user_data)
         return {"id": "new_user_id", "created": True}
     
     async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Update user data."""
         # TODO: Implement database update
-        logger.info(f"Updating user {user_id}: {user_data}")
+        logger.info("Updating user %s: %s", user_id, user_data)
+        redis = get_redis_client()
+        if redis is not None:
+            try:
+                await redis.delete(_USER_KEY_PREFIX + user_id, _PROFILE_KEY_PREFIX + user_id)
+            except Exception as e:
+                logger.warning("User cache invalidation failed for %s: %s", user_id, e)
         return {"id": user_id, "updated": True}
     
     async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Get user profile data."""
+        cache_key = _PROFILE_KEY_PREFIX + user_id
+        cached = await cache_get_json(cache_key)
+        if cached is not None:
+            return cached
+        
         user = await self.get_user_by_id(user_id)
-        return {
+        profile = {
             "user": user,
             "profile": {
                 "preferences": {},
@@ -46,3 +71,5 @@ class UserService:
                 "subscription": {}
             }
         }
+        await cache_set_json(cache_key, profile, USER_CACHE_TTL_SECONDS)
+        return profile
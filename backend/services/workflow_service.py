@@ -1,17 +1,155 @@
 """Workflow orchestration service for complex research processes."""
 
+import hashlib
 import logging
 import asyncio
-from typing import Dict, Any, List, Optional
+import random
+import re
+import time
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Set
 from datetime import datetime, timedelta
 import uuid
-import json
 
-from services.memory_service import MemoryService
+import httpx
+import orjson
+from cachetools import LRUCache, TTLCache
+
+from services import get_memory_service
+from core.interfaces import ToolInput, ToolInterface
 from core.registry import get_registry
 
 logger = logging.getLogger(__name__)
 
+# Most steps a plan runs at once when their dependencies allow it
+WORKFLOW_MAX_CONCURRENT_STEPS = 4
+
+# Tool calls in search and analysis steps time out after twice the step's
+# estimated time and are retried with jittered exponential backoff when the
+# failure looks transient
+STEP_MAX_ATTEMPTS = 3
+STEP_RETRY_BASE_SECONDS = 0.5
+STEP_RETRY_JITTER_SECONDS = 0.1
+_RETRYABLE_ERRORS = (asyncio.TimeoutError, ConnectionError, httpx.TransportError)
+
+# Most plans kept in memory; the least recently used plan is dropped first
+MAX_ACTIVE_WORKFLOWS = 1024
+
+# Timestamps written within the same 10 ms share one formatted string
+TIMESTAMP_RESOLUTION_SECONDS = 0.01
+
+# Completed plans are reused for the same user's repeat queries, matched by
+# exact normalised text
+ANALYSIS_CACHE_SIZE = 128
+ANALYSIS_CACHE_TTL = 86400
+
+# Keywords that add optional plan steps, matched anywhere in the lowercased query
+_SEARCH_KEYWORDS_RE = re.compile("what|how|why|when|where|who")
+_DOCUMENT_KEYWORDS_RE = re.compile("document|paper|article|study|research")
+
+# Plan steps are shared, read-only templates; per-run state lives in the
+# workflow's results, keyed by step ID
+_WEB_SEARCH_STEP = MappingProxyType({
+    "id": "web_search",
+    "type": "search",
+    "name": "Web Search",
+    "description": "Search for relevant information",
+    "depends_on": (),
+    "estimated_time": 30,
+    "tool_required": "web_search"
+})
+_DOCUMENT_ANALYSIS_STEP = MappingProxyType({
+    "id": "document_analysis",
+    "type": "analysis",
+    "name": "Document Analysis",
+    "description": "Analyze and extract insights from documents",
+    "depends_on": ("web_search",),
+    "estimated_time": 60,
+    "tool_required": "document_ingestion"
+})
+_CONTEXT_RETRIEVAL_STEP = MappingProxyType({
+    "id": "context_retrieval",
+    "type": "retrieval",
+    "name": "Context Retrieval",
+    "description": "Retrieve relevant context from memory",
+    "depends_on": (),
+    "estimated_time": 10,
+    "tool_required": "memory_service"
+})
+_SYNTHESIS_STEP = MappingProxyType({
+    "id": "synthesis",
+    "type": "synthesis",
+    "name": "Synthesis",
+    "description": "Synthesize findings into coherent answer",
+    "depends_on": ("web_search", "document_analysis", "context_retrieval"),
+    "estimated_time": 30,
+    "tool_required": "research_service"
+})
+
+# Each step owns one bit of a workflow's completion mask, so a dependency
+# check is a single AND against the step's dependency mask
+_PLAN_STEPS = (_WEB_SEARCH_STEP, _DOCUMENT_ANALYSIS_STEP, _CONTEXT_RETRIEVAL_STEP, _SYNTHESIS_STEP)
+_STEP_BITS = {step["id"]: 1 << i for i, step in enumerate(_PLAN_STEPS)}
+_DEPENDENCY_MASKS = {
+    step["id"]: sum(_STEP_BITS[dep_id] for dep_id in step["depends_on"]) for step in _PLAN_STEPS
+}
+
+
+@dataclass(slots=True)
+class StepResult:
+    """Outcome of one workflow step."""
+    status: str
+    result: Any = None
+    timestamp: str = ""
+    tool_used: str = ""
+    error: str = ""
+    reason: str = ""
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the dict shape step results are reported in, leaving out unset fields."""
+        data: Dict[str, Any] = {"status": self.status}
+        if self.result is not None:
+            data["result"] = self.result
+        for name in ("timestamp", "tool_used", "error", "reason"):
+            value = getattr(self, name)
+            if value:
+                data[name] = value
+        return data
+
+
+# Step handlers take (step, workflow, user_id)
+StepHandler = Callable[[Mapping[str, Any], Dict[str, Any], str], Awaitable[StepResult]]
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+async def _run_with_retry(
+    coro_factory: Callable[[], Awaitable[Any]],
+    max_attempts: int = STEP_MAX_ATTEMPTS,
+    base: float = STEP_RETRY_BASE_SECONDS,
+    timeout: Optional[float] = None,
+) -> Any:
+    """Await a fresh coroutine per attempt, retrying transient failures with backoff."""
+    for attempt in range(max_attempts):
+        try:
+            return await asyncio.wait_for(coro_factory(), timeout=timeout)
+        except _RETRYABLE_ERRORS as e:
+            if attempt == max_attempts - 1:
+                raise
+            delay = base * 2 ** attempt + random.random() * STEP_RETRY_JITTER_SECONDS
+            logger.warning("Attempt %d/%d failed (%r); retrying in %.2fs", attempt + 1, max_attempts, e, delay)
+            await asyncio.sleep(delay)
+
+
+def _step_result(results: Dict[str, Any], step_id: str) -> Mapping[str, Any]:
+    """Get a step's result payload, or an empty mapping when it has none."""
+    step_result = results.get(step_id)
+    if step_result is None or step_result.result is None:
+        return _EMPTY
+    return step_result.result
+
 
 class WorkflowService:
     """Service for orchestrating research workflows."""
@@ -19,13 +157,96 @@ class WorkflowService:
     def __init__(self):
         """Initialize workflow service."""
         self.registry = get_registry()
-        self.memory_service = MemoryService()
-        self.active_workflows = {}  # workflow_id -> workflow_state
+        self.memory_service = get_memory_service()
+        # Keyed by owner as well as plan, so a lookup with the wrong user simply misses
+        self.active_workflows = LRUCache(maxsize=MAX_ACTIVE_WORKFLOWS)  # (user_id, plan_id) -> workflow_state
         self.workflow_templates = {}
+        self._tool_cache: Dict[str, ToolInterface] = {}  # tool name -> tool, filled on first use
+        self._pending_writes: Set[asyncio.Task] = set()
+        # New documents can change what a user's cached plans would find
+        self.registry.add_ingestion_listener(self.invalidate_cached_results)
+        self._step_dispatch: Dict[str, StepHandler] = {
+            "search": self._execute_search_step,
+            "analysis": self._execute_analysis_step,
+            "retrieval": self._execute_retrieval_step,
+            "synthesis": self._execute_synthesis_step,
+        }  # step type -> handler
+        self._now_bucket = -1.0
+        self._now_iso_cached = ""
+        self._exact_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)  # query key -> (user_id, plan_id)
         logger.info("WorkflowService initialized")
     
+    def register_step_type(self, name: str, handler: StepHandler):
+        """Register a handler for a step type, replacing any existing one."""
+        self._step_dispatch[name] = handler
+    
+    def _write_done(self, task: asyncio.Task):
+        """Retire a background results write, logging any failure."""
+        self._pending_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Storing workflow results failed: %s", task.exception())
+    
+    async def close(self):
+        """Wait for background results writes to finish."""
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+    
+    def _now_iso(self) -> str:
+        """Get the current UTC time as an ISO string, reformatted at most every 10 ms."""
+        bucket = time.monotonic() // TIMESTAMP_RESOLUTION_SECONDS
+        if bucket != self._now_bucket:
+            self._now_bucket = bucket
+            self._now_iso_cached = datetime.utcnow().isoformat()
+        return self._now_iso_cached
+    
+    def _get_tool(self, name: str) -> Optional[ToolInterface]:
+        """Get a tool, looking it up in the registry only until it is found."""
+        tool = self._tool_cache.get(name)
+        if tool is None:
+            tool = self.registry.get_tool(name)
+            if tool is not None:
+                self._tool_cache[name] = tool
+        return tool
+    
+    @staticmethod
+    def _query_key(query: str, user_id: str) -> str:
+        """Exact-match cache key for a user's query."""
+        return hashlib.sha256(f"{query.strip().lower()}{user_id}".encode()).hexdigest()
+    
+    def _is_reusable(self, user_id: str, plan_id: Optional[str]) -> bool:
+        """Check that a user's cached plan still exists and finished successfully."""
+        workflow = self.active_workflows.get((user_id, plan_id))
+        return workflow is not None and workflow["status"] == "completed"
+    
+    def _find_cached_plan(self, query: str, user_id: str) -> Optional[str]:
+        """Find a completed plan that already answers this query for this user."""
+        owner_id, plan_id = self._exact_cache.get(self._query_key(query, user_id), (None, None))
+        if owner_id == user_id and self._is_reusable(user_id, plan_id):
+            return plan_id
+        return None
+    
+    def _cache_plan(self, workflow: Dict[str, Any]):
+        """Make a completed plan available to later matching queries."""
+        query, user_id, plan_id = workflow["query"], workflow["user_id"], workflow["plan_id"]
+        self._exact_cache[self._query_key(query, user_id)] = (user_id, plan_id)
+    
+    def invalidate_cached_results(self, user_id: Optional[str] = None):
+        """Forget cached plans, for one user or everyone; called after new documents are ingested."""
+        if user_id is None:
+            self._exact_cache.clear()
+            return
+        for key, (owner_id, plan_id) in list(self._exact_cache.items()):
+            if owner_id == user_id:
+                del self._exact_cache[key]
+    
     async def create_research_plan(self, query: str, user_id: str) -> str:
         """Create a research plan for a query."""
+        # A completed plan for the same query is reused as-is
+        cached_plan_id = self._find_cached_plan(query, user_id)
+        if cached_plan_id is not None:
+            logger.info("Reusing research plan: %s for query: %.50s...", cached_plan_id, query)
+            return cached_plan_id
+        
         plan_id = f"plan_{uuid.uuid4().hex[:8]}"
         
         # Analyze query to determine research steps
@@ -38,65 +259,119 @@ class WorkflowService:
             "status": "planning",
             "steps": plan,
             "current_step": 0,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
-            "results": {},
+            "created_at": self._now_iso(),
+            "updated_at": self._now_iso(),
+            "results": {},  # step_id -> StepResult
+            "_completed_mask": 0,
+            "_tools_used": set(),
             "errors": []
         }
         
-        self.active_workflows[plan_id] = workflow_state
+        self.active_workflows[(user_id, plan_id)] = workflow_state
         
-        logger.info(f"Created research plan: {plan_id} for query: {query[:50]}...")
+        logger.info("Created research plan: %s for query: %.50s...", plan_id, query)
         return plan_id
     
     async def execute_research_plan(self, plan_id: str, user_id: str) -> Dict[str, Any]:
         """Execute a research plan."""
-        if plan_id not in self.active_workflows:
+        # Another user's plan is reported as missing rather than forbidden
+        workflow = self.active_workflows.get((user_id, plan_id))
+        if workflow is None:
             raise ValueError(f"Plan {plan_id} not found")
         
-        workflow = self.active_workflows[plan_id]
-        if workflow["user_id"] != user_id:
-            raise ValueError("Unauthorized access to workflow")
+        # Completed plans, including ones handed back from the cache, are not re-run
+        if workflow["status"] == "completed":
+            return self._public_view(workflow)
         
         workflow["status"] = "executing"
-        workflow["updated_at"] = datetime.utcnow().isoformat()
+        workflow["updated_at"] = self._now_iso()
         
-        logger.info(f"Executing research plan: {plan_id}")
+        logger.info("Executing research plan: %s", plan_id)
         
         try:
-            # Execute each step
-            for i, step in enumerate(workflow["steps"]):
-                workflow["current_step"] = i
-                step_result = await self._execute_workflow_step(step, workflow, user_id)
-                
-                workflow["results"][step["id"]] = step_result
-                
-                # Check for errors
-                if step_result.get("status") == "error":
-                    workflow["errors"].append(f"Step {step['id']}: {step_result.get('error')}")
-                    workflow["status"] = "failed"
-                    break
+            # Run the steps a layer at a time: every step whose dependencies
+            # have finished runs concurrently with the rest of its layer
+            steps = workflow["steps"]
+            step_by_id = {step["id"]: step for step in steps}
+            position = {step["id"]: i for i, step in enumerate(steps)}
+            sorter = TopologicalSorter({
+                step["id"]: [dep for dep in step.get("depends_on", []) if dep in step_by_id]
+                for step in steps
+            })
+            sorter.prepare()
+            semaphore = asyncio.Semaphore(WORKFLOW_MAX_CONCURRENT_STEPS)
+            
+            async def run_step(step):
+                async with semaphore:
+                    return await self._execute_workflow_step(step, workflow, user_id)
+            
+            finished = 0
+            step_log = [] if logger.isEnabledFor(logging.INFO) else None
+            while sorter.is_active() and workflow["status"] != "failed":
+                ready = sorted(sorter.get_ready(), key=position.__getitem__)
+                workflow["current_step"] = finished
+                outcomes = await asyncio.gather(
+                    *(run_step(step_by_id[step_id]) for step_id in ready), return_exceptions=True
+                )
                 
-                # Update progress
-                progress = (i + 1) / len(workflow["steps"])
-                logger.info(f"Step {i+1}/{len(workflow['steps'])} completed: {progress:.1%}")
+                for step_id, step_result in zip(ready, outcomes):
+                    if isinstance(step_result, Exception):
+                        step_result = StepResult(status="error", error=f"Step execution failed: {str(step_result)}")
+                    elif isinstance(step_result, BaseException):
+                        raise step_result
+                    workflow["results"][step_id] = step_result
+                    if step_result.tool_used:
+                        workflow["_tools_used"].add(step_result.tool_used)
+                    
+                    # Check for errors
+                    if step_result.status == "error":
+                        workflow["errors"].append(f"Step {step_id}: {step_result.error}")
+                        workflow["status"] = "failed"
+                        continue
+                    
+                    if step_result.status == "completed":
+                        workflow["_completed_mask"] |= _STEP_BITS[step_id]
+                    
+                    # Update progress; step completions are logged together at the end
+                    finished += 1
+                    if step_log is not None:
+                        step_log.append((step_id, self._now_iso()))
+                sorter.done(*ready)
+            
+            if step_log is not None:
+                logger.info(
+                    "Workflow %s finished %d/%d steps: %s",
+                    plan_id, finished, len(steps), orjson.dumps(step_log).decode()
+                )
             
             # Check if completed successfully
             if workflow["status"] != "failed":
                 workflow["status"] = "completed"
                 
-                # Store results in memory
-                await self._store_workflow_results(workflow, user_id)
+                # Store results in memory in the background; the caller
+                # does not wait on persistence
+                task = asyncio.create_task(self._store_workflow_results(workflow, user_id))
+                self._pending_writes.add(task)
+                task.add_done_callback(self._write_done)
             
         except Exception as e:
             workflow["status"] = "error"
             workflow["errors"].append(f"Workflow execution failed: {str(e)}")
-            logger.error(f"Workflow execution failed: {plan_id}: {e}")
+            logger.error("Workflow execution failed: %s: %s", plan_id, e)
         
-        workflow["updated_at"] = datetime.utcnow().isoformat()
-        return workflow
+        workflow["updated_at"] = self._now_iso()
+        return self._public_view(workflow)
+    
+    @staticmethod
+    def _public_view(workflow: Dict[str, Any]) -> Dict[str, Any]:
+        """Serializable copy of a workflow without the internal bookkeeping keys."""
+        view = {key: value for key, value in workflow.items() if not key.startswith("_")}
+        view["steps"] = [dict(step) for step in workflow["steps"]]
+        view["results"] = {step_id: step_result.to_dict() for step_id, step_result in workflow["results"].items()}
+        view["errors"] = list(workflow["errors"])
+        return view
     
-    async def _analyze_query_and_create_plan(self, query: str, user_id: str) -> List[Dict[str, Any]]:
+    async def _analyze_query_and_create_plan(self, query: str, user_id: str) -> List[Mapping[str, Any]]:
         """Analyze query and create research plan."""
         # Simple query analysis (in production, use NLP)
         query_lower = query.lower()
@@ -105,134 +380,90 @@ class WorkflowService:
         steps = []
         
         # Step 1: Initial web search
-        if any(word in query_lower for word in ["what", "how", "why", "when", "where", "who"]):
-            steps.append({
-                "id": "web_search",
-                "type": "search",
-                "name": "Web Search",
-                "description": "Search for relevant information",
-                "depends_on": [],
-                "estimated_time": 30,
-                "tool_required": "web_search"
-            })
+        if _SEARCH_KEYWORDS_RE.search(query_lower):
+            steps.append(_WEB_SEARCH_STEP)
         
         # Step 2: Document analysis (if query suggests documents)
-        if any(word in query_lower for word in ["document", "paper", "article", "study", "research"]):
-            steps.append({
-                "id": "document_analysis",
-                "type": "analysis",
-                "name": "Document Analysis",
-                "description": "Analyze and extract insights from documents",
-                "depends_on": ["web_search"],
-                "estimated_time": 60,
-                "tool_required": "document_ingestion"
-            })
+        if _DOCUMENT_KEYWORDS_RE.search(query_lower):
+            steps.append(_DOCUMENT_ANALYSIS_STEP)
         
-        # Step 3: Context retrieval
-        steps.append({
-            "id": "context_retrieval",
-            "type": "retrieval",
-            "name": "Context Retrieval",
-            "description": "Retrieve relevant context from memory",
-            "depends_on": [],
-            "estimated_time": 10,
-            "tool_required": "memory_service"
-        })
-        
-        # Step 4: Synthesis
-        steps.append({
-            "id": "synthesis",
-            "type": "synthesis",
-            "name": "Synthesis",
-            "description": "Synthesize findings into coherent answer",
-            "depends_on": ["web_search", "document_analysis", "context_retrieval"],
-            "estimated_time": 30,
-            "tool_required": "research_service"
-        })
+        # Steps 3 and 4: Context retrieval and synthesis
+        steps.append(_CONTEXT_RETRIEVAL_STEP)
+        steps.append(_SYNTHESIS_STEP)
         
         return steps
     
-    async def _execute_workflow_step(self, step: Dict[str, Any], workflow: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def _execute_workflow_step(self, step: Mapping[str, Any], workflow: Dict[str, Any], user_id: str) -> StepResult:
         """Execute a single workflow step."""
         step_id = step["id"]
         step_type = step["type"]
         
+        handler = self._step_dispatch.get(step_type)
+        if handler is None:
+            return StepResult(status="error", error=f"Unknown step type: {step_type}")
+        
         try:
-            if step_type == "search":
-                return await self._execute_search_step(step, workflow, user_id)
-            elif step_type == "analysis":
-                return await self._execute_analysis_step(step, workflow, user_id)
-            elif step_type == "retrieval":
-                return await self._execute_retrieval_step(step, workflow, user_id)
-            elif step_type == "synthesis":
-                return await self._execute_synthesis_step(step, workflow, user_id)
-            else:
-                return {
-                    "status": "error",
-                    "error": f"Unknown step type: {step_type}"
-                }
-                
+            return await handler(step, workflow, user_id)
         except Exception as e:
-            return {
-                "status": "error",
-                "error": f"Step execution failed: {str(e)}"
-            }
+            return StepResult(status="error", error=f"Step execution failed: {str(e)}")
     
-    async def _execute_search_step(self, step: Dict[str, Any], workflow: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def _execute_search_step(self, step: Mapping[str, Any], workflow: Dict[str, Any], user_id: str) -> StepResult:
         """Execute web search step."""
         # Check dependencies
         if not await self._check_dependencies(step, workflow):
-            return {"status": "skipped", "reason": "Dependencies not met"}
+            return StepResult(status="skipped", reason="Dependencies not met")
         
         # Get web search tool
-        web_search_tool = self.registry.get_tool("web_search")
+        web_search_tool = self._get_tool("web_search")
         if not web_search_tool:
-            return {"status": "error", "error": "Web search tool not available"}
+            return StepResult(status="error", error="Web search tool not available")
         
         # Execute search
-        from core.interfaces import ToolInput
         tool_input = ToolInput(
             query=workflow["query"],
             context={"step_id": step["id"], "user_id": user_id}
         )
         
-        result = await web_search_tool.execute(tool_input)
+        result = await _run_with_retry(
+            lambda: web_search_tool.execute(tool_input), timeout=step["estimated_time"] * 2
+        )
         
-        return {
-            "status": "completed",
-            "result": result.data,
-            "timestamp": datetime.utcnow().isoformat(),
-            "tool_used": "web_search"
-        }
+        return StepResult(
+            status="completed",
+            result=result.data,
+            timestamp=self._now_iso(),
+            tool_used="web_search"
+        )
     
-    async def _execute_analysis_step(self, step: Dict[str, Any], workflow: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def _execute_analysis_step(self, step: Mapping[str, Any], workflow: Dict[str, Any], user_id: str) -> StepResult:
         """Execute document analysis step."""
         # Check dependencies
         if not await self._check_dependencies(step, workflow):
-            return {"status": "skipped", "reason": "Dependencies not met"}
+            return StepResult(status="skipped", reason="Dependencies not met")
         
         # Get document ingestion tool
-        doc_tool = self.registry.get_tool("document_ingestion")
+        doc_tool = self._get_tool("document_ingestion")
         if not doc_tool:
-            return {"status": "error", "error": "Document ingestion tool not available"}
+            return StepResult(status="error", error="Document ingestion tool not available")
         
         # For now, analyze the workflow query as content
-        from core.interfaces import ToolInput
         tool_input = ToolInput(
             query=f"analysis_{workflow['query'][:50]}",
             context={"step_id": step["id"], "user_id": user_id}
         )
         
-        result = await doc_tool.execute(tool_input)
+        result = await _run_with_retry(
+            lambda: doc_tool.execute(tool_input), timeout=step["estimated_time"] * 2
+        )
         
-        return {
-            "status": "completed",
-            "result": result.data,
-            "timestamp": datetime.utcnow().isoformat(),
-            "tool_used": "document_ingestion"
-        }
+        return StepResult(
+            status="completed",
+            result=result.data,
+            timestamp=self._now_iso(),
+            tool_used="document_ingestion"
+        )
     
-    async def _execute_retrieval_step(self, step: Dict[str, Any], workflow: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def _execute_retrieval_step(self, step: Mapping[str, Any], workflow: Dict[str, Any], user_id: str) -> StepResult:
         """Execute context retrieval step."""
         # Retrieve relevant context from memory
         context_results = await self.memory_service.retrieve_context(
@@ -241,22 +472,24 @@ class WorkflowService:
             max_results=5
         )
         
-        return {
-            "status": "completed",
-            "result": {
+        return StepResult(
+            status="completed",
+            result={
                 "contexts": context_results,
                 "count": len(context_results)
             },
-            "timestamp": datetime.utcnow().isoformat(),
-            "tool_used": "memory_service"
-        }
+            timestamp=self._now_iso(),
+            tool_used="memory_service"
+        )
     
-    async def _execute_synthesis_step(self, step: Dict[str, Any], workflow: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    async def _execute_synthesis_step(self, step: Mapping[str, Any], workflow: Dict[str, Any], user_id: str) -> StepResult:
         """Execute synthesis step."""
-        # Collect results from all previous steps
-        search_result = workflow["results"].get("web_search", {}).get("result", {})
-        analysis_result = workflow["results"].get("document_analysis", {}).get("result", {})
-        retrieval_result = workflow["results"].get("context_retrieval", {}).get("result", {})
+        # Collect results from all previous steps; missing ones read as the
+        # shared empty mapping and only become fresh dicts in the output
+        results = workflow["results"]
+        search_result = _step_result(results, "web_search") or {}
+        analysis_result = _step_result(results, "document_analysis") or {}
+        retrieval_result = _step_result(results, "context_retrieval")
         
         # Synthesize results
         synthesis = {
@@ -264,40 +497,35 @@ class WorkflowService:
             "sources": {
                 "web_search": search_result,
                 "document_analysis": analysis_result,
-                "retrieved_contexts": retrieval_result.get("contexts", [])
+                "retrieved_contexts": retrieval_result.get("contexts") or []
             },
-            "synthesis_timestamp": datetime.utcnow().isoformat(),
+            "synthesis_timestamp": self._now_iso(),
             "status": "completed"
         }
         
-        return {
-            "status": "completed",
-            "result": synthesis,
-            "timestamp": datetime.utcnow().isoformat(),
-            "tool_used": "workflow_synthesis"
-        }
+        return StepResult(
+            status="completed",
+            result=synthesis,
+            timestamp=self._now_iso(),
+            tool_used="workflow_synthesis"
+        )
     
-    async def _check_dependencies(self, step: Dict[str, Any], workflow: Dict[str, Any]) -> bool:
+    async def _check_dependencies(self, step: Mapping[str, Any], workflow: Dict[str, Any]) -> bool:
         """Check if step dependencies are met."""
-        dependencies = step.get("depends_on", [])
-        
-        for dep_id in dependencies:
-            dep_result = workflow["results"].get(dep_id, {})
-            if dep_result.get("status") != "completed":
-                return False
-        
-        return True
+        required = _DEPENDENCY_MASKS[step["id"]]
+        return workflow["_completed_mask"] & required == required
     
     async def _store_workflow_results(self, workflow: Dict[str, Any], user_id: str):
         """Store workflow results in memory."""
-        synthesis_result = workflow["results"].get("synthesis", {}).get("result", {})
+        synthesis_result = _step_result(workflow["results"], "synthesis")
         
         if synthesis_result:
+            self._cache_plan(workflow)
             await self.memory_service.store_context(
                 workflow["query"],
                 {
-                    "content": json.dumps(synthesis_result),
-                    "sources": synthesis_result.get("sources", {}),
+                    # The sources are already part of the serialized synthesis
+                    "content": orjson.dumps(synthesis_result, option=orjson.OPT_NON_STR_KEYS).decode(),
                     "workflow_id": workflow["plan_id"],
                     "relevance_score": 1.0
                 },
@@ -306,39 +534,37 @@ class WorkflowService:
     
     async def get_workflow_status(self, plan_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get workflow execution status."""
-        if plan_id not in self.active_workflows:
-            return None
-        
-        workflow = self.active_workflows[plan_id]
-        if workflow["user_id"] != user_id:
+        # Polled by clients, so each field is read from the workflow only once
+        workflow = self.active_workflows.get((user_id, plan_id))
+        if workflow is None:
             return None
         
+        current_step = workflow["current_step"]
+        total_steps = len(workflow["steps"])
+        error_count = len(workflow["errors"])
         return {
             "plan_id": plan_id,
             "query": workflow["query"],
             "status": workflow["status"],
-            "progress": (workflow["current_step"] + 1) / len(workflow["steps"]) if workflow["steps"] else 0,
-            "current_step": workflow["current_step"],
-            "total_steps": len(workflow["steps"]),
+            "progress": (current_step + 1) / total_steps if total_steps else 0,
+            "current_step": current_step,
+            "total_steps": total_steps,
             "created_at": workflow["created_at"],
             "updated_at": workflow["updated_at"],
-            "has_errors": len(workflow["errors"]) > 0,
-            "error_count": len(workflow["errors"])
+            "has_errors": error_count > 0,
+            "error_count": error_count
         }
     
     async def get_workflow_results(self, plan_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed workflow results."""
-        if plan_id not in self.active_workflows:
-            return None
-        
-        workflow = self.active_workflows[plan_id]
-        if workflow["user_id"] != user_id:
+        workflow = self.active_workflows.get((user_id, plan_id))
+        if workflow is None:
             return None
         
         return {
             "plan_id": plan_id,
             "query": workflow["query"],
-            "results": workflow["results"],
+            "results": {step_id: step_result.to_dict() for step_id, step_result in workflow["results"].items()},
             "errors": workflow["errors"],
             "status": workflow["status"],
             "execution_summary": await self._create_execution_summary(workflow)
@@ -346,17 +572,13 @@ class WorkflowService:
     
     async def _create_execution_summary(self, workflow: Dict[str, Any]) -> Dict[str, Any]:
         """Create execution summary."""
-        completed_steps = sum(1 for step_result in workflow["results"].values() if step_result.get("status") == "completed")
+        completed_steps = workflow["_completed_mask"].bit_count()
         total_steps = len(workflow["steps"])
         
         return {
             "total_steps": total_steps,
             "completed_steps": completed_steps,
             "success_rate": completed_steps / total_steps if total_steps > 0 else 0,
-            "tools_used": list(set(
-                step_result.get("tool_used") 
-                for step_result in workflow["results"].values() 
-                if step_result.get("tool_used")
-            )),
-            "duration": datetime.utcnow().isoformat()
+            "tools_used": list(workflow["_tools_used"]),
+            "duration": self._now_iso()
         }
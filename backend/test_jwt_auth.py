@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests for issuing access tokens and verifying them through JWTMiddleware."""
+
+import sys
+import os
+import uuid
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from auth.jwt_middleware import JWTManager, JWTMiddleware
+from core.config import reload_settings
+from models.user import User
+from services.auth_service import AuthService
+
+TEST_SECRET_KEY = "test-secret-key-that-is-at-least-32-chars"
+
+
+@pytest.fixture(autouse=True)
+def security_env(monkeypatch):
+    """Configure HS256 signing for the duration of a test."""
+    monkeypatch.setenv("SECURITY_SECRET_KEY", TEST_SECRET_KEY)
+    monkeypatch.setenv("SECURITY_ALGORITHM", "HS256")
+    reload_settings()
+    yield
+    monkeypatch.undo()
+    reload_settings()
+
+
+async def _whoami(scope, receive, send):
+    """Echo the user the middleware attached to the request."""
+    request = Request(scope, receive)
+    response = JSONResponse({"user_id": request.state.user_id})
+    await response(scope, receive, send)
+
+
+def test_issued_token_passes_middleware():
+    """A token from create_access_token is accepted by JWTMiddleware."""
+    user = User(user_id=uuid.uuid4(), email="reader@example.com", subscription_tier="explorer")
+    token = JWTManager.create_access_token(user)
+    
+    client = TestClient(JWTMiddleware(_whoami))
+    response = client.get("/api/v1/research/search", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"user_id": str(user.user_id)}
+
+
+def test_auth_service_token_passes_middleware():
+    """AuthService signs with the same key and algorithm the middleware checks."""
+    user_id = str(uuid.uuid4())
+    token = AuthService().generate_access_token(user_id)
+    
+    client = TestClient(JWTMiddleware(_whoami))
+    response = client.get("/api/v1/research/search", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"user_id": user_id}
+
+
+def test_session_claim_round_trips():
+    """Tokens issued for a login session carry it through verification."""
+    user = User(user_id=uuid.uuid4(), email="reader@example.com", subscription_tier="explorer")
+    session_id = uuid.uuid4()
+    
+    assert JWTManager.verify_token(JWTManager.create_access_token(user)).session_id is None
+    payload = JWTManager.verify_token(JWTManager.create_access_token(user, session_id=session_id))
+    assert payload.session_id == str(session_id)
+
+
+def test_missing_or_tampered_token_is_rejected():
+    """Requests without a valid signature get a 401, not a 500."""
+    user = User(user_id=uuid.uuid4(), email="reader@example.com", subscription_tier="explorer")
+    token = JWTManager.create_access_token(user)
+    
+    client = TestClient(JWTMiddleware(_whoami))
+    assert client.get("/api/v1/research/search").status_code == 401
+    response = client.get(
+        "/api/v1/research/search", headers={"Authorization": f"Bearer {token[:-2]}xx"}
+    )
+    assert response.status_code == 401
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__]))